@@ -0,0 +1 @@
+"""Benchmarks for pybambu. Run from the backend directory, e.g. `python -m benchmarks.bench_farm`."""
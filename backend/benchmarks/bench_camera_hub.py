@@ -0,0 +1,106 @@
+"""Compare a ChamberImageThread per printer with one CameraHub for many chamber camera streams.
+
+Serves a TLS camera stand-in for every printer from a separate process. Each printer uses its own
+loopback address. The clients' cameras are then read once with a thread per printer and once through a
+CameraHub, each in a fresh process. Reports the thread count, the CPU used by the reading process, the
+frame rate and the frame latency (camera send time to ChamberImage.set_jpeg).
+
+    python -m benchmarks.bench_camera_hub --cameras 100 --duration 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import statistics
+import threading
+import time
+
+from benchmarks.standins import FakeCamera, frame_sent_time, make_server_ssl_context, printer_host
+from pybambu import BambuClient, CameraHub
+from pybambu.bambu_client import ChamberImageThread
+
+ACCESS_CODE = "12345678"
+
+
+def serve_cameras(interval: float, frame_size: int, ready):
+    async def main():
+        camera = FakeCamera(ACCESS_CODE, interval=interval, frame_size=frame_size)
+        # Binding to every address lets one listener serve every loopback printer host.
+        await camera.start(make_server_ssl_context(), host="0.0.0.0")
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def run_mode(mode: str, cameras: int, duration: float, results):
+    logging.getLogger("pybambu").setLevel(logging.CRITICAL)
+    latencies = []
+    hub = CameraHub() if mode == "hub" else None
+    readers = []
+    for index in range(cameras):
+        client = BambuClient({'host': printer_host(index), 'access_code': ACCESS_CODE,
+                              'serial': f"BENCH{index:04d}", 'device_type': 'P1S', 'local_mqtt': True})
+        on_jpeg_received = client.on_jpeg_received
+
+        def timed(img, on_jpeg_received=on_jpeg_received):
+            on_jpeg_received(img)
+            latencies.append(time.time() - frame_sent_time(img))
+
+        client.on_jpeg_received = timed
+        reader = hub.create_camera(client) if hub is not None else ChamberImageThread(client)
+        reader.start()
+        readers.append(reader)
+
+    # Let every stream connect before measuring.
+    time.sleep(3)
+    del latencies[:]
+    threads = threading.active_count()
+    cpu_start = time.process_time()
+    time.sleep(duration)
+    cpu = time.process_time() - cpu_start
+    measured = list(latencies)
+
+    for reader in readers:
+        reader.stop()
+    if hub is not None:
+        hub.stop()
+    results[mode] = {
+        "threads": threads,
+        "cpu": cpu / duration,
+        "frames": len(measured),
+        "latency": statistics.median(measured) if measured else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--frame-size", type=int, default=60000)
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_cameras, args=(args.interval, args.frame_size, ready), daemon=True)
+    server.start()
+    ready.wait(30)
+    try:
+        manager = multiprocessing.Manager()
+        results = manager.dict()
+        print(f"{args.cameras} cameras, a {args.frame_size / 1024:.0f} KiB frame every {args.interval}s each")
+        for mode in ("threads", "hub"):
+            process = multiprocessing.Process(target=run_mode, args=(mode, args.cameras, args.duration, results))
+            process.start()
+            process.join()
+            result = results[mode]
+            print(f"{mode:>8}: {result['threads']:4d} threads  {result['cpu'] * 100:5.1f}% CPU  "
+                  f"{result['frames'] / args.duration:6.1f} frames/s  median latency {result['latency'] * 1000:6.1f} ms")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Chamber camera frame latency of ChamberImageThread against a local TLS camera stand-in.
+
+The stand-in runs in a separate process and sends a frame every --interval seconds. Each frame is split
+into --chunks pieces sent --chunk-delay seconds apart. Latency is measured from the moment the camera
+starts sending a frame to the moment the reader hands the complete jpeg to the client. The baseline is
+the previous reader, which slept for a second whenever the non-blocking socket had no data.
+
+    python -m benchmarks.bench_camera_latency --duration 10 --chunks 4 --chunk-delay 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing
+import socket
+import ssl
+import statistics
+import threading
+import time
+
+from benchmarks.standins import FakeCamera, frame_sent_time, make_server_ssl_context
+from pybambu import BambuClient
+from pybambu.bambu_client import ChamberImageThread
+from pybambu.camera import CAMERA_PORT, build_auth_data, create_ssl_context, get_payload_size
+
+ACCESS_CODE = "12345678"
+
+
+class PollingChamberReader(threading.Thread):
+    """The previous read loop: a non-blocking socket polled with a 1s sleep whenever it has no data"""
+
+    def __init__(self, client):
+        super().__init__(daemon=True)
+        self._client = client
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        ctx = create_ssl_context()
+        with socket.create_connection((self._client.host, CAMERA_PORT)) as sock:
+            sslSock = ctx.wrap_socket(sock, server_hostname=self._client.host)
+            sslSock.write(build_auth_data(self._client._access_code))
+            sslSock.setblocking(False)
+            img = None
+            payload_size = 0
+            while not self._stop_event.is_set():
+                try:
+                    dr = sslSock.recv(4096)
+                except ssl.SSLWantReadError:
+                    time.sleep(1)
+                    continue
+                if img is not None and len(dr) > 0:
+                    img += dr
+                    if len(img) >= payload_size:
+                        self._client.on_jpeg_received(img)
+                        img = None
+                elif len(dr) == 16:
+                    img = bytearray()
+                    payload_size = get_payload_size(dr)
+                elif len(dr) == 0:
+                    break
+
+
+def serve_camera(interval: float, chunks: int, chunk_delay: float, ready):
+    import asyncio
+
+    async def main():
+        camera = FakeCamera(ACCESS_CODE, interval=interval, chunks=chunks, chunk_delay=chunk_delay)
+        await camera.start(make_server_ssl_context())
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def measure(reader_class, duration: float) -> list:
+    client = BambuClient({'host': '127.0.0.1', 'access_code': ACCESS_CODE, 'serial': 'BENCH0000',
+                          'device_type': 'P1S', 'local_mqtt': True})
+    latencies = []
+    client.on_jpeg_received = lambda img: latencies.append(time.time() - frame_sent_time(img))
+    reader = reader_class(client)
+    reader.start()
+    time.sleep(duration)
+    reader.stop()
+    reader.join(5)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    if len(latencies) == 0:
+        print(f"{name:>20}: no frames received")
+        return
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{name:>20}: {len(latencies):4d} frames  median {statistics.median(latencies) * 1000:7.1f} ms  "
+          f"p95 {p95 * 1000:7.1f} ms  max {ordered[-1] * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--chunks", type=int, default=4)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    args = parser.parse_args()
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_camera, args=(args.interval, args.chunks, args.chunk_delay, ready),
+                                     daemon=True)
+    server.start()
+    ready.wait(30)
+    try:
+        print(f"frame every {args.interval}s in {args.chunks} chunks {args.chunk_delay * 1000:.0f} ms apart")
+        report("sleep(1) polling", measure(PollingChamberReader, args.duration))
+        report("ChamberImageThread", measure(ChamberImageThread, args.duration))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Cloud API requests from many printers with a connection per request and with the shared sessions.
+
+A FakeCloud stand-in serves the cloud API over TLS with --rtt seconds of delay on every connection and
+every response. --printers clients each fetch the task list and a cover image --rounds times: first with
+a new connection per request, as the module level curl functions did, then through the thread's shared
+session, then concurrently through the async session. Reports the time per request and the connections
+the stand-in accepted. Needs curl_cffi.
+
+    python -m benchmarks.bench_cloud --printers 20 --rounds 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import threading
+import time
+
+from benchmarks.standins import FakeCloud, make_server_ssl_context
+from pybambu import bambu_cloud
+from pybambu.bambu_cloud import BambuCloud, curl_available
+from pybambu.const import BAMBU_URL, BambuUrl
+
+
+def serve_cloud(cloud: FakeCloud, ready: threading.Event):
+    async def main():
+        await cloud.start(make_server_ssl_context())
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def point_at(port: int):
+    for url, path in ((BambuUrl.BIND, "/v1/iot-service/api/user/bind"),
+                      (BambuUrl.TASKS, "/v1/user-service/my/tasks"),
+                      (BambuUrl.SLICER_SETTINGS, "/v1/iot-service/api/slicer/setting?version=undefined")):
+        BAMBU_URL[url] = f"https://localhost:{port}{path}"
+    # The stand-in's certificate is self-signed.
+    bambu_cloud.SESSION_OPTIONS["verify"] = False
+
+
+def fetch(cloud: BambuCloud, rounds: int):
+    for _ in range(rounds):
+        tasks = cloud.get_tasklist()
+        cloud.download(tasks['hits'][0]['cover'])
+
+
+def per_request_connections(cloud: BambuCloud, rounds: int):
+    # The previous behaviour: the module level functions set up a new connection every time.
+    for _ in range(rounds):
+        bambu_cloud.close_session()
+        tasks = cloud.get_tasklist()
+        bambu_cloud.close_session()
+        cloud.download(tasks['hits'][0]['cover'])
+
+
+async def fetch_async(cloud: BambuCloud, rounds: int):
+    for _ in range(rounds):
+        tasks = await cloud.get_tasklist_async()
+        await cloud.download_async(tasks['hits'][0]['cover'])
+
+
+def run_threads(target, clouds: list, rounds: int) -> float:
+    start = time.monotonic()
+    # A thread per printer, like the per printer mqtt threads the requests used to run on.
+    threads = [threading.Thread(target=target, args=(cloud, rounds)) for cloud in clouds]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.monotonic() - start
+
+
+async def run_async(clouds: list, rounds: int) -> float:
+    start = time.monotonic()
+    await asyncio.gather(*[fetch_async(cloud, rounds) for cloud in clouds])
+    elapsed = time.monotonic() - start
+    await bambu_cloud.close_async_session()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--rtt", type=float, default=0.02)
+    args = parser.parse_args()
+    if not curl_available:
+        print("curl_cffi is not installed: pip install curl_cffi")
+        return
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    cloud = FakeCloud(delay=args.rtt, connect_delay=args.rtt)
+    ready = threading.Event()
+    threading.Thread(target=serve_cloud, args=(cloud, ready), daemon=True).start()
+    ready.wait(30)
+    point_at(cloud.port)
+    clouds = [BambuCloud("", "", "", "token") for _ in range(args.printers)]
+    requests = args.printers * args.rounds * 2
+    print(f"{args.printers} printers x {args.rounds} rounds of a task list and a cover, {args.rtt * 1000:.0f} ms round trips")
+    for name, run in (("per request", lambda: run_threads(per_request_connections, clouds, args.rounds)),
+                      ("session", lambda: run_threads(fetch, clouds, args.rounds)),
+                      ("async session", lambda: asyncio.run(run_async(clouds, args.rounds)))):
+        cloud.connections = 0
+        elapsed = run()
+        print(f"{name:>14}: {elapsed / requests * 1000:7.2f} ms/request  {elapsed:6.2f} s total  "
+              f"{cloud.connections} connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Decode and encode throughput of every available pybambu.codec backend.
+
+Decodes the recorded `print` report corpus (one push_all followed by the delta reports) from the raw
+mqtt payload bytes, and encodes the commands sent by publish. The stdlib baseline is the previous
+on_message path: `json.loads` on the payload.
+
+    python -m benchmarks.bench_codec
+"""
+from __future__ import annotations
+
+import json
+import time
+
+from benchmarks.payloads import DELTAS, PUSH_ALL, encoded
+from pybambu import codec
+from pybambu.commands import CHAMBER_LIGHT_ON, GET_VERSION, PUSH_ALL as PUSH_ALL_COMMAND, SEND_GCODE_TEMPLATE
+
+ROUNDS = 20
+
+
+def measure(function, items) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for item in items:
+            function(item)
+    return time.perf_counter() - start
+
+
+def main():
+    corpus = [encoded(PUSH_ALL)] + [encoded(delta) for delta in DELTAS]
+    corpus_bytes = sum(len(payload) for payload in corpus)
+    commands = [GET_VERSION, PUSH_ALL_COMMAND, CHAMBER_LIGHT_ON, SEND_GCODE_TEMPLATE]
+
+    baseline = measure(json.loads, corpus)
+    print(f"corpus: {len(corpus)} payloads, {corpus_bytes / 1024:.1f} KiB")
+    print(f"{'json.loads (before)':>20}: {ROUNDS * corpus_bytes / baseline / 2**20:8.1f} MiB/s decode")
+    for name in codec.BACKENDS:
+        codec.set_backend(name)
+        decode = measure(codec.loads, corpus)
+        encode = measure(codec.dumps, commands)
+        print(f"{name:>20}: {ROUNDS * corpus_bytes / decode / 2**20:8.1f} MiB/s decode  "
+              f"({baseline / decode:.1f}x)  {encode / (ROUNDS * len(commands)) * 1e6:6.2f} us/command encode")
+
+
+if __name__ == "__main__":
+    main()
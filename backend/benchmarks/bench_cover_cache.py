@@ -0,0 +1,76 @@
+"""Cover image downloads over restarts, with and without a CoverCache.
+
+A FakeCloud stand-in answers after --rtt seconds. --printers clients with a cloud auth token start up and
+fetch their current task and its cover, --restarts times, as if the application was restarted. The first
+run downloads every cover every time, the second goes through a CoverCache in a temporary directory that
+survives the restarts. Reports the cover downloads and the time until every printer had its cover.
+Needs curl_cffi.
+
+    python -m benchmarks.bench_cover_cache --printers 10 --restarts 5
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_cloud import point_at, serve_cloud
+from benchmarks.standins import FakeCloud
+from pybambu import BambuClient, CoverCache
+from pybambu.bambu_cloud import curl_available
+
+
+def start_clients(printers: int, cache_directory: str | None) -> float:
+    cache = CoverCache(cache_directory) if cache_directory is not None else None
+    arrived = threading.Semaphore(0)
+
+    def callback(event: str):
+        if event == "event_print_task_data_update":
+            arrived.release()
+
+    start = time.monotonic()
+    for index in range(printers):
+        client = BambuClient({'host': '127.0.0.1', 'access_code': '12345678', 'serial': f"BENCH{index:04d}",
+                              'device_type': 'P1S', 'auth_token': 'token', 'cover_cache': cache})
+        client.callback = callback
+        client.get_device().print_update(data={"gcode_state": "IDLE"})
+    for _ in range(printers):
+        arrived.acquire()
+    elapsed = time.monotonic() - start
+    if cache is not None:
+        cache.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, default=10)
+    parser.add_argument("--restarts", type=int, default=5)
+    parser.add_argument("--rtt", type=float, default=0.1)
+    args = parser.parse_args()
+    if not curl_available:
+        print("curl_cffi is not installed: pip install curl_cffi")
+        return
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    server = FakeCloud(devices=args.printers, delay=args.rtt, cover_size=200000)
+    ready = threading.Event()
+    threading.Thread(target=serve_cloud, args=(server, ready), daemon=True).start()
+    ready.wait(30)
+    point_at(server.port)
+
+    print(f"{args.printers} printers, {args.restarts} restarts, {args.rtt * 1000:.0f} ms cloud responses")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, cache_directory in (("no cache", None), ("cover cache", directory)):
+            server.cover_requests = 0
+            elapsed = 0
+            for _ in range(args.restarts):
+                elapsed += start_clients(args.printers, cache_directory)
+            print(f"{name:>11}: {server.cover_requests:4d} cover downloads  "
+                  f"{elapsed / args.restarts * 1000:8.1f} ms until every printer had its cover")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Time the network thread spends firing events to a slow consumer.
+
+Replays the recorded report corpus into the given number of clients on one thread, the way the mqtt
+thread updates them. The consumer sleeps for --consumer-ms per event. The run is done once with the
+callback called directly, which is the previous behaviour, and once through an EventDelivery
+draining into a worker thread. Reports the time per report on the producer thread, together with the
+delivery counts.
+
+    python -m benchmarks.bench_delivery --printers 20 --consumer-ms 2
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import logging
+import time
+
+from benchmarks.payloads import DELTAS, PUSH_ALL
+from pybambu import BambuClient, EventDelivery
+
+
+def run(printers: int, consumer_ms: float, delivery: EventDelivery | None) -> tuple:
+    def consumer(event):
+        time.sleep(consumer_ms / 1000)
+
+    devices = []
+    for index in range(printers):
+        client = BambuClient({'host': '', 'serial': f"BENCH{index:04d}", 'device_type': 'X1C'})
+        client.callback = consumer if delivery is None else delivery.wrap(consumer, client._serial)
+        client.get_device().print_update(copy.deepcopy(PUSH_ALL))
+        devices.append(client.get_device())
+
+    reports = [copy.deepcopy(delta) for delta in DELTAS]
+    start = time.perf_counter()
+    for report in reports:
+        for device in devices:
+            device.print_update(report)
+    elapsed = time.perf_counter() - start
+    return elapsed / (len(reports) * len(devices)), len(reports) * len(devices)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, default=20)
+    parser.add_argument("--consumer-ms", type=float, default=2)
+    args = parser.parse_args()
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    direct, count = run(args.printers, args.consumer_ms, None)
+    print(f"{count} reports, consumer {args.consumer_ms} ms/event")
+    print(f"  direct callback: {direct * 1e6:9.1f} us/report on the network thread")
+
+    delivery = EventDelivery()
+    queued, _ = run(args.printers, args.consumer_ms, delivery)
+    print(f"    EventDelivery: {queued * 1e6:9.1f} us/report on the network thread  {delivery.stats()}")
+    delivery.close()
+
+
+if __name__ == "__main__":
+    main()
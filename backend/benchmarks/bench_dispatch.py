@@ -0,0 +1,53 @@
+"""Per message cost of Device.print_update over recorded delta reports.
+
+Compares the key routed dispatch with updating all thirteen Device members for every report.
+
+    python -m benchmarks.bench_dispatch
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import time
+
+from benchmarks.payloads import DELTAS, PUSH_ALL
+from pybambu import BambuClient
+from pybambu.models import PRINT_UPDATE_ORDER
+from pybambu.schema import parse_print_report
+
+ROUNDS = 50
+
+
+def make_device():
+    client = BambuClient({'host': '', 'serial': 'BENCH', 'device_type': 'X1C'})
+    device = client.get_device()
+    device.print_update(data=copy.deepcopy(PUSH_ALL))
+    return device
+
+
+def update_all_members(device, data):
+    report = parse_print_report(data)
+    for member in PRINT_UPDATE_ORDER:
+        getattr(device, member).print_update(report)
+
+
+def measure(update) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for delta in DELTAS:
+            update(delta)
+    return (time.perf_counter() - start) / (ROUNDS * len(DELTAS))
+
+
+def main():
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+    all_members = make_device()
+    dispatched = make_device()
+    before = measure(lambda data: update_all_members(all_members, data))
+    after = measure(lambda data: dispatched.print_update(data=data))
+    print(f"all members: {before * 1e6:8.2f} us/message")
+    print(f" dispatched: {after * 1e6:8.2f} us/message  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compare the thread per printer design with FarmManager.
+
+Runs a local TLS mqtt broker and chamber camera for every printer in a separate process, then connects
+the same number of P1S clients once with the threaded BambuClient and once driven by a FarmManager,
+each in a fresh process. Reports thread count, RSS and mqtt message latency (broker send time to the
+end of BambuClient.on_message).
+
+    python -m benchmarks.bench_farm --printers 60 --duration 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import statistics
+import threading
+import time
+
+from benchmarks.standins import printer_host, run_standins
+from pybambu import BambuClient, FarmManager
+
+ACCESS_CODE = "12345678"
+
+
+def rss_kib() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def make_client(index: int, latencies: list) -> BambuClient:
+    client = BambuClient({
+        'host': printer_host(index),
+        'access_code': ACCESS_CODE,
+        'serial': f"BENCH{index:04d}",
+        'device_type': 'P1S',
+        'local_mqtt': True,
+        'enable_camera': True,
+    })
+    on_message = client.on_message
+
+    def timed_on_message(mqttc, userdata, message):
+        on_message(mqttc, userdata, message)
+        sent = json.loads(message.payload).get("print", {}).get("bench_ts")
+        if sent is not None:
+            latencies.append(time.time() - sent)
+
+    client.on_message = timed_on_message
+    return client
+
+
+def run_mode(mode: str, printers: int, duration: float, results):
+    async def main():
+        latencies = []
+        frames = [0]
+        farm = FarmManager() if mode == "farm" else None
+        clients = []
+        for index in range(printers):
+            client = make_client(index, latencies)
+            if farm is not None:
+                farm.add_client(client)
+
+            def callback(event):
+                if event == "event_printer_chamber_image_update":
+                    frames[0] += 1
+
+            await client.connect(callback)
+            clients.append(client)
+
+        # Let connections settle before measuring steady state.
+        await asyncio.sleep(duration / 4)
+        latencies.clear()
+        await asyncio.sleep(duration)
+
+        results.put({
+            "mode": mode,
+            "threads": threading.active_count(),
+            "rss_mib": rss_kib() / 1024,
+            "messages": len(latencies),
+            "frames": frames[0],
+            "p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+            "p99_ms": statistics.quantiles(latencies, n=100)[98] * 1000 if len(latencies) > 1 else float("nan"),
+        })
+
+        if farm is not None:
+            await farm.stop()
+        else:
+            for client in clients:
+                client.disconnect()
+
+    asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, default=60)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between mqtt messages per printer")
+    args = parser.parse_args()
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    ready = multiprocessing.Event()
+    standins = multiprocessing.Process(target=run_standins, daemon=True,
+                                       args=(args.interval, 1.0, ACCESS_CODE, ready))
+    standins.start()
+    ready.wait()
+
+    results = multiprocessing.Queue()
+    for mode in ("threaded", "farm"):
+        process = multiprocessing.Process(target=run_mode, args=(mode, args.printers, args.duration, results))
+        process.start()
+        result = results.get()
+        process.join(timeout=10)
+        print(f"{result['mode']:>9}: {result['threads']:4d} threads  {result['rss_mib']:7.1f} MiB RSS  "
+              f"{result['messages']:6d} msgs  {result['frames']:5d} frames  "
+              f"latency p50 {result['p50_ms']:6.2f} ms  p99 {result['p99_ms']:6.2f} ms")
+
+    standins.terminate()
+
+
+if __name__ == "__main__":
+    main()
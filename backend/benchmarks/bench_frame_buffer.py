@@ -0,0 +1,96 @@
+"""Cost of keeping recent chamber camera frames for --cameras printers.
+
+Every camera appends --frames frames of about --frame-size bytes to a FrameBuffer with a --budget MiB
+budget, and then --lookups frames are looked up by timestamp. The baseline keeps a copy of every frame in
+a deque trimmed to the same number of bytes and looks frames up by scanning it. Each runs in a fresh
+process. Reports the CPU time per append and per lookup, and how much the resident memory grew.
+
+    python -m benchmarks.bench_frame_buffer --cameras 20 --frames 2000
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import multiprocessing
+import os
+import random
+import time
+
+from benchmarks.standins import fake_jpeg
+from pybambu.frame_buffer import FrameBuffer
+
+
+class DequeBuffer:
+    """The straightforward version: a copy of each frame in a deque, trimmed to a byte budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._frames = collections.deque()
+        self._used = 0
+
+    def append(self, jpeg, timestamp: float):
+        self._frames.append((timestamp, bytes(jpeg)))
+        self._used += len(jpeg)
+        while self._used > self.max_bytes:
+            self._used -= len(self._frames.popleft()[1])
+
+    def frame_at(self, timestamp: float):
+        found = None
+        for frame in self._frames:
+            if frame[0] > timestamp:
+                break
+            found = frame
+        return found
+
+
+def resident_memory() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def run(name: str, args):
+    budget = args.budget * 2 ** 20
+    # Frame sizes vary with the scene. Each frame arrives in a buffer of its own, like FrameAssembler's.
+    frames = [fake_jpeg(int(args.frame_size * random.uniform(0.8, 1.2))) for _ in range(16)]
+    rss = resident_memory()
+    buffers = [DequeBuffer(budget) if name == "deque" else FrameBuffer(max_bytes=budget) for _ in range(args.cameras)]
+    append_time = 0
+    for index in range(args.frames):
+        jpeg = memoryview(bytearray(frames[index % len(frames)])).toreadonly()
+        start = time.process_time()
+        for buffer in buffers:
+            buffer.append(jpeg, index * 0.1)
+        append_time += time.process_time() - start
+    grown = resident_memory() - rss
+
+    # Somewhere within the last 500 frames, which every buffer still holds.
+    lookups = [random.uniform(args.frames - 500, args.frames) * 0.1 for _ in range(args.lookups)]
+    start = time.process_time()
+    for timestamp in lookups:
+        for buffer in buffers:
+            buffer.frame_at(timestamp)
+    lookup_time = time.process_time() - start
+
+    print(f"{name:>12}: {append_time / (args.frames * args.cameras) * 1e6:7.1f} us/append  "
+          f"{lookup_time / (args.lookups * args.cameras) * 1e6:8.1f} us/lookup  "
+          f"{grown / 2 ** 20:7.1f} MiB resident")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, default=20)
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--frame-size", type=int, default=60000)
+    parser.add_argument("--budget", type=int, default=32)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.cameras} cameras, {args.frames} frames of ~{args.frame_size / 1024:.0f} KiB, {args.budget} MiB each")
+    for name in ("deque", "FrameBuffer"):
+        process = multiprocessing.Process(target=run, args=(name, args))
+        process.start()
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
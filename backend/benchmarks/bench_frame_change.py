@@ -0,0 +1,68 @@
+"""Chamber image work saved by holding back frames that show nothing new.
+
+--cameras printers each receive --frames frames of about --frame-size bytes. A share of the printers set by
+--idle repeat the same frame, like an idle printer with the light off. The others send a new frame every
+time. Every frame that gets through is handled by a consumer that base64 encodes it, like a UI push. Runs
+once with every frame passed on and once with a FrameChangeDetector, and reports the frames passed on and
+the CPU time per frame received.
+
+    python -m benchmarks.bench_frame_change --cameras 50 --idle 0.8
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import logging
+import time
+
+from benchmarks.standins import fake_jpeg
+from pybambu import BambuClient
+
+
+def run(threshold, args) -> tuple:
+    delivered = 0
+    images = []
+    for index in range(args.cameras):
+        client = BambuClient({'host': '127.0.0.1', 'access_code': '12345678', 'serial': f"BENCH{index:04d}",
+                              'device_type': 'P1S', 'frame_change_threshold': threshold})
+        image = client.get_device().chamber_image
+
+        def consumer(event, image=image):
+            nonlocal delivered
+            if event == "event_printer_chamber_image_update":
+                base64.b64encode(image.get_jpeg())
+                delivered += 1
+
+        client.callback = consumer
+        images.append(image)
+
+    idle = int(args.cameras * args.idle)
+    frames = [fake_jpeg(args.frame_size, seed=seed) for seed in range(8)]
+    start = time.process_time()
+    for number in range(args.frames):
+        for index, image in enumerate(images):
+            jpeg = frames[0] if index < idle else frames[number % len(frames)]
+            # Each frame arrives in a buffer of its own.
+            image.set_jpeg(memoryview(bytearray(jpeg)).toreadonly())
+    elapsed = time.process_time() - start
+    return delivered, elapsed / (args.cameras * args.frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--frame-size", type=int, default=60000)
+    parser.add_argument("--idle", type=float, default=0.8)
+    args = parser.parse_args()
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    total = args.cameras * args.frames
+    print(f"{args.cameras} cameras x {args.frames} frames of {args.frame_size / 1024:.0f} KiB, {args.idle:.0%} idle")
+    for name, threshold in (("every frame", None), ("detector", 0)):
+        delivered, cpu = run(threshold, args)
+        print(f"{name:>12}: {delivered:6d}/{total} frames passed on  {cpu * 1e6:7.1f} us CPU/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""CPU and memory allocated per chamber camera frame, from the socket reads to the frame readers.
+
+Replays the port 6000 stream of --cameras simulated cameras from memory. Each socket returns at most one
+4096 byte TLS record per read, with the 16 byte header in a record of its own, as the printers send it.
+Every completed frame is read by --readers consumers through ChamberImage.get_jpeg. The baseline is the
+previous path: recv() chunks appended to a growing bytearray and a copy of the frame for each reader.
+
+    python -m benchmarks.bench_frames --cameras 50 --frames 40
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+from benchmarks.standins import fake_jpeg, frame_header
+from pybambu import BambuClient
+from pybambu.camera import FrameAssembler, get_payload_size
+
+RECORD_SIZE = 4096
+ROUNDS = 5
+
+
+class ReplaySocket:
+    """Serves a recorded camera stream, one TLS record at most per read, repeating it forever"""
+
+    def __init__(self, frame: bytes):
+        header = frame_header(len(frame))
+        self._records = [header] + [frame[offset:offset + RECORD_SIZE] for offset in range(0, len(frame), RECORD_SIZE)]
+        self._index = 0
+        self._offset = 0
+
+    def _next(self, size: int) -> memoryview:
+        record = self._records[self._index]
+        data = memoryview(record)[self._offset:self._offset + size]
+        self._offset += len(data)
+        if self._offset == len(record):
+            self._index = (self._index + 1) % len(self._records)
+            self._offset = 0
+        return data
+
+    def recv(self, size: int) -> bytes:
+        return bytes(self._next(size))
+
+    def recv_into(self, buffer, size: int = 0) -> int:
+        data = self._next(size or len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def previous_reader(sock: ReplaySocket, frames: int, deliver):
+    img = None
+    payload_size = 0
+    while frames > 0:
+        dr = sock.recv(RECORD_SIZE)
+        if img is not None and len(dr) > 0:
+            img += dr
+            if len(img) == payload_size:
+                deliver(img)
+                img = None
+                frames -= 1
+        elif len(dr) == 16:
+            img = bytearray()
+            payload_size = get_payload_size(dr)
+
+
+def assembler_reader(sock: ReplaySocket, frames: int, deliver):
+    assembler = FrameAssembler()
+    while frames > 0:
+        assembler.receive(sock)
+        img = assembler.take_frame()
+        if img is not None:
+            deliver(img)
+            frames -= 1
+
+
+def run(reader, copy_per_reader: bool, cameras: int, frames: int, readers: int, frame_size: int) -> tuple:
+    images = []
+    for index in range(cameras):
+        client = BambuClient({'host': '127.0.0.1', 'access_code': '12345678', 'serial': f"BENCH{index:04d}",
+                              'device_type': 'P1S', 'frame_change_threshold': None})
+        images.append(client.get_device().chamber_image)
+    sockets = [ReplaySocket(fake_jpeg(frame_size, seed=index)) for index in range(cameras)]
+
+    def make_deliver(image):
+        def deliver(img):
+            image.set_jpeg(img)
+            for _ in range(readers):
+                jpeg = image.get_jpeg()
+                if copy_per_reader:
+                    # ChamberImage.get_jpeg used to return a copy of the frame.
+                    jpeg = bytearray(jpeg)
+        return deliver
+
+    delivers = [make_deliver(image) for image in images]
+    # The fastest of a few rounds, as other processes on the machine only ever add time.
+    cpu = None
+    for _ in range(ROUNDS):
+        start = time.process_time()
+        for sock, deliver in zip(sockets, delivers):
+            reader(sock, frames, deliver)
+        elapsed = time.process_time() - start
+        cpu = elapsed if cpu is None else min(cpu, elapsed)
+
+    # The most memory in use at once while a camera's frames are received, over what it held before.
+    transient = 0
+    tracemalloc.start()
+    for sock, deliver in zip(sockets, delivers):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        reader(sock, frames, deliver)
+        transient = max(transient, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return cpu / (cameras * frames), transient
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=40)
+    parser.add_argument("--readers", type=int, default=3)
+    parser.add_argument("--frame-size", type=int, default=120000)
+    args = parser.parse_args()
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    print(f"{args.cameras} cameras x {args.frames} frames of {args.frame_size / 1024:.0f} KiB, {args.readers} readers per frame")
+    for name, reader, copy_per_reader in (("append + copy (before)", previous_reader, True),
+                                          ("FrameAssembler", assembler_reader, False)):
+        cpu, transient = run(reader, copy_per_reader, args.cameras, args.frames, args.readers, args.frame_size)
+        print(f"{name:>24}: {cpu * 1e6:8.1f} us CPU/frame  {transient / 1024:7.1f} KiB peak allocation per camera")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Memory held by the printer state models of a large farm.
+
+Builds the given number of X1C clients, feeds each Device its own decoded push_all report (four AMS
+units) and reports the memory traced to the model objects, as well as the total for the whole client.
+
+    python -m benchmarks.bench_memory --devices 1000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import logging
+import tracemalloc
+
+from benchmarks.payloads import PUSH_ALL, encoded
+from pybambu import BambuClient, codec
+
+MODELS_FILE = "*pybambu/models.py"
+
+
+def build(count: int) -> list:
+    payload = encoded(PUSH_ALL)
+    clients = []
+    for index in range(count):
+        client = BambuClient({'host': '', 'serial': f"BENCH{index:04d}", 'device_type': 'X1C'})
+        client.get_device().print_update(data=codec.loads(payload)["print"])
+        clients.append(client)
+    return clients
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=1000)
+    args = parser.parse_args()
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    clients = build(args.devices)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    models = sum(stat.size_diff for stat in after.filter_traces([tracemalloc.Filter(True, MODELS_FILE)])
+                 .compare_to(before.filter_traces([tracemalloc.Filter(True, MODELS_FILE)]), "filename"))
+    print(f"{len(clients)} devices")
+    print(f"models: {models / 2**20:7.2f} MiB  {models / len(clients) / 1024:6.1f} KiB/device")
+    print(f" total: {total / 2**20:7.2f} MiB  {total / len(clients) / 1024:6.1f} KiB/device")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Fan one chamber camera connection out to many MJPEG viewers.
+
+A TLS camera stand-in in a separate process sends frames at --camera-fps. A CameraHub reads them for one
+P1S client, and an MJPEGServer serves them to --viewers HTTP viewers capped at --viewer-fps. One more
+viewer reads at only --slow-kbps through a fixed 64 KiB receive window, like a viewer on a slow link.
+Reports the frame rate and frame age (camera send time to the end of
+the part) of every viewer. The slow viewer should keep receiving recent frames at a lower rate rather
+than falling further behind.
+
+    python -m benchmarks.bench_mjpeg --viewers 20 --duration 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import socket
+import statistics
+import time
+
+from benchmarks.standins import FakeCamera, frame_sent_time, make_server_ssl_context
+from pybambu import BambuClient, CameraHub, MJPEGServer
+
+ACCESS_CODE = "12345678"
+SLOW_RECEIVE_WINDOW = 64 * 1024
+
+
+def serve_camera(interval: float, frame_size: int, ready):
+    async def main():
+        camera = FakeCamera(ACCESS_CODE, interval=interval, frame_size=frame_size)
+        await camera.start(make_server_ssl_context())
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+async def view(port: int, serial: str, fps: float, duration: float, slow_kbps: float | None = None) -> list:
+    """Read an MJPEG stream for duration seconds. Returns the age of every frame received."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if slow_kbps is not None:
+        # A fixed receive window, so the viewer's side of the connection can't absorb a backlog of frames.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_RECEIVE_WINDOW)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+    # A small reader buffer too, like a player that decodes as it reads.
+    reader, writer = await asyncio.open_connection(sock=sock, limit=16384 if slow_kbps is not None else 2 ** 16)
+    writer.write(f"GET /cameras/{serial}/stream?fps={fps} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+    await writer.drain()
+    await reader.readuntil(b"\r\n\r\n")
+    ages = []
+    end = time.monotonic() + duration
+    try:
+        while time.monotonic() < end:
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = int(headers.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            if slow_kbps is None:
+                jpeg = await reader.readexactly(length)
+            else:
+                jpeg = bytearray()
+                while len(jpeg) < length:
+                    chunk = await reader.readexactly(min(4096, length - len(jpeg)))
+                    jpeg += chunk
+                    await asyncio.sleep(len(chunk) / (slow_kbps * 1024))
+            await reader.readexactly(2)
+            ages.append(time.time() - frame_sent_time(jpeg))
+    finally:
+        writer.close()
+    return ages
+
+
+def describe(name: str, ages: list, duration: float):
+    if len(ages) == 0:
+        return f"{name:>12}: no frames"
+    return (f"{name:>12}: {len(ages) / duration:5.1f} frames/s  median age {statistics.median(ages) * 1000:7.1f} ms  "
+            f"last age {ages[-1] * 1000:7.1f} ms")
+
+
+async def run(args):
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+    client = BambuClient({'host': '127.0.0.1', 'access_code': ACCESS_CODE, 'serial': 'BENCH0000',
+                          'device_type': 'P1S', 'local_mqtt': True})
+    hub = CameraHub()
+    camera = hub.create_camera(client)
+    camera.start()
+    server = MJPEGServer(host="127.0.0.1", port=0, max_fps=args.viewer_fps)
+    server.add_client(client)
+    await server.start()
+    await asyncio.sleep(2)
+
+    viewers = [view(server.port, 'BENCH0000', args.viewer_fps, args.duration) for _ in range(args.viewers)]
+    viewers.append(view(server.port, 'BENCH0000', args.viewer_fps, args.duration, slow_kbps=args.slow_kbps))
+    results = await asyncio.gather(*viewers)
+
+    fast = [age for ages in results[:-1] for age in ages]
+    print(describe("viewers", fast, args.duration * args.viewers))
+    print(describe("slow viewer", results[-1], args.duration))
+
+    await server.stop()
+    camera.stop()
+    hub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--viewers", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--camera-fps", type=float, default=10)
+    parser.add_argument("--viewer-fps", type=float, default=5)
+    parser.add_argument("--frame-size", type=int, default=60000)
+    parser.add_argument("--slow-kbps", type=float, default=100)
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve_camera, args=(1 / args.camera_fps, args.frame_size, ready), daemon=True)
+    process.start()
+    ready.wait(30)
+    try:
+        print(f"camera {args.camera_fps} fps, {args.frame_size / 1024:.0f} KiB frames, "
+              f"{args.viewers} viewers at {args.viewer_fps} fps, one viewer at {args.slow_kbps} KiB/s")
+        asyncio.run(run(args))
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
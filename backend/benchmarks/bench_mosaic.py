@@ -0,0 +1,74 @@
+"""Cost of a farm mosaic as the share of printers with a new frame changes.
+
+--cameras printers each have a 1080p chamber frame. Every round, the share of printers set by --changing
+gets a new frame and the MosaicCompositor composes the grid. Reports the time per mosaic, the tiles
+redrawn and the mosaic size, against sending every printer's frame to the viewer. Needs Pillow.
+
+    python -m benchmarks.bench_mosaic --cameras 40 --rounds 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import logging
+import time
+
+from pybambu import BambuClient
+from pybambu.mosaic import MosaicCompositor, pil_available
+
+
+def make_frame(seed: int) -> bytes:
+    from PIL import Image
+
+    image = Image.effect_noise((1920, 1080), 40 + seed % 20).convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+async def run(changing: float, args, frames: list):
+    clients = [BambuClient({'host': '127.0.0.1', 'access_code': '12345678', 'serial': f"BENCH{index:04d}",
+                            'device_type': 'P1S', 'frame_change_threshold': None}) for index in range(args.cameras)]
+    mosaic = MosaicCompositor()
+    for index, client in enumerate(clients):
+        client.get_device().chamber_image.set_jpeg(frames[index % len(frames)])
+        mosaic.add_client(client)
+    # The first mosaic draws every tile and starts the worker process.
+    await mosaic.compose()
+    drawn = mosaic.tiles_drawn
+
+    changed = int(args.cameras * changing)
+    start = time.monotonic()
+    for number in range(args.rounds):
+        for index in range(changed):
+            clients[index].get_device().chamber_image.set_jpeg(frames[(number + index) % len(frames)])
+        await mosaic.compose()
+    elapsed = (time.monotonic() - start) / args.rounds
+    tiles = (mosaic.tiles_drawn - drawn) / args.rounds
+    size = len(mosaic.get_jpeg())
+    await mosaic.stop()
+    return elapsed, tiles, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    if not pil_available:
+        print("Pillow is not installed: pip install pillow")
+        return
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    frames = [make_frame(seed) for seed in range(8)]
+    streams = sum(len(frames[index % len(frames)]) for index in range(args.cameras))
+    print(f"{args.cameras} cameras, {streams / 1024:.0f} KiB to send every frame to a viewer")
+    for changing in (0.1, 0.5, 1.0):
+        elapsed, tiles, size = asyncio.run(run(changing, args, frames))
+        print(f"{changing:4.0%} changing: {elapsed * 1000:7.1f} ms/mosaic  {tiles:5.1f} tiles redrawn  "
+              f"{size / 1024:6.0f} KiB mosaic")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Time the MQTT network thread spends on a print start while the cloud task data is fetched.
+
+A FakeCloud stand-in answers the task list and cover image requests after --rtt seconds. --printers clients
+with a cloud auth token receive the report of a print starting, one after another on a single thread like
+paho's network loop. The first run fetches the task data inline as PrintJob used to, the second hands it
+to the task data workers. Reports how long the reports held up the thread and how long until every
+printer's task data arrived. Needs curl_cffi.
+
+    python -m benchmarks.bench_task_data --printers 10 --rtt 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+import time
+
+from benchmarks.bench_cloud import point_at, serve_cloud
+from benchmarks.standins import FakeCloud
+from pybambu import BambuClient
+from pybambu.bambu_cloud import TASK_LIST_TTL, curl_available
+from pybambu.models import PrintJob
+
+IDLE = {"gcode_state": "IDLE", "print_type": "idle", "mc_percent": 0}
+RUNNING = {"gcode_state": "RUNNING", "print_type": "cloud", "mc_percent": 0}
+
+
+def update_task_data_inline(print_job: PrintJob, max_age: float = TASK_LIST_TTL):
+    # As before: the fetch and the download ran inside the report's print_update.
+    print_job._task_request += 1
+    print_job._load_task_data(print_job._task_request, max_age)
+
+
+def run(printers: int) -> tuple:
+    arrived = threading.Semaphore(0)
+
+    def callback(event: str):
+        if event == "event_print_task_data_update":
+            arrived.release()
+
+    clients = []
+    for index in range(printers):
+        client = BambuClient({'host': '127.0.0.1', 'access_code': '12345678', 'serial': f"BENCH{index:04d}",
+                              'device_type': 'P1S', 'auth_token': 'token'})
+        client.callback = callback
+        client.get_device().print_update(data=dict(IDLE))
+        clients.append(client)
+    # The first report fetched the task data too.
+    for _ in range(printers):
+        arrived.acquire()
+
+    # Each print start fetches the task list, rather than reusing the one of the first report.
+    clients[0].bambu_cloud.task_list_cache.clear()
+    start = time.monotonic()
+    for client in clients:
+        client.get_device().print_update(data=dict(RUNNING))
+    blocked = time.monotonic() - start
+    for _ in range(printers):
+        arrived.acquire()
+    return blocked, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, default=10)
+    parser.add_argument("--rtt", type=float, default=0.2)
+    args = parser.parse_args()
+    if not curl_available:
+        print("curl_cffi is not installed: pip install curl_cffi")
+        return
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    cloud = FakeCloud(devices=args.printers, delay=args.rtt)
+    ready = threading.Event()
+    threading.Thread(target=serve_cloud, args=(cloud, ready), daemon=True).start()
+    ready.wait(30)
+    point_at(cloud.port)
+
+    print(f"{args.printers} printers starting a print, {args.rtt * 1000:.0f} ms cloud responses")
+    update_task_data = PrintJob._update_task_data
+    for name, inline in (("inline", True), ("workers", False)):
+        PrintJob._update_task_data = update_task_data_inline if inline else update_task_data
+        blocked, done = run(args.printers)
+        print(f"{name:>8}: network thread held {blocked * 1000:8.1f} ms  all task data after {done * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
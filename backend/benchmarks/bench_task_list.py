@@ -0,0 +1,73 @@
+"""Cloud task list requests when many printers of one account start a print together.
+
+A FakeCloud stand-in answers the task list after --rtt seconds. --printers clients on the same account look
+up their latest task at the same moment, like after a farm-wide dispatch, --rounds times. The first run
+fetches and filters the account's task list for every printer, the second goes through the account's
+shared TaskListCache. Reports the requests the stand-in served and the time per round. Needs curl_cffi.
+
+    python -m benchmarks.bench_task_list --printers 10 --rtt 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+import time
+
+from benchmarks.bench_cloud import point_at, serve_cloud
+from benchmarks.standins import FakeCloud
+from pybambu.bambu_cloud import TASK_LIST_PRINT_START_AGE, BambuCloud, curl_available
+
+
+def latest_task_uncached(cloud: BambuCloud, device_id: str) -> dict:
+    # As before: every printer fetched the whole task list and filtered it.
+    tasks = [task for task in cloud.get_tasklist()['hits'] if task['deviceId'] == device_id]
+    return tasks[0] if len(tasks) != 0 else None
+
+
+def latest_task_cached(cloud: BambuCloud, device_id: str) -> dict:
+    return cloud.get_latest_task_for_printer(device_id, TASK_LIST_PRINT_START_AGE)
+
+
+def run(lookup, clouds: list, rounds: int) -> float:
+    elapsed = 0
+    for _ in range(rounds):
+        clouds[0].task_list_cache.clear()
+        start = time.monotonic()
+        threads = [threading.Thread(target=lookup, args=(cloud, f"BENCH{index:04d}"))
+                   for index, cloud in enumerate(clouds)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed += time.monotonic() - start
+    return elapsed / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--rtt", type=float, default=0.2)
+    args = parser.parse_args()
+    if not curl_available:
+        print("curl_cffi is not installed: pip install curl_cffi")
+        return
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    cloud = FakeCloud(devices=args.printers, delay=args.rtt)
+    ready = threading.Event()
+    threading.Thread(target=serve_cloud, args=(cloud, ready), daemon=True).start()
+    ready.wait(30)
+    point_at(cloud.port)
+
+    clouds = [BambuCloud("", "", "", "token") for _ in range(args.printers)]
+    print(f"{args.printers} printers of one account starting together, {args.rtt * 1000:.0f} ms cloud responses")
+    for name, lookup in (("uncached", latest_task_uncached), ("shared cache", latest_task_cached)):
+        cloud.requests = 0
+        elapsed = run(lookup, clouds, args.rounds)
+        print(f"{name:>12}: {cloud.requests / args.rounds:5.1f} requests/round  {elapsed * 1000:8.1f} ms/round")
+
+
+if __name__ == "__main__":
+    main()
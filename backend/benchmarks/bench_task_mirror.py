@@ -0,0 +1,85 @@
+"""Usage reports over the cloud task history, downloaded every time or from a TaskMirror.
+
+A FakeCloud stand-in holds --history tasks and answers after --rtt seconds. Between reports, --new prints
+start. The first run downloads the newest 500 tasks for every report and totals them by device, as the
+backend's Client.get_tasks does. The second syncs a TaskMirror and queries it. Reports the requests and
+time per report, and what filling the mirror cost up front. Needs curl_cffi.
+
+    python -m benchmarks.bench_task_mirror --history 2000 --reports 10
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.bench_cloud import point_at, serve_cloud
+from benchmarks.standins import FakeCloud
+from pybambu.bambu_cloud import BambuCloud, curl_available
+from pybambu.task_mirror import TaskMirror
+
+
+def downloaded_usage(cloud: BambuCloud, since: datetime) -> dict:
+    usage = {}
+    for task in cloud.get_tasklist(0, 500)['hits']:
+        if datetime.fromisoformat(task['startTime'].replace("Z", "+00:00")).timestamp() >= since.timestamp():
+            totals = usage.setdefault(task['deviceId'], {"prints": 0, "weight": 0, "length": 0, "print_time": 0})
+            totals["prints"] += 1
+            totals["weight"] += task['weight']
+            totals["length"] += task['length']
+            totals["print_time"] += task['costTime']
+    return usage
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=2000)
+    parser.add_argument("--reports", type=int, default=10)
+    parser.add_argument("--new", type=int, default=5)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--rtt", type=float, default=0.1)
+    args = parser.parse_args()
+    if not curl_available:
+        print("curl_cffi is not installed: pip install curl_cffi")
+        return
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    server = FakeCloud(devices=10, delay=args.rtt, tasks=args.history)
+    ready = threading.Event()
+    threading.Thread(target=serve_cloud, args=(server, ready), daemon=True).start()
+    ready.wait(30)
+    point_at(server.port)
+    cloud = BambuCloud("", "", "", "token")
+    since = datetime.now() - timedelta(days=args.days)
+    print(f"{args.history} tasks in the history, a {args.days} day report, {args.new} new prints between reports")
+
+    server.requests = 0
+    start = time.monotonic()
+    for _ in range(args.reports):
+        server.add_tasks(args.new)
+        downloaded_usage(cloud, since)
+    elapsed = (time.monotonic() - start) / args.reports
+    print(f"  download: {server.requests / args.reports:5.1f} requests/report  {elapsed * 1000:8.1f} ms/report")
+
+    mirror = TaskMirror(cloud)
+    server.requests = 0
+    start = time.monotonic()
+    mirror.sync()
+    mirror.backfill(until=since)
+    print(f"    mirror: {server.requests} requests, {(time.monotonic() - start) * 1000:.1f} ms to fill "
+          f"{len(mirror)} tasks")
+    server.requests = 0
+    start = time.monotonic()
+    for _ in range(args.reports):
+        server.add_tasks(args.new)
+        mirror.sync()
+        mirror.usage(since=since)
+    elapsed = (time.monotonic() - start) / args.reports
+    print(f"    mirror: {server.requests / args.reports:5.1f} requests/report  {elapsed * 1000:8.1f} ms/report")
+    mirror.close()
+
+
+if __name__ == "__main__":
+    main()
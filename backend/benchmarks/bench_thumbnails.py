@@ -0,0 +1,87 @@
+"""Serving a dashboard grid of chamber images, full size or as cached thumbnails.
+
+--cameras printers each get a new frame every --interval seconds, and --tiles dashboard tiles per printer
+fetch the image once per frame. The first run sends every tile the full frame. The second fetches the
+thumbnail from a ThumbnailCache. Both report the bytes sent per second and how late the event loop ran
+its timers, which shows whether the loop stayed responsive. Needs Pillow.
+
+    python -m benchmarks.bench_thumbnails --cameras 20 --tiles 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import logging
+import statistics
+import time
+
+from pybambu import BambuClient
+from pybambu.thumbnails import ThumbnailCache, pil_available
+
+
+def make_frame(seed: int) -> bytes:
+    from PIL import Image
+
+    image = Image.effect_noise((1920, 1080), 40 + seed % 20).convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+async def measure_lag(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.monotonic()
+        await asyncio.sleep(0.01)
+        lags.append(time.monotonic() - start - 0.01)
+
+
+async def run(cache: ThumbnailCache | None, args, frames: list) -> tuple:
+    clients = [BambuClient({'host': '127.0.0.1', 'access_code': '12345678', 'serial': f"BENCH{index:04d}",
+                            'device_type': 'P1S', 'frame_change_threshold': None}) for index in range(args.cameras)]
+    stop = asyncio.Event()
+    lags = []
+    lag_task = asyncio.create_task(measure_lag(stop, lags))
+    sent = 0
+    end = time.monotonic() + args.duration
+    number = 0
+    while time.monotonic() < end:
+        for index, client in enumerate(clients):
+            client.get_device().chamber_image.set_jpeg(frames[(number + index) % len(frames)])
+        tiles = [client for client in clients for _ in range(args.tiles)]
+        if cache is None:
+            images = [client.get_device().chamber_image.get_jpeg() for client in tiles]
+        else:
+            images = await asyncio.gather(*[cache.thumbnail(client) for client in tiles])
+        sent += sum(len(image) for image in images if image is not None)
+        number += 1
+        await asyncio.sleep(args.interval)
+    stop.set()
+    await lag_task
+    return sent / args.duration, statistics.median(lags), max(lags)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, default=20)
+    parser.add_argument("--tiles", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+    if not pil_available:
+        print("Pillow is not installed: pip install pillow")
+        return
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+
+    frames = [make_frame(seed) for seed in range(8)]
+    print(f"{args.cameras} cameras, {args.tiles} tiles each, a {len(frames[0]) / 1024:.0f} KiB frame every {args.interval}s")
+    for name, cache in (("full frames", None), ("thumbnails", ThumbnailCache(sizes=((320, 180),)))):
+        rate, lag, worst = asyncio.run(run(cache, args, frames))
+        print(f"{name:>12}: {rate / 1024:9.1f} KiB/s sent  loop lag median {lag * 1000:5.1f} ms, worst {worst * 1000:6.1f} ms")
+        if cache is not None:
+            print(f"{'':>12}  {cache.misses} renders, {cache.hits} hits, {cache.bytes_used / 1024:.0f} KiB cached")
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Memory and CPU used by a TimelapseRecorder as a print gets longer.
+
+Records prints of increasing --layers counts, one frame of about --frame-size bytes per layer, into a
+temporary directory. Reports the peak memory allocated while recording, which should not grow with the
+print, and the time per frame.
+
+    python -m benchmarks.bench_timelapse --frame-size 60000
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import struct
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.standins import JPEG_END, JPEG_START
+from pybambu import BambuClient, TimelapseRecorder
+
+
+def make_frame(size: int, layer: int) -> memoryview:
+    start_of_frame = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, 1080, 1920, 1) + b"\x01\x11\x00"
+    body = bytes((layer + i) & 0xff for i in range(size))
+    return memoryview(bytearray(JPEG_START + start_of_frame + body + JPEG_END)).toreadonly()
+
+
+def record(layers: int, frame_size: int) -> tuple:
+    client = BambuClient({'host': '127.0.0.1', 'access_code': '12345678', 'serial': 'BENCH0000',
+                          'device_type': 'P1S', 'local_mqtt': True})
+    device = client.get_device()
+    frames = [make_frame(frame_size, layer) for layer in range(4)]
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = TimelapseRecorder(client, directory)
+        tracemalloc.start()
+        start = time.process_time()
+        client.callback("event_print_started")
+        for layer in range(layers):
+            device._notify_subscribers({"print_job.current_layer": layer})
+            device.chamber_image.set_jpeg(frames[layer % len(frames)])
+        client.callback("event_print_finished")
+        elapsed = time.process_time() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        recorder.close()
+    return elapsed / layers, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frame-size", type=int, default=60000)
+    args = parser.parse_args()
+
+    logging.getLogger("pybambu").setLevel(logging.ERROR)
+    print(f"one {args.frame_size / 1024:.0f} KiB frame per layer")
+    for layers in (100, 1000, 10000):
+        per_frame, peak = record(layers, args.frame_size)
+        print(f"{layers:6d} layers: {per_frame * 1e6:6.1f} us/frame  peak {peak / 1024:7.1f} KiB allocated")
+
+
+if __name__ == "__main__":
+    main()
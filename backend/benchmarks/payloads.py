@@ -0,0 +1,198 @@
+"""Corpus of `print` report payloads shaped like the ones sent by X1C and P1S printers.
+
+PUSH_ALL is a full push_all report from an X1C with four AMS units. DELTAS is a sequence of the small
+incremental reports printers send while printing, in the order and mix they typically arrive.
+"""
+from __future__ import annotations
+
+import copy
+import json
+
+
+def _tray(ams_id: int, tray_id: int) -> dict:
+    return {
+        "id": str(tray_id),
+        "remain": 100 - 7 * tray_id - ams_id,
+        "k": 0.019999999552965164,
+        "n": 1.399999976158142,
+        "tag_uid": "0000000000000000",
+        "tray_id_name": "A00-W1",
+        "tray_info_idx": "GFA00",
+        "tray_type": "PLA",
+        "tray_sub_brands": "PLA Basic",
+        "tray_color": "FFFFFFFF",
+        "tray_weight": "1000",
+        "tray_diameter": "1.75",
+        "tray_temp": "55",
+        "tray_time": "8",
+        "bed_temp_type": "1",
+        "bed_temp": "35",
+        "nozzle_temp_max": "230",
+        "nozzle_temp_min": "190",
+        "xcam_info": "D007D007E803E8039A99193F",
+        "tray_uuid": f"{ams_id:02d}{tray_id:02d}7A2F1F3B4E5D6C7B8A99AABBCCDDEE",
+        "cols": ["FFFFFFFF"],
+        "ctype": 0,
+    }
+
+
+PUSH_ALL = {
+    "ams": {
+        "ams": [
+            {"humidity": "4", "id": str(ams_id), "temp": "24.6", "tray": [_tray(ams_id, t) for t in range(4)]}
+            for ams_id in range(4)
+        ],
+        "ams_exist_bits": "f",
+        "insert_flag": True,
+        "power_on_flag": False,
+        "tray_exist_bits": "ffff",
+        "tray_is_bbl_bits": "ffff",
+        "tray_now": "1",
+        "tray_pre": "1",
+        "tray_read_done_bits": "ffff",
+        "tray_reading_bits": "0",
+        "tray_tar": "1",
+        "version": 12,
+    },
+    "ams_rfid_status": 6,
+    "ams_status": 768,
+    "aux_part_fan": True,
+    "bed_target_temper": 55.0,
+    "bed_temper": 54.96875,
+    "big_fan1_speed": "0",
+    "big_fan2_speed": "0",
+    "chamber_temper": 31.0,
+    "command": "push_status",
+    "cooling_fan_speed": "15",
+    "fan_gear": 15,
+    "filam_bak": [],
+    "force_upgrade": False,
+    "gcode_file": "/data/Metadata/plate_1.gcode",
+    "gcode_file_prepare_percent": "100",
+    "gcode_start_time": "1702396935",
+    "gcode_state": "RUNNING",
+    "heatbreak_fan_speed": "15",
+    "hms": [{"attr": 50331904, "code": 65543}],
+    "home_flag": 6815103,
+    "hw_switch_state": 1,
+    "ipcam": {
+        "ipcam_dev": "1",
+        "ipcam_record": "enable",
+        "mode_bits": 2,
+        "resolution": "1080p",
+        "rtsp_url": "rtsps://192.168.1.64/streaming/live/1",
+        "timelapse": "disable",
+        "tutk_server": "disable",
+    },
+    "layer_num": 42,
+    "lifecycle": "product",
+    "lights_report": [{"mode": "on", "node": "chamber_light"}, {"mode": "flashing", "node": "work_light"}],
+    "maintain": 3,
+    "mc_percent": 37,
+    "mc_print_error_code": "0",
+    "mc_print_stage": "2",
+    "mc_print_sub_stage": 0,
+    "mc_remaining_time": 83,
+    "mess_production_state": "active",
+    "msg": 0,
+    "nozzle_diameter": "0.4",
+    "nozzle_target_temper": 220.0,
+    "nozzle_temper": 219.875,
+    "nozzle_type": "hardened_steel",
+    "online": {"ahb": False, "rfid": False, "version": 7},
+    "print_error": 0,
+    "print_gcode_action": 0,
+    "print_real_action": 0,
+    "print_type": "cloud",
+    "profile_id": "35276233",
+    "project_id": "35237965",
+    "queue_number": 0,
+    "s_obj": [],
+    "sdcard": True,
+    "sequence_id": "2021",
+    "spd_lvl": 2,
+    "spd_mag": 100,
+    "stg": [2, 14, 1],
+    "stg_cur": 0,
+    "subtask_id": "35237965",
+    "subtask_name": "benchy",
+    "task_id": "35237965",
+    "total_layer_num": 120,
+    "upgrade_state": {
+        "ahb_new_version_number": "",
+        "ams_new_version_number": "",
+        "consistency_request": False,
+        "dis_state": 0,
+        "err_code": 0,
+        "force_upgrade": False,
+        "message": "",
+        "module": "null",
+        "new_version_state": 2,
+        "ota_new_version_number": "",
+        "progress": "0",
+        "sequence_id": 0,
+        "status": "IDLE",
+    },
+    "upload": {"file_size": 0, "finish_size": 0, "message": "Good", "oss_url": "", "progress": 0, "sequence_id": "0903", "speed": 0, "status": "idle", "task_id": "", "time_remaining": 0, "trouble_id": ""},
+    "vt_tray": {
+        "id": "254",
+        "tag_uid": "0000000000000000",
+        "tray_id_name": "",
+        "tray_info_idx": "GFB99",
+        "tray_type": "ABS",
+        "tray_sub_brands": "",
+        "tray_color": "000000FF",
+        "tray_weight": "0",
+        "tray_diameter": "0.00",
+        "tray_temp": "0",
+        "tray_time": "0",
+        "bed_temp_type": "0",
+        "bed_temp": "0",
+        "nozzle_temp_max": "280",
+        "nozzle_temp_min": "240",
+        "xcam_info": "000000000000000000000000",
+        "tray_uuid": "00000000000000000000000000000000",
+        "remain": 0,
+        "k": 0.029999999329447746,
+        "n": 1.399999976158142,
+    },
+    "wifi_signal": "-53dBm",
+    "xcam": {"allow_skip_parts": False, "buildplate_marker_detector": True, "first_layer_inspector": True, "halt_print_sensitivity": "medium", "print_halt": True, "printing_monitor": True, "spaghetti_detector": True},
+    "xcam_status": "0",
+}
+
+
+def _deltas() -> list[dict]:
+    deltas = []
+    nozzle = 219.875
+    bed = 54.96875
+    for i in range(200):
+        sequence_id = str(2022 + i)
+        nozzle += 0.125 if i % 2 else -0.125
+        bed += 0.03125 if i % 3 else -0.03125
+        delta = {"command": "push_status", "msg": 1, "sequence_id": sequence_id,
+                 "nozzle_temper": nozzle, "bed_temper": bed}
+        if i % 5 == 0:
+            delta["wifi_signal"] = f"-{50 + i % 7}dBm"
+        if i % 10 == 0:
+            delta["mc_percent"] = 37 + i // 10
+            delta["mc_remaining_time"] = 83 - i // 10
+        if i % 20 == 0:
+            delta["layer_num"] = 42 + i // 20
+        if i % 25 == 0:
+            delta["cooling_fan_speed"] = "15" if i % 50 else "13"
+            delta["heatbreak_fan_speed"] = "15"
+        if i % 40 == 0:
+            ams = copy.deepcopy(PUSH_ALL["ams"])
+            ams["ams"][1]["tray"][1]["remain"] -= i // 40
+            delta["ams"] = ams
+        deltas.append(delta)
+    return deltas
+
+
+DELTAS = _deltas()
+
+
+def encoded(payload: dict) -> bytes:
+    """Return the mqtt message bytes for a `print` report"""
+    return json.dumps({"print": payload}, indent=4).encode()
@@ -0,0 +1,303 @@
+"""Local stand-ins for the printer services used by the benchmarks.
+
+Each printer is addressed by its own loopback address (127.0.0.x) so the standard ports used by
+BambuClient (8883 for mqtt, 6000 for the chamber camera) can be served for many printers at once.
+FakeCloud stands in for the Bambu cloud HTTP API.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import ssl
+import struct
+import subprocess
+import tempfile
+import time
+
+from pybambu.camera import JPEG_END, JPEG_START
+
+MQTT_PORT = 8883
+CAMERA_PORT = 6000
+
+
+def printer_host(index: int) -> str:
+    return f"127.0.0.{index + 1}"
+
+
+def make_server_ssl_context() -> ssl.SSLContext:
+    """Create a TLS server context with a throwaway self-signed certificate"""
+    directory = tempfile.mkdtemp(prefix="pybambu-bench-")
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", key, "-out", cert,
+                    "-days", "1", "-subj", "/CN=localhost"], check=True, capture_output=True)
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert, key)
+    return ctx
+
+
+def fake_jpeg(size: int, seed: int = 0) -> bytes:
+    body = bytes((seed + i) & 0xff for i in range(size - len(JPEG_START) - len(JPEG_END)))
+    return JPEG_START + body + JPEG_END
+
+
+def frame_header(payload_size: int) -> bytes:
+    return struct.pack("<IIII", payload_size, 0, 1, 0)
+
+
+def _encode_length(length: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        encoded.append(byte | 0x80 if length > 0 else byte)
+        if length == 0:
+            return bytes(encoded)
+
+
+def mqtt_publish_packet(topic: str, payload: bytes) -> bytes:
+    topic_bytes = topic.encode()
+    body = struct.pack("!H", len(topic_bytes)) + topic_bytes + payload
+    return b"\x30" + _encode_length(len(body)) + body
+
+
+async def _read_mqtt_packet(reader: asyncio.StreamReader):
+    first = (await reader.readexactly(1))[0]
+    multiplier = 1
+    length = 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length += (byte & 0x7f) * multiplier
+        if not byte & 0x80:
+            break
+        multiplier *= 128
+    return first >> 4, await reader.readexactly(length)
+
+
+class FakeBroker:
+    """Minimal MQTT 3.1.1 broker that streams timestamped `print` deltas to each subscribed printer"""
+
+    def __init__(self, interval: float = 1.0, payload_factory=None):
+        self.interval = interval
+        self.payload_factory = payload_factory or self.default_payload
+        self.connections = 0
+        self.port = None
+        self._writers = set()
+
+    @staticmethod
+    def default_payload(count: int) -> dict:
+        return {"print": {"mc_percent": count % 100, "bench_ts": time.time()}}
+
+    async def start(self, ssl_context: ssl.SSLContext, host: str = "127.0.0.1", port: int = MQTT_PORT):
+        self._server = await asyncio.start_server(self._handle, host, port, ssl=ssl_context)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    def drop_connections(self):
+        """Close every client connection, as a printer that restarts does"""
+        for writer in list(self._writers):
+            writer.close()
+
+    async def _publish(self, writer: asyncio.StreamWriter, serial: str):
+        count = 0
+        while True:
+            await asyncio.sleep(self.interval)
+            count += 1
+            payload = json.dumps(self.payload_factory(count)).encode()
+            writer.write(mqtt_publish_packet(f"device/{serial}/report", payload))
+            await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._writers.add(writer)
+        publisher = None
+        try:
+            while True:
+                packet_type, body = await _read_mqtt_packet(reader)
+                if packet_type == 1:    # CONNECT
+                    writer.write(b"\x20\x02\x00\x00")
+                elif packet_type == 8:  # SUBSCRIBE
+                    topic_length = struct.unpack_from("!H", body, 2)[0]
+                    topic = body[4:4 + topic_length].decode()
+                    writer.write(b"\x90\x03" + body[0:2] + b"\x00")
+                    if publisher is None:
+                        publisher = asyncio.create_task(self._publish(writer, topic.split("/")[1]))
+                elif packet_type == 12: # PINGREQ
+                    writer.write(b"\xd0\x00")
+                elif packet_type == 14: # DISCONNECT
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            if publisher is not None:
+                publisher.cancel()
+            self._writers.discard(writer)
+            writer.close()
+
+
+class FakeCamera:
+    """Port 6000 chamber camera that emits a jpeg frame at a fixed cadence.
+
+    Each frame is sent as the 16 byte header followed by the payload in `chunks` pieces, with
+    `chunk_delay` seconds between the pieces to mimic frames that arrive over a slow link.
+    """
+
+    def __init__(self, access_code: str, interval: float = 1.0, frame_size: int = 60000, chunks: int = 1,
+                 chunk_delay: float = 0.0):
+        self.access_code = access_code
+        self.interval = interval
+        self.frame_size = frame_size
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+
+    async def start(self, ssl_context: ssl.SSLContext, host: str = "127.0.0.1"):
+        self._server = await asyncio.start_server(self._handle, host, CAMERA_PORT, ssl=ssl_context)
+        return self._server
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            auth = await reader.readexactly(80)
+            if auth[48:80].rstrip(b"\0").decode() != self.access_code:
+                return
+            frame = fake_jpeg(self.frame_size)
+            chunk_size = -(-len(frame) // self.chunks)
+            while True:
+                await asyncio.sleep(self.interval)
+                # The first 8 bytes of the jpeg body carry the send time for latency measurements.
+                stamped = frame[:4] + struct.pack("<d", time.time()) + frame[12:]
+                writer.write(frame_header(len(stamped)))
+                await writer.drain()
+                for offset in range(0, len(stamped), chunk_size):
+                    if offset != 0 and self.chunk_delay:
+                        await asyncio.sleep(self.chunk_delay)
+                    writer.write(stamped[offset:offset + chunk_size])
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+class FakeCloud:
+    """HTTPS stand-in for the Bambu cloud API, with keep-alive connections.
+
+    Answers the device list, task list, slicer settings and cover image requests with canned data. The task
+    list pages through a history of `tasks` prints, newest first and 20 per page unless the request sets a
+    limit, and add_tasks() starts new ones. Every
+    response waits `delay` seconds and the first one on a new connection `connect_delay` seconds more, to
+    stand in for the round trips to the real servers and the extra ones of a new TLS connection. Counts the
+    connections, requests and cover image requests it served.
+    """
+
+    def __init__(self, devices: int = 10, delay: float = 0.0, connect_delay: float = 0.0, cover_size: int = 30000,
+                 tasks: int | None = None):
+        self.delay = delay
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self.requests = 0
+        self.cover_requests = 0
+        self.port = None
+        self._responses = {
+            "/v1/iot-service/api/user/bind": json.dumps({"message": "success", "devices": [
+                {"dev_id": f"BENCH{index:04d}", "name": f"Printer {index}", "online": True, "print_status": "RUNNING",
+                 "dev_model_name": "C12", "dev_product_name": "P1S", "dev_access_code": "12345678",
+                 "nozzle_diameter": 0.4} for index in range(devices)]}).encode(),
+            "/v1/iot-service/api/slicer/setting": json.dumps({"message": "success", "print": {"public": [], "private": []},
+                                                               "filament": {"public": [], "private": []}}).encode(),
+        }
+        self._devices = devices
+        self._tasks_created = 0
+        # Newest first, like the cloud's list.
+        self.tasks = []
+        self._history = devices if tasks is None else tasks
+        self._cover = fake_jpeg(cover_size)
+
+    def url(self, path: str) -> str:
+        return f"https://localhost:{self.port}{path}"
+
+    async def start(self, ssl_context: ssl.SSLContext, host: str = "127.0.0.1", port: int = 0):
+        self._server = await asyncio.start_server(self._handle, host, port, ssl=ssl_context)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.add_tasks(self._history)
+        return self._server
+
+    def add_tasks(self, count: int):
+        """Start `count` new prints, spread over the devices so the newest page has a task for each"""
+        start = time.time() - 3600 * count
+        for index in range(count):
+            number = self._tasks_created
+            self._tasks_created += 1
+            self.tasks.insert(0, {
+                # The cover urls are absolute, like the real ones.
+                "id": 35000000 + number, "title": f"Task {number}", "cover": self.url(f"/cover/{number}.png"),
+                "status": 4, "deviceId": f"BENCH{(count - 1 - index) % self._devices:04d}",
+                "startTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start + 3600 * index)),
+                "endTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start + 3600 * index + 1800)),
+                "weight": 34.62, "length": 1161, "costTime": 1800, "bedType": "textured_plate",
+                "amsDetailMapping": [{"ams": number % 4, "filamentType": ("PLA", "PETG", "ABS")[number % 3],
+                                      "filamentId": "GFL99", "sourceColor": "F4D976FF", "weight": 34.62}]})
+
+    def _task_page(self, query: str) -> bytes:
+        params = dict(param.partition("=")[::2] for param in query.split("&") if param)
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 20))
+        return json.dumps({"total": len(self.tasks), "hits": self.tasks[offset:offset + limit]}).encode()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        delay = self.connect_delay + self.delay
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                headers = request.decode("latin-1").split("\r\n")
+                path, _, query = headers[0].split(" ")[1].partition("?")
+                length = 0
+                for header in headers[1:]:
+                    if header.lower().startswith("content-length:"):
+                        length = int(header.split(":")[1])
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                if delay:
+                    await asyncio.sleep(delay)
+                delay = self.delay
+                if path.startswith("/cover/"):
+                    self.cover_requests += 1
+                    body = self._cover
+                elif path == "/v1/user-service/my/tasks":
+                    body = self._task_page(query)
+                else:
+                    body = self._responses.get(path)
+                if body is None:
+                    writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+                else:
+                    content_type = "image/png" if path.startswith("/cover/") else "application/json"
+                    writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+                                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+def frame_sent_time(jpeg) -> float:
+    """Return the send time stamped into a FakeCamera frame"""
+    return struct.unpack_from("<d", jpeg, 4)[0]
+
+
+def run_standins(mqtt_interval: float, camera_interval: float, access_code: str, ready, **camera_kwargs):
+    """Serve the broker and camera for every loopback printer host. Intended as a multiprocessing target."""
+    async def main():
+        ctx = make_server_ssl_context()
+        broker = FakeBroker(interval=mqtt_interval)
+        camera = FakeCamera(access_code, interval=camera_interval, **camera_kwargs)
+        # Binding to every address lets one listener serve every loopback printer host.
+        await broker.start(ctx, host="0.0.0.0")
+        await camera.start(ctx, host="0.0.0.0")
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
@@ -1,4 +1,14 @@
 """Initialise the Bambu Client"""
 # TODO: Once complete, move pybambu to PyPi
 from .bambu_client import BambuClient
-from .bambu_cloud  import BambuCloud
+from .bambu_cloud  import BambuCloud, close_async_session, close_session
+from .camera_hub import CameraHub
+from .cover_cache import CoverCache
+from .delivery import EventDelivery
+from .farm import FarmManager
+from .frame_buffer import FrameBuffer, FrameRecorder
+from .mjpeg import MJPEGServer
+from .mosaic import MosaicCompositor
+from .task_mirror import TaskMirror
+from .thumbnails import ThumbnailCache
+from .timelapse import TimelapseRecorder
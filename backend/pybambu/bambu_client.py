@@ -1,13 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 import queue
-import json
 import math
-import re
+import selectors
 import socket
 import ssl
-import struct
 import threading
 import time
 
@@ -16,18 +15,32 @@ from typing import Any
 
 import paho.mqtt.client as mqtt
 
+from . import codec
 from .bambu_cloud import BambuCloud
+from .camera import (
+    CAMERA_PORT,
+    MAX_CONNECT_ATTEMPTS,
+    FrameAssembler,
+    build_auth_data,
+    create_ssl_context,
+    get_jpeg_error,
+)
+from .camera_stats import CameraStats
 from .const import (
     LOGGER,
     Features,
 )
+from .message_log import MessageLog
 from .models import Device, SlicerSettings
 from .commands import (
-    GET_VERSION,
-    PUSH_ALL,
-    START_PUSH,
+    GET_VERSION_PAYLOAD,
+    PUSH_ALL_PAYLOAD,
+    START_PUSH_PAYLOAD,
 )
 
+# Seconds without any mqtt data before the printer is considered offline.
+WATCHDOG_TIMER = 30
+
 
 class WatchdogThread(threading.Thread):
 
@@ -48,7 +61,6 @@ class WatchdogThread(threading.Thread):
 
     def run(self):
         LOGGER.info("Watchdog thread started.")
-        WATCHDOG_TIMER = 30
         while True:
             # Wait out the remainder of the watchdog delay or 1s, whichever is higher.
             interval = time.time() - self._last_received_data
@@ -71,69 +83,50 @@ class ChamberImageThread(threading.Thread):
     def __init__(self, client):
         self._client = client
         self._stop_event = threading.Event()
+        # Written by stop() to wake the thread from select straight away. Created by run() so a thread
+        # that is never started holds no sockets.
+        self._wake_reader = None
+        self._wake_writer = None
         super().__init__()
         self.daemon = True
         self.setName(f"{self._client._device.info.device_type}-Chamber-{threading.get_native_id()}")
 
     def stop(self):
         self._stop_event.set()
+        wake_writer = self._wake_writer
+        if wake_writer is None:
+            # Not running yet; run() checks the stop event before it first waits.
+            return
+        try:
+            wake_writer.send(b"\0")
+        except OSError:
+            pass
 
     def run(self):
         LOGGER.debug("Chamber image thread started.")
 
-        auth_data = bytearray()
-
-        username = 'bblp'
-        access_code = self._client._access_code
+        auth_data = build_auth_data(self._client._access_code)
         hostname = self._client.host
-        port = 6000
-        MAX_CONNECT_ATTEMPTS = 12
         connect_attempts = 0
+        stats = self._client._camera_stats
+
+        ctx = create_ssl_context()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        selector = selectors.DefaultSelector()
+        selector.register(self._wake_reader, selectors.EVENT_READ)
 
-        auth_data += struct.pack("<I", 0x40)   # '@'\0\0\0
-        auth_data += struct.pack("<I", 0x3000) # \0'0'\0\0
-        auth_data += struct.pack("<I", 0)      # \0\0\0\0
-        auth_data += struct.pack("<I", 0)      # \0\0\0\0
-        for i in range(0, len(username)):
-            auth_data += struct.pack("<c", username[i].encode('ascii'))
-        for i in range(0, 32 - len(username)):
-            auth_data += struct.pack("<x")
-        for i in range(0, len(access_code)):
-            auth_data += struct.pack("<c", access_code[i].encode('ascii'))
-        for i in range(0, 32 - len(access_code)):
-            auth_data += struct.pack("<x")
-
-        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-
-        jpeg_start = bytearray([0xff, 0xd8, 0xff, 0xe0])
-        jpeg_end = bytearray([0xff, 0xd9])
-
-        read_chunk_size = 4096 # 4096 is the max we'll get even if we increase this.
-
-        # Payload format for each image is:
-        # 16 byte header:
-        #   Bytes 0:3   = little endian payload size for the jpeg image (does not include this header).
-        #   Bytes 4:7   = 0x00000000
-        #   Bytes 8:11  = 0x00000001
-        #   Bytes 12:15 = 0x00000000
-        # These first 16 bytes are always delivered by themselves.
-        #
-        # Bytes 16:19                       = jpeg_start magic bytes
-        # Bytes 20:payload_size-2           = jpeg image bytes
-        # Bytes payload_size-2:payload_size = jpeg_end magic bytes
-        #
-        # Further attempts to receive data will get SSLWantReadError until a new image is ready (1-2 seconds later)
+        # See camera.py for the payload format. The socket is read as soon as the selector reports data so a
+        # frame is delivered as soon as its last byte arrives.
         while connect_attempts < MAX_CONNECT_ATTEMPTS and not self._stop_event.is_set():
             connect_attempts += 1
+            stats.connect_started()
             try:
-                with socket.create_connection((hostname, port)) as sock:
+                with socket.create_connection((hostname, CAMERA_PORT)) as sock:
+                    stats.tcp_connected()
                     try:
                         sslSock = ctx.wrap_socket(sock, server_hostname=hostname)
                         sslSock.write(auth_data)
-                        img = None
-                        payload_size = 0
+                        stats.auth_sent()
 
                         status = sslSock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
                         LOGGER.debug(f"SOCKET STATUS: {status}")
@@ -141,85 +134,96 @@ class ChamberImageThread(threading.Thread):
                             LOGGER.error(f"Socket error: {status}")
                     except socket.error as e:
                         LOGGER.error(f"Socket error: {e}")
+                        stats.failed(str(e))
                         # Sleep to allow printer to stabilize during boot when it may fail these connection attempts repeatedly.
-                        time.sleep(1)
+                        self._stop_event.wait(1)
                         continue
 
                     sslSock.setblocking(False)
-                    while not self._stop_event.is_set():
-                        try:
-                            dr = sslSock.recv(read_chunk_size)
-                            #LOGGER.debug(f"Received {len(dr)} bytes.")
-
-                        except ssl.SSLWantReadError:
-                            #LOGGER.debug("SSLWantReadError")
-                            time.sleep(1)
-                            continue
-
-                        except Exception as e:
-                            LOGGER.error("A Chamber Image thread inner exception occurred:")
-                            LOGGER.error(f"Exception. Type: {type(e)} Args: {e}")
-                            time.sleep(1)
-                            continue
-
-                        if img is not None and len(dr) > 0:
-                            img += dr
-                            if len(img) > payload_size:
-                                # We got more data than we expected.
-                                LOGGER.error(f"Unexpected image payload received: {len(img)} > {payload_size}")
-                                # Reset buffer
-                                img = None
-                            elif len(img) == payload_size:
-                                # We should have the full image now.
-                                if img[:4] != jpeg_start:
-                                    LOGGER.error("JPEG start magic bytes missing.")
-                                elif img[-2:] != jpeg_end:
-                                    LOGGER.error("JPEG end magic bytes missing.")
-                                else:
-                                    # Content is as expected. Send it.
-                                    self._client.on_jpeg_received(img)
-
-                                # Reset buffer
-                                img = None
-                            # else:     
-                            # Otherwise we need to continue looping without reseting the buffer to receive the remaining data
-                            # and without delaying.
-
-                        elif len(dr) == 16:
-                            # We got the header bytes. Get the expected payload size from it and create the image buffer bytearray.
+                    selector.register(sslSock, selectors.EVENT_READ)
+                    try:
+                        if self._receive(sslSock, selector):
                             # Reset connect_attempts now we know the connect was successful.
                             connect_attempts = 0
-                            img = bytearray()
-                            payload_size = int.from_bytes(dr[0:3], byteorder='little')
-
-                        elif len(dr) == 0:
-                            # This occurs if the wrong access code was provided.
-                            LOGGER.error("Chamber image connection rejected by the printer. Check provided access code and IP address.")
-                            # Sleep for a short while and then re-attempt the connection.
-                            time.sleep(5)
-                            break
-
-                        else:
-                            LOGGER.error(f"UNEXPECTED DATA RECEIVED: {len(dr)}")
-                            time.sleep(1)
+                    finally:
+                        selector.unregister(sslSock)
 
             except OSError as e:
+                stats.failed(str(e))
                 if e.errno == 113:
                     LOGGER.debug("Host is unreachable")
                 else:
                     LOGGER.error("A Chamber Image thread outer exception occurred:")
                     LOGGER.error(f"Exception. Type: {type(e)} Args: {e}")
-                if not self._stop_event.is_set():
-                    time.sleep(1)  # Avoid a tight loop if this is a persistent error.
+                self._stop_event.wait(1)  # Avoid a tight loop if this is a persistent error.
 
             except Exception as e:
+                stats.failed(str(e))
                 LOGGER.error(f"A Chamber Image thread outer exception occurred:")
                 LOGGER.error(f"Exception. Type: {type(e)} Args: {e}")
-                if not self._stop_event.is_set():
-                    time.sleep(1)  # Avoid a tight loop if this is a persistent error.
+                self._stop_event.wait(1)  # Avoid a tight loop if this is a persistent error.
 
+        selector.close()
+        self._wake_reader.close()
+        self._wake_writer.close()
         LOGGER.debug("Chamber image thread exited.")
 
+    def _receive(self, sslSock: ssl.SSLSocket, selector: selectors.BaseSelector) -> bool:
+        """Read frames until the connection closes or the thread is stopped. Returns whether a frame header was received."""
+        assembler = FrameAssembler()
+        stats = self._client._camera_stats
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    # Records already decrypted by the ssl object are returned without touching the socket, so
+                    # only wait when it has nothing buffered.
+                    count = assembler.receive(sslSock)
+                except ssl.SSLWantReadError:
+                    self._wait(selector)
+                    continue
+                except ssl.SSLWantWriteError:
+                    selector.modify(sslSock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+                    self._wait(selector)
+                    selector.modify(sslSock, selectors.EVENT_READ)
+                    continue
+                except ValueError as e:
+                    LOGGER.error(str(e))
+                    stats.failed(str(e))
+                    break
+
+                if count == 0:
+                    if assembler.headers_received == 0:
+                        # This occurs if the wrong access code was provided.
+                        LOGGER.error("Chamber image connection rejected by the printer. Check provided access code and IP address.")
+                        stats.rejected()
+                        # Sleep for a short while and then re-attempt the connection.
+                        self._stop_event.wait(5)
+                    else:
+                        LOGGER.error(f"Chamber image connection closed after {assembler.buffered} bytes of a frame.")
+                    break
+                stats.bytes_received += count
+                if stats.connected_since is None and assembler.headers_received != 0:
+                    stats.stream_started()
+
+                img = assembler.take_frame()
+                if img is not None:
+                    jpeg_error = get_jpeg_error(img)
+                    if jpeg_error is not None:
+                        LOGGER.error(jpeg_error)
+                        stats.bad_frame()
+                    else:
+                        stats.frame(len(img))
+                        self._client.on_jpeg_received(img)
+        finally:
+            stats.closed()
+
+        return assembler.headers_received != 0
+
+    def _wait(self, selector: selectors.BaseSelector):
+        for key, _ in selector.select():
+            if key.fileobj is self._wake_reader:
+                self._wake_reader.recv(64)
+
 
 class MqttThread(threading.Thread):
     def __init__(self, client):
@@ -237,7 +241,7 @@ class MqttThread(threading.Thread):
         exceptionSeen = ""
         while True:
             try:
-                host = self._client.host if self._client._local_mqtt else self._client.bambu_cloud.cloud_mqtt_host
+                host = self._client.mqtt_host
                 LOGGER.debug(f"Connect: Attempting Connection to {host}")
                 self._client.client.connect(host, self._client._port, keepalive=5)
 
@@ -283,11 +287,14 @@ class BambuClient:
     """Initialize Bambu Client to connect to MQTT Broker"""
     _watchdog = None
     _camera = None
+    _camera_hub = None
+    _manager = None
     _usage_hours: float
 
     def __init__(self, config):
         self.host = config['host']
-        self.callback = None
+        self._callback = None
+        self._event_listeners = ()
 
         self._access_code = config.get('access_code', '')
         self._auth_token = config.get('auth_token', '')
@@ -298,6 +305,14 @@ class BambuClient:
         self._usage_hours = config.get('usage_hours', 0)
         self._username = config.get('username', '')
         self._enable_camera = config.get('enable_camera', True)
+        self._camera_stats = CameraStats()
+        # None passes every frame on; a number holds back the frames that show nothing new.
+        self._frame_change_threshold = config.get('frame_change_threshold')
+        # A CoverCache, usually shared by every client.
+        self._cover_cache = config.get('cover_cache')
+        self._message_log = MessageLog(self._serial,
+                                       sample_rate=config.get('log_sample_rate', 0),
+                                       capture_size=config.get('capture_size', 0))
 
         self._connected = False
         self._port = 1883
@@ -317,6 +332,46 @@ class BambuClient:
         """Return if connected to server"""
         return self._connected
 
+    @property
+    def callback(self):
+        """Return the function events are sent to: the connect callback, and the event listeners if any"""
+        return self._callback if len(self._event_listeners) == 0 else self._dispatch_event
+
+    @callback.setter
+    def callback(self, callback):
+        self._callback = callback
+
+    def add_event_listener(self, listener):
+        """Call listener(event) with every event, alongside the connect callback.
+
+        Returns a function that removes the listener.
+        """
+        self._event_listeners = self._event_listeners + (listener,)
+
+        def remove():
+            self._event_listeners = tuple(l for l in self._event_listeners if l is not listener)
+
+        return remove
+
+    def _dispatch_event(self, event: str):
+        for listener in self._event_listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                LOGGER.error("An exception occurred notifying an event listener:", exc_info=e)
+        if self._callback is not None:
+            self._callback(event)
+
+    @property
+    def message_log(self) -> MessageLog:
+        """Return the debug log and capture buffer of received mqtt payloads"""
+        return self._message_log
+
+    @property
+    def camera_stats(self) -> CameraStats:
+        """Return the counters and histograms of the chamber camera stream"""
+        return self._camera_stats
+
     @property
     def manual_refresh_mode(self):
         """Return if the integration is running in poll mode"""
@@ -329,7 +384,7 @@ class BambuClient:
             self.disconnect()
         else:
             # Reconnect normally
-            self.connect(self.callback)
+            self.connect(self._callback)
 
     @property
     def camera_enabled(self):
@@ -341,13 +396,17 @@ class BambuClient:
             self._start_camera()
         else:
             self._stop_camera()
+            # The rtsp url is only refreshed by ipcam reports so clear it straight away.
+            with self._device._update_lock:
+                self._device.camera.rtsp_url = None
+            self._device._publish_changes("camera")
 
     def setup_tls(self):
         self.client.tls_set(tls_version=ssl.PROTOCOL_TLS, cert_reqs=ssl.CERT_NONE)
         self.client.tls_insecure_set(True)
 
-    async def connect(self, callback):
-        """Connect to the MQTT Broker"""
+    async def _create_mqtt_client(self, callback):
+        """Create and configure the paho client without starting any network activity"""
         self.client = mqtt.Client()
         self.callback = callback
         self.client.on_connect = self.on_connect
@@ -366,19 +425,36 @@ class BambuClient:
         else:
             self.client.username_pw_set(self._username, password=self._auth_token)
 
+    @property
+    def mqtt_host(self):
+        """Return the broker host to connect to for the current connection mode"""
+        return self.host if self._local_mqtt else self.bambu_cloud.cloud_mqtt_host
+
+    async def connect(self, callback):
+        """Connect to the MQTT Broker"""
+        if self._manager is not None:
+            await self._manager.connect(self, callback)
+            return
+
+        await self._create_mqtt_client(callback)
+
         LOGGER.debug("Starting MQTT listener thread")
         self._mqtt = MqttThread(self)
         self._mqtt.start()
 
     def subscribe_and_request_info(self):
         LOGGER.debug("Loading slicer settings...")
-        self.slicer_settings.update()
+        if self._manager is not None:
+            # The farm loop services the mqtt traffic of every printer, so the cloud request must not block it.
+            asyncio.run_coroutine_threadsafe(self.slicer_settings.update_async(), self._manager._loop)
+        else:
+            self.slicer_settings.update()
         LOGGER.debug("Now subscribing...")
         self.subscribe()
         LOGGER.debug("On Connect: Getting version info")
-        self.publish(GET_VERSION)
+        self.publish(GET_VERSION_PAYLOAD)
         LOGGER.debug("On Connect: Request push all")
-        self.publish(PUSH_ALL)
+        self.publish(PUSH_ALL_PAYLOAD)
 
     def on_connect(self,
                    client_: mqtt.Client,
@@ -395,7 +471,12 @@ class BambuClient:
             if self._device.supports_feature(Features.CAMERA_IMAGE):
                 if self._enable_camera:
                     LOGGER.debug("Starting Chamber Image thread")
-                    self._camera = ChamberImageThread(self)
+                    if self._camera_hub is not None:
+                        self._camera = self._camera_hub.create_camera(self)
+                    elif self._manager is not None:
+                        self._camera = self._manager.create_camera(self)
+                    else:
+                        self._camera = ChamberImageThread(self)
                     self._camera.start()
             elif (self.host == "") or (self._access_code == ""):
                 LOGGER.debug("Skipping camera setup as local access details not provided.")
@@ -404,14 +485,20 @@ class BambuClient:
         if self._camera is not None:
             LOGGER.debug("Stopping camera thread")
             self._camera.stop()
-            self._camera.join()
+            # Under a FarmManager this runs on the farm loop, which must not wait for the stream to close. The
+            # hub closes it on its own thread.
+            if self._manager is None:
+                self._camera.join()
 
     def _on_connect(self):
         self._connected = True
         self.subscribe_and_request_info()
 
         LOGGER.debug("Starting watchdog thread")
-        self._watchdog = WatchdogThread(self)
+        if self._manager is not None:
+            self._watchdog = self._manager.create_watchdog(self)
+        else:
+            self._watchdog = WatchdogThread(self)
         self._watchdog.start()
 
         self._start_camera()
@@ -429,7 +516,7 @@ class BambuClient:
         self.subscribe()
         # For the initial configuration connection attempt, we just need version info.
         LOGGER.debug("On Connect: Getting version info")
-        self.publish(GET_VERSION)
+        self.publish(GET_VERSION_PAYLOAD)
 
     def on_disconnect(self,
                       client_: mqtt.Client,
@@ -452,7 +539,7 @@ class BambuClient:
     def _on_watchdog_fired(self):
         LOGGER.info("Watch dog fired")
         self._device.info.set_online(False)
-        self.publish(START_PUSH)
+        self.publish(START_PUSH_PAYLOAD)
 
     def on_jpeg_received(self, bytes):
         self._device.chamber_image.set_jpeg(bytes)
@@ -460,12 +547,10 @@ class BambuClient:
     def on_message(self, client, userdata, message):
         """Return the payload when received"""
         try:
-            # X1 mqtt payload is inconsistent. Adjust it for consistent logging.
-            clean_msg = re.sub(r"\\n *", "", str(message.payload))
-            if self._refreshed:
-                LOGGER.debug(f"Received data: {clean_msg}")
+            # Payloads are only formatted for logging when debug logging is enabled.
+            self._message_log.record(message.payload, force=self._refreshed)
 
-            json_data = json.loads(message.payload)
+            json_data = codec.loads(message.payload)
             if json_data.get("event"):
                 # These are events from the bambu cloud mqtt feed and allow us to detect when a local
                 # device has connected/disconnected (e.g. turned on/off)
@@ -498,11 +583,18 @@ class BambuClient:
         self.client.subscribe(f"device/{self._serial}/report")
 
     def publish(self, msg):
-        """Publish a custom message"""
-        result = self.client.publish(f"device/{self._serial}/request", json.dumps(msg))
+        """Publish a custom message, either a command dict or its already encoded json bytes"""
+        if isinstance(msg, memoryview):
+            payload = msg.tobytes()
+        elif isinstance(msg, (bytes, bytearray)):
+            payload = msg
+        else:
+            payload = codec.dumps(msg)
+        result = self.client.publish(f"device/{self._serial}/request", payload)
         status = result[0]
         if status == 0:
-            LOGGER.debug(f"Sent {msg} to topic device/{self._serial}/request")
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug(f"Sent {bytes(payload).decode()} to topic device/{self._serial}/request")
             return True
 
         LOGGER.error(f"Failed to send message to topic device/{self._serial}/request")
@@ -512,16 +604,16 @@ class BambuClient:
         """Force refresh data"""
 
         if self._manual_refresh_mode:
-            self.connect(self.callback)
+            self.connect(self._callback)
         else:
             LOGGER.debug("Force Refresh: Getting Version Info")
             self._refreshed = True
-            self.publish(GET_VERSION)
+            self.publish(GET_VERSION_PAYLOAD)
             LOGGER.debug("Force Refresh: Request Push All")
             self._refreshed = True
-            self.publish(PUSH_ALL)
+            self.publish(PUSH_ALL_PAYLOAD)
 
-        self.slicer_settings.update()
+        await self.slicer_settings.update_async()
 
     def get_device(self):
         """Return device"""
@@ -541,7 +633,7 @@ class BambuClient:
         result: queue.Queue[bool] = queue.Queue(maxsize=1)
 
         def on_message(client, userdata, message):
-            json_data = json.loads(message.payload)
+            json_data = codec.loads(message.payload)
             LOGGER.debug(f"Try Connection: Got '{json_data}'")
             if json_data.get("info") and json_data.get("info").get("command") == "get_version":
                 LOGGER.debug("Got Version Command Data")
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
+import threading
+import time
+import weakref
+
+from concurrent.futures import Future
 
 curl_available = True
 try:
@@ -20,6 +26,138 @@ from .utils import get_Url
 
 IMPERSONATE_BROWSER='chrome'
 
+# Requests go through shared sessions rather than the module level curl functions, which open a new
+# connection with a full TLS handshake every time. A session keeps its connections alive, and the browser
+# impersonation negotiates HTTP/2, so the printers of a farm share a few warm connections. curl handles
+# aren't thread safe, so each thread has a session of its own and each event loop an async one.
+SESSION_OPTIONS = {"impersonate": IMPERSONATE_BROWSER, "timeout": 10}
+_local = threading.local()
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def get_session():
+    """Return this thread's shared session"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = curl_requests.Session(**SESSION_OPTIONS)
+    return session
+
+
+def get_async_session():
+    """Return the running loop's shared async session"""
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None:
+        session = _async_sessions[loop] = curl_requests.AsyncSession(**SESSION_OPTIONS)
+    return session
+
+
+def close_session():
+    """Close this thread's session and its connections"""
+    session = getattr(_local, "session", None)
+    if session is not None:
+        _local.session = None
+        session.close()
+
+
+async def close_async_session():
+    """Close the running loop's async session and its connections"""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+# How long, in seconds, a task list serves the clients of an account before it is fetched again.
+TASK_LIST_TTL = 30
+# A print that just started needs a list that is newer than the print's task, so a list at most this old.
+TASK_LIST_PRINT_START_AGE = 5
+
+_task_list_caches = weakref.WeakValueDictionary()
+_task_list_caches_lock = threading.Lock()
+
+
+class TaskListCache:
+    """The task list of one account, shared by all of its clients.
+
+    The whole account's task list is fetched at once, so when many printers ask for their latest task
+    together, one request serves them all: a list younger than the asked for age is reused, and a
+    request in progress is waited for rather than repeated. The tasks are indexed by device.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (list, tasks by device, monotonic time its request started)
+        self._entry = None
+        # (future of the entry, monotonic time the request started)
+        self._pending = None
+        self.requests = 0
+        self.hits = 0
+        self.joined = 0
+
+    def get(self, fetch, max_age: float = TASK_LIST_TTL) -> dict:
+        """Return the task list, calling fetch() for a new one unless one of at most max_age seconds is cached"""
+        return self._get_entry(fetch, max_age)[0]
+
+    def tasks_for_device(self, fetch, device_id: str, max_age: float = TASK_LIST_TTL) -> list:
+        """Return the tasks of a device, newest first"""
+        return self._get_entry(fetch, max_age)[1].get(device_id, [])
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+    def _get_entry(self, fetch, max_age: float) -> tuple:
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entry
+            if entry is not None and now - entry[2] <= max_age:
+                self.hits += 1
+                return entry
+            # A request in progress is only joined if it started recently enough for this caller. An older
+            # one is left to finish for its own callers while a new one starts.
+            pending = self._pending
+            owner = pending is None or now - pending[1] > max_age
+            if owner:
+                pending = self._pending = (Future(), now)
+                self.requests += 1
+            else:
+                self.joined += 1
+        future, started = pending
+        if not owner:
+            return future.result()
+
+        try:
+            tasks = fetch()
+            by_device = {}
+            for task in (tasks or {}).get('hits', []):
+                by_device.setdefault(task['deviceId'], []).append(task)
+            entry = (tasks, by_device, started)
+        except BaseException as e:
+            with self._lock:
+                if self._pending is pending:
+                    self._pending = None
+            future.set_exception(e)
+            raise
+        with self._lock:
+            # A failed request, e.g. one CloudFlare blocked, is not cached, nor is one older than the cached list.
+            if tasks is not None and (self._entry is None or self._entry[2] < started):
+                self._entry = entry
+            if self._pending is pending:
+                self._pending = None
+        future.set_result(entry)
+        return entry
+
+
+def task_list_cache(region: str, auth_token: str) -> TaskListCache:
+    """Return the task list cache of an account"""
+    key = (region, auth_token)
+    with _task_list_caches_lock:
+        cache = _task_list_caches.get(key)
+        if cache is None:
+            cache = _task_list_caches[key] = TaskListCache()
+        return cache
+
+
 @dataclass
 class BambuCloud:
   
@@ -29,6 +167,8 @@ class BambuCloud:
         self._username = username
         self._auth_token = auth_token
         self._tfaKey = None
+        self._task_list_key = None
+        self._task_list_cache = None
 
     def _get_headers_with_auth_token(self) -> dict:
         headers = {}
@@ -48,7 +188,7 @@ class BambuCloud:
             "apiError": ""
         }
 
-        response = curl_requests.post(get_Url(BambuUrl.LOGIN, self._region), json=data, impersonate=IMPERSONATE_BROWSER)
+        response = get_session().post(get_Url(BambuUrl.LOGIN, self._region), json=data)
 
         # Check specifically for cloudflare block
         if response.status_code == 403:
@@ -94,7 +234,7 @@ class BambuCloud:
         }
 
         LOGGER.debug("Requesting verification code")
-        response = curl_requests.post(get_Url(BambuUrl.EMAIL_CODE, self._region), json=data, impersonate=IMPERSONATE_BROWSER)
+        response = get_session().post(get_Url(BambuUrl.EMAIL_CODE, self._region), json=data)
         
         if response.status_code == 200:
             LOGGER.debug("Verification code requested successfully.")
@@ -110,7 +250,7 @@ class BambuCloud:
             "code": code
         }
 
-        response = curl_requests.post(get_Url(BambuUrl.LOGIN, self._region), json=data, impersonate=IMPERSONATE_BROWSER)
+        response = get_session().post(get_Url(BambuUrl.LOGIN, self._region), json=data)
 
         LOGGER.debug(f"Response: {response.status_code}")
         if response.status_code == 200:
@@ -142,7 +282,7 @@ class BambuCloud:
             "tfaCode": code
         }
 
-        response = curl_requests.post(get_Url(BambuUrl.TFA_LOGIN, self._region), json=data, impersonate=IMPERSONATE_BROWSER)
+        response = get_session().post(get_Url(BambuUrl.TFA_LOGIN, self._region), json=data)
 
         LOGGER.debug(f"Response: {response.status_code}")
         if response.status_code == 200:
@@ -253,9 +393,21 @@ class BambuCloud:
         LOGGER.debug("Getting device list from Bambu Cloud")
         if not curl_available:
             LOGGER.debug(f"Curl library is unavailable.")
-            raise None
+            raise ImportError("The Bambu Cloud API needs curl_cffi: pip install curl_cffi")
         
-        response = curl_requests.get(get_Url(BambuUrl.BIND, self._region), headers=self._get_headers_with_auth_token(), timeout=10, impersonate=IMPERSONATE_BROWSER)
+        response = get_session().get(get_Url(BambuUrl.BIND, self._region), headers=self._get_headers_with_auth_token())
+        return self._device_list_from(response)
+
+    async def get_device_list_async(self) -> dict:
+        LOGGER.debug("Getting device list from Bambu Cloud")
+        if not curl_available:
+            LOGGER.debug(f"Curl library is unavailable.")
+            raise ImportError("The Bambu Cloud API needs curl_cffi: pip install curl_cffi")
+
+        response = await get_async_session().get(get_Url(BambuUrl.BIND, self._region), headers=self._get_headers_with_auth_token())
+        return self._device_list_from(response)
+
+    def _device_list_from(self, response) -> dict:
         if response.status_code == 403:
             if 'cloudflare' in response.text:
                 LOGGER.error('CloudFlare blocked connection attempt')
@@ -338,19 +490,29 @@ class BambuCloud:
     def get_slicer_settings(self) -> dict:
         LOGGER.debug("Getting slicer settings from Bambu Cloud")
         if curl_available:
-            response = curl_requests.get(get_Url(BambuUrl.SLICER_SETTINGS, self._region), headers=self._get_headers_with_auth_token(), timeout=10, impersonate=IMPERSONATE_BROWSER)
-            if response.status_code == 403:
-                if 'cloudflare' in response.text:
-                    LOGGER.error(f"Cloudflare blocked slicer settings lookup.")
-                    return None
-                
-            if response.status_code >= 400:
-                LOGGER.error(f"Slicer settings load failed: {response.status_code}")
-                LOGGER.error(f"Slicer settings load failed: '{response.text}'")
-                return None
-            
-            return response.json()
+            response = get_session().get(get_Url(BambuUrl.SLICER_SETTINGS, self._region), headers=self._get_headers_with_auth_token())
+            return self._slicer_settings_from(response)
+        return None
+
+    async def get_slicer_settings_async(self) -> dict:
+        LOGGER.debug("Getting slicer settings from Bambu Cloud")
+        if curl_available:
+            response = await get_async_session().get(get_Url(BambuUrl.SLICER_SETTINGS, self._region), headers=self._get_headers_with_auth_token())
+            return self._slicer_settings_from(response)
         return None
+
+    def _slicer_settings_from(self, response) -> dict:
+        if response.status_code == 403:
+            if 'cloudflare' in response.text:
+                LOGGER.error(f"Cloudflare blocked slicer settings lookup.")
+                return None
+
+        if response.status_code >= 400:
+            LOGGER.error(f"Slicer settings load failed: {response.status_code}")
+            LOGGER.error(f"Slicer settings load failed: '{response.text}'")
+            return None
+
+        return response.json()
         
     # The task list is of the following form with a 'hits' array with typical 20 entries.
     #
@@ -394,13 +556,36 @@ class BambuCloud:
     #     "bedType": "textured_plate"
     #     },
 
-    def get_tasklist(self) -> dict:
+    def get_tasklist(self, offset: int = 0, limit: int | None = None) -> dict:
+        """Return a page of the account's tasks, newest first. Without a limit the cloud returns 20."""
         if not curl_available:
             LOGGER.debug(f"Curl library is unavailable.")
-            raise None
+            raise ImportError("The Bambu Cloud API needs curl_cffi: pip install curl_cffi")
         
         url = get_Url(BambuUrl.TASKS, self._region)
-        response = curl_requests.get(url, headers=self._get_headers_with_auth_token(), timeout=10, impersonate=IMPERSONATE_BROWSER)
+        response = get_session().get(url, headers=self._get_headers_with_auth_token(),
+                                     params=self._tasklist_params(offset, limit))
+        return self._tasklist_from(response)
+
+    async def get_tasklist_async(self, offset: int = 0, limit: int | None = None) -> dict:
+        if not curl_available:
+            LOGGER.debug(f"Curl library is unavailable.")
+            raise ImportError("The Bambu Cloud API needs curl_cffi: pip install curl_cffi")
+
+        url = get_Url(BambuUrl.TASKS, self._region)
+        response = await get_async_session().get(url, headers=self._get_headers_with_auth_token(),
+                                                 params=self._tasklist_params(offset, limit))
+        return self._tasklist_from(response)
+
+    def _tasklist_params(self, offset: int, limit: int | None) -> dict | None:
+        params = {}
+        if offset != 0:
+            params['offset'] = offset
+        if limit is not None:
+            params['limit'] = limit
+        return params or None
+
+    def _tasklist_from(self, response) -> dict:
         if response.status_code == 403:
             if 'cloudflare' in response.text:
                 LOGGER.error('CloudFlare blocked connection attempt')
@@ -409,14 +594,24 @@ class BambuCloud:
         if response.status_code >= 400:
             LOGGER.debug(f"Received error: {response.status_code}")
             LOGGER.debug(f"Received error: '{response.text}'")
-            raise None
+            raise ValueError(response.status_code)
 
         return response.json()
 
-    def get_latest_task_for_printer(self, deviceId: str) -> dict:
+    @property
+    def task_list_cache(self) -> TaskListCache:
+        """The task list cache shared with the other clients of this account"""
+        key = (self._region, self._auth_token)
+        if self._task_list_key != key:
+            # Holding the cache keeps it alive for the other clients of the account.
+            self._task_list_cache = task_list_cache(*key)
+            self._task_list_key = key
+        return self._task_list_cache
+
+    def get_latest_task_for_printer(self, deviceId: str, max_age: float = TASK_LIST_TTL) -> dict:
         LOGGER.debug(f"Getting latest task from Bambu Cloud")
         try:
-            data = self.get_tasklist_for_printer(deviceId)
+            data = self.get_tasklist_for_printer(deviceId, max_age)
             if len(data) != 0:
                 return data[0]
             LOGGER.debug("No tasks found for printer")
@@ -426,14 +621,9 @@ class BambuCloud:
             
         return None
 
-    def get_tasklist_for_printer(self, deviceId: str) -> dict:
+    def get_tasklist_for_printer(self, deviceId: str, max_age: float = TASK_LIST_TTL) -> list:
         LOGGER.debug(f"Getting task list from Bambu Cloud")
-        tasks = []
-        data = self.get_tasklist()
-        for task in data['hits']:
-            if task['deviceId'] == deviceId:
-                tasks.append(task)
-        return tasks
+        return list(self.task_list_cache.tasks_for_device(self.get_tasklist, deviceId, max_age))
 
     def get_device_type_from_device_product_name(self, device_product_name: str):
         if device_product_name == "X1 Carbon":
@@ -446,7 +636,19 @@ class BambuCloud:
             LOGGER.debug(f"Curl library is unavailable.")
             return None
 
-        response = curl_requests.get(url, timeout=10, impersonate=IMPERSONATE_BROWSER)
+        response = get_session().get(url)
+        return self._download_from(response)
+
+    async def download_async(self, url: str) -> bytearray:
+        LOGGER.debug(f"Downloading cover image: {url}")
+        if not curl_available:
+            LOGGER.debug(f"Curl library is unavailable.")
+            return None
+
+        response = await get_async_session().get(url)
+        return self._download_from(response)
+
+    def _download_from(self, response) -> bytearray:
         if response.status_code == 403:
             if 'cloudflare' in response.text:
                 LOGGER.error('CloudFlare blocked connection attempt')
@@ -0,0 +1,162 @@
+"""Protocol helpers for the P1/A1 chamber camera stream on port 6000, and for the frames it delivers"""
+from __future__ import annotations
+
+import io
+import ssl
+import struct
+
+from .const import LOGGER
+
+pil_available = True
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+    pil_available = False
+
+CAMERA_PORT = 6000
+CAMERA_USERNAME = 'bblp'
+MAX_CONNECT_ATTEMPTS = 12
+
+JPEG_START = bytes([0xff, 0xd8, 0xff, 0xe0])
+JPEG_END = bytes([0xff, 0xd9])
+
+# Payload format for each image is:
+# 16 byte header:
+#   Bytes 0:3   = little endian payload size for the jpeg image (does not include this header).
+#   Bytes 4:7   = 0x00000000
+#   Bytes 8:11  = 0x00000001
+#   Bytes 12:15 = 0x00000000
+# These first 16 bytes are always delivered by themselves.
+#
+# Bytes 16:19                       = jpeg_start magic bytes
+# Bytes 20:payload_size-2           = jpeg image bytes
+# Bytes payload_size-2:payload_size = jpeg_end magic bytes
+HEADER_SIZE = 16
+# A larger announced size means the stream is out of step with the frame headers.
+MAX_PAYLOAD_SIZE = 16 * 1024 * 1024
+
+
+def build_auth_data(access_code: str, username: str = CAMERA_USERNAME) -> bytes:
+    """Build the 80 byte authentication packet the printer expects on connect"""
+    auth_data = bytearray()
+    auth_data += struct.pack("<I", 0x40)   # '@'\0\0\0
+    auth_data += struct.pack("<I", 0x3000) # \0'0'\0\0
+    auth_data += struct.pack("<I", 0)      # \0\0\0\0
+    auth_data += struct.pack("<I", 0)      # \0\0\0\0
+    auth_data += username.encode('ascii').ljust(32, b"\0")
+    auth_data += access_code.encode('ascii').ljust(32, b"\0")
+    return bytes(auth_data)
+
+
+def create_ssl_context() -> ssl.SSLContext:
+    """The printer uses a self-signed certificate so verification is disabled"""
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+def get_payload_size(header) -> int:
+    """Return the jpeg payload size announced by a 16 byte frame header"""
+    return struct.unpack_from("<I", header, 0)[0]
+
+
+def decode_scaled(jpeg, size: tuple, mode: str = "RGB") -> "Image.Image":
+    """Decode a jpeg in mode at the smallest reduced scale that still covers size. Needs Pillow.
+
+    The image is at least size unless the jpeg is smaller, so callers finish with their own resize.
+    """
+    image = Image.open(io.BytesIO(jpeg))
+    # Lets the JPEG decoder skip most of the work by decoding at a reduced scale.
+    image.draft(mode, size)
+    return image.convert(mode)
+
+
+class FrameListeners:
+    """The listeners of a source of frames, called with (jpeg, version) for every new frame"""
+    __slots__ = ('_listeners', '_source')
+
+    def __init__(self, source: str):
+        self._listeners = ()
+        self._source = source
+
+    def add(self, listener):
+        """Add a listener and return a function that removes it"""
+        # Replace rather than mutate so a notification in progress on another thread is unaffected.
+        self._listeners = self._listeners + (listener,)
+
+        def remove():
+            self._listeners = tuple(l for l in self._listeners if l is not listener)
+
+        return remove
+
+    def notify(self, jpeg, version: int):
+        for listener in self._listeners:
+            try:
+                listener(jpeg, version)
+            except Exception as e:
+                LOGGER.error(f"An exception occurred notifying a {self._source} listener:", exc_info=e)
+
+
+def get_jpeg_error(img) -> str | None:
+    """Return why a received payload is not a complete jpeg, or None if it is"""
+    if img[:4] != JPEG_START:
+        return "JPEG start magic bytes missing."
+    if img[-2:] != JPEG_END:
+        return "JPEG end magic bytes missing."
+    return None
+
+
+class FrameAssembler:
+    """Reassembles the header framed jpeg stream of a camera connection.
+
+    Each header is received into a fixed 16 byte buffer. The payload size it announces is then allocated
+    once, and the socket reads straight into that buffer with recv_into, which never reads past the end of
+    the frame. A completed frame is handed over as a read-only memoryview of that buffer. The buffer is
+    never written again, so every reader shares the frame without copying it.
+    """
+
+    def __init__(self):
+        self._header = bytearray(HEADER_SIZE)
+        self._header_view = memoryview(self._header)
+        self._view = self._header_view
+        self._received = 0
+        self._frame = None
+        self.headers_received = 0
+
+    @property
+    def buffered(self) -> int:
+        """Return the number of bytes received of the header or frame being assembled"""
+        return self._received
+
+    def receive(self, sock) -> int:
+        """Read the next bytes of the current header or frame from sock.
+
+        Returns the number of bytes read, which is 0 at the end of the stream. Exceptions raised by
+        sock.recv_into, such as ssl.SSLWantReadError on a non-blocking socket, are passed on. A frame size
+        larger than MAX_PAYLOAD_SIZE raises ValueError.
+        """
+        count = sock.recv_into(self._view[self._received:])
+        self._received += count
+        if self._received == len(self._view):
+            if self._view is self._header_view:
+                payload_size = get_payload_size(self._header)
+                self.headers_received += 1
+                if payload_size > MAX_PAYLOAD_SIZE:
+                    self._received = 0
+                    raise ValueError(f"Unexpected image payload size: {payload_size}")
+                self._frame = memoryview(bytearray(payload_size))
+                self._view = self._frame
+                self._received = 0
+        return count
+
+    def take_frame(self) -> memoryview | None:
+        """Return the frame completed by the last receive as a read-only memoryview, or None"""
+        if self._frame is None or self._received != len(self._frame):
+            return None
+        frame = self._frame.toreadonly()
+        self._frame = None
+        self._view = self._header_view
+        self._received = 0
+        return frame
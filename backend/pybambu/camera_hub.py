@@ -0,0 +1,430 @@
+"""One thread driving the chamber camera connections of many P1/A1 printers.
+
+A ChamberImageThread per printer blocks in connect and in the TLS handshake and keeps a thread for every
+stream. A CameraHub instead owns every port 6000 connection from a single selector thread: it connects,
+completes the TLS handshake and sends the auth packet without blocking, reassembles the frames of every
+stream and hands them to the client like the thread does. A connection that fails or closes is retried
+with an exponential backoff.
+"""
+from __future__ import annotations
+
+import errno
+import heapq
+import itertools
+import os
+import random
+import selectors
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .camera import (
+    CAMERA_PORT,
+    MAX_CONNECT_ATTEMPTS,
+    FrameAssembler,
+    build_auth_data,
+    create_ssl_context,
+    get_jpeg_error,
+)
+from .camera_stats import aggregate_camera_stats
+from .const import LOGGER
+
+# Reconnect delays double from the first to the last, with up to 10% jitter so many printers that dropped
+# together don't all reconnect at the same moment.
+RETRY_DELAY = 1
+MAX_RETRY_DELAY = 30
+# The printer closes the connection straight away when the access code is wrong.
+REJECTED_RETRY_DELAY = 5
+CONNECT_TIMEOUT = 10
+# Reads from one stream per wake-up, so a busy stream can't hold up the others.
+READS_PER_WAKEUP = 64
+
+_CONNECTING = "connecting"
+_HANDSHAKE = "handshake"
+_AUTH = "auth"
+_STREAMING = "streaming"
+
+
+class CameraStream:
+    """The port 6000 connection of one client, driven by a CameraHub.
+
+    It has the start/stop/join interface of ChamberImageThread so BambuClient handles both the same way.
+    """
+
+    def __init__(self, hub: CameraHub, client):
+        self._hub = hub
+        self._client = client
+        self._host = client.host
+        self._auth_data = build_auth_data(client._access_code)
+        self._stats = client._camera_stats
+        self._sock = None
+        self._state = None
+        self._events = 0
+        self._outgoing = None
+        self._assembler = None
+        self._deadline = None
+        self._attempts = 0
+        self._resolving = False
+        self._stopped = threading.Event()
+        self._closed = threading.Event()
+        self._closed.set()
+
+    def start(self):
+        # A stream that gave up gets the full number of attempts again.
+        self._attempts = 0
+        self._stopped.clear()
+        self._closed.clear()
+        self._hub._call(self._connect)
+
+    def stop(self):
+        self._stopped.set()
+        self._hub._call(self._close)
+
+    def join(self, timeout: float = 5):
+        self._closed.wait(timeout)
+
+    @property
+    def state(self) -> str | None:
+        """Return the connection state: connecting, handshake, auth, streaming, or None between attempts"""
+        return self._state
+
+    # Everything below runs on the hub thread.
+
+    def _connect(self):
+        if self._stopped.is_set() or self._sock is not None or self._resolving:
+            return
+        self._attempts += 1
+        self._stats.connect_started()
+        try:
+            # An IP address is converted without a lookup. A host name is resolved off the hub thread.
+            address = socket.getaddrinfo(self._host, CAMERA_PORT, type=socket.SOCK_STREAM, flags=socket.AI_NUMERICHOST)[0]
+        except socket.gaierror:
+            self._resolving = True
+            self._hub._resolve(self._host, self._on_resolved)
+            return
+        self._open(address)
+
+    def _on_resolved(self, address: tuple | None, error: OSError | None):
+        self._resolving = False
+        if self._stopped.is_set():
+            return
+        if error is not None:
+            self._fail(f"Unable to connect to {self._host}: {error}")
+            return
+        self._open(address)
+
+    def _open(self, address: tuple):
+        try:
+            sock = socket.socket(address[0], address[1], address[2])
+            sock.setblocking(False)
+            result = sock.connect_ex(address[4])
+        except OSError as e:
+            self._fail(f"Unable to connect to {self._host}: {e}")
+            return
+        if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            sock.close()
+            if result == errno.EHOSTUNREACH:
+                LOGGER.debug("Host is unreachable")
+                self._stats.failed("Host is unreachable")
+                self._retry()
+            else:
+                self._fail(f"Unable to connect to {self._host}: {errno.errorcode.get(result, result)}")
+            return
+
+        self._sock = sock
+        self._state = _CONNECTING
+        self._deadline = time.monotonic() + CONNECT_TIMEOUT
+        self._hub._register(self, selectors.EVENT_WRITE)
+        self._hub._schedule(CONNECT_TIMEOUT, self._check_timeout)
+
+    def _check_timeout(self):
+        if self._state in (_CONNECTING, _HANDSHAKE, _AUTH) and self._deadline is not None and time.monotonic() >= self._deadline:
+            self._fail(f"Timed out connecting to the chamber camera at {self._host}")
+
+    def _on_ready(self, mask: int):
+        try:
+            if self._state == _CONNECTING:
+                status = self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if status != 0:
+                    if status == errno.EHOSTUNREACH:
+                        LOGGER.debug("Host is unreachable")
+                        self._stats.failed("Host is unreachable")
+                        self._close()
+                        self._retry()
+                    else:
+                        self._fail(f"Unable to connect to the chamber camera at {self._host}: {os.strerror(status)}")
+                    return
+                self._stats.tcp_connected()
+                # The ssl socket takes over the file descriptor so it is registered in place of the plain socket.
+                self._hub._unregister(self)
+                self._sock = self._hub._ssl_context.wrap_socket(self._sock, server_hostname=self._host,
+                                                                do_handshake_on_connect=False)
+                self._hub._register(self, selectors.EVENT_WRITE)
+                self._state = _HANDSHAKE
+            if self._state == _HANDSHAKE:
+                self._sock.do_handshake()
+                self._state = _AUTH
+                self._outgoing = memoryview(self._auth_data)
+            if self._state == _AUTH:
+                while len(self._outgoing) != 0:
+                    self._outgoing = self._outgoing[self._sock.send(self._outgoing):]
+                self._outgoing = None
+                self._deadline = None
+                self._stats.auth_sent()
+                self._state = _STREAMING
+                self._assembler = FrameAssembler()
+                self._hub._modify(self, selectors.EVENT_READ)
+            if self._state == _STREAMING:
+                self._read()
+        except ssl.SSLWantReadError:
+            self._hub._modify(self, selectors.EVENT_READ)
+        except ssl.SSLWantWriteError:
+            self._hub._modify(self, selectors.EVENT_WRITE)
+        except (OSError, ValueError) as e:
+            self._fail(f"Chamber image connection to {self._host} failed: {e}")
+        except Exception as e:
+            # Only this stream is closed and retried, the hub thread carries on with the others.
+            LOGGER.error(f"An exception occurred on the chamber image connection to {self._host}:", exc_info=e)
+            self._fail(f"Chamber image connection to {self._host} failed: {e!r}")
+
+    def _read(self):
+        assembler = self._assembler
+        for _ in range(READS_PER_WAKEUP):
+            # Raises SSLWantReadError once the ssl object has no decrypted data left.
+            count = assembler.receive(self._sock)
+            if count == 0:
+                if assembler.headers_received == 0:
+                    LOGGER.error("Chamber image connection rejected by the printer. Check provided access code and IP address.")
+                    self._stats.rejected()
+                    self._close()
+                    self._retry(REJECTED_RETRY_DELAY)
+                else:
+                    LOGGER.debug(f"Chamber image connection to {self._host} closed.")
+                    self._close()
+                    self._retry()
+                return
+            self._stats.bytes_received += count
+            if assembler.headers_received != 0 and self._stats.connected_since is None:
+                # Reset the attempts now we know the connect was successful.
+                self._attempts = 0
+                self._stats.stream_started()
+
+            img = assembler.take_frame()
+            if img is not None:
+                jpeg_error = get_jpeg_error(img)
+                if jpeg_error is not None:
+                    LOGGER.error(jpeg_error)
+                    self._stats.bad_frame()
+                else:
+                    self._stats.frame(len(img))
+                    try:
+                        self._client.on_jpeg_received(img)
+                    except Exception as e:
+                        LOGGER.error("An exception occurred handling a chamber image:", exc_info=e)
+        # Decrypted records left in the ssl object don't make the socket readable again.
+        self._hub._defer(self)
+
+    def _fail(self, message: str):
+        LOGGER.error(message)
+        self._stats.failed(message)
+        self._close()
+        self._retry()
+
+    def _retry(self, minimum: float = 0):
+        if self._stopped.is_set():
+            return
+        if self._attempts >= MAX_CONNECT_ATTEMPTS:
+            LOGGER.error(f"Giving up on the chamber camera at {self._host} after {self._attempts} attempts.")
+            self._closed.set()
+            return
+        delay = min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** max(0, self._attempts - 1))
+        delay = max(minimum, delay * random.uniform(0.9, 1.0))
+        self._hub._schedule(delay, self._connect)
+
+    def _close(self):
+        if self._sock is not None:
+            self._hub._unregister(self)
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._stats.closed()
+        self._sock = None
+        self._state = None
+        self._outgoing = None
+        self._assembler = None
+        self._deadline = None
+        if self._stopped.is_set():
+            self._closed.set()
+
+
+class CameraHub:
+    """Drives the chamber camera streams of many clients from one selector thread.
+
+    Clients added with add_client start their camera through the hub rather than a ChamberImageThread.
+    FarmManager creates one for the clients it manages.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._ssl_context = create_ssl_context()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ)
+        self._calls = deque()
+        self._timers = []
+        self._sequence = itertools.count()
+        self._deferred = []
+        self._streams = []
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        # Resolves printer host names so a slow DNS lookup never holds up the other streams.
+        self._resolver = None
+
+    @property
+    def streams(self) -> list:
+        """Return the camera streams created by this hub"""
+        return list(self._streams)
+
+    def add_client(self, client):
+        """Run this client's chamber camera from the hub"""
+        client._camera_hub = self
+
+    def remove_client(self, client):
+        if client._camera_hub is self:
+            # A stream the hub keeps would keep the client, its device and last frame alive.
+            with self._lock:
+                self._streams = [s for s in self._streams if s._client is not client]
+            client._stop_camera()
+            client._camera_hub = None
+
+    def create_camera(self, client) -> CameraStream:
+        stream = CameraStream(self, client)
+        with self._lock:
+            replaced = [s for s in self._streams if s._client is client]
+            self._streams = [s for s in self._streams if s._client is not client] + [stream]
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="CameraHub", daemon=True)
+                self._thread.start()
+        # The hub no longer reaches a replaced stream, so close it now.
+        for previous in replaced:
+            previous.stop()
+        return stream
+
+    def camera_stats(self) -> dict:
+        """Return the camera stats of the clients of this hub by serial, and their total"""
+        return aggregate_camera_stats([stream._client for stream in self._streams])
+
+    def stop(self):
+        """Close every stream and stop the hub thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stopping = True
+        for stream in self._streams:
+            stream.stop()
+        self._wake()
+        with self._lock:
+            resolver = self._resolver
+            self._resolver = None
+        if resolver is not None:
+            resolver.shutdown(wait=False)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(5)
+
+    def _call(self, function):
+        # Runs function on the hub thread.
+        self._calls.append(function)
+        self._wake()
+
+    def _resolve(self, host: str, callback):
+        # Calls callback(address, error) on the hub thread once the host name has been looked up.
+        def lookup():
+            try:
+                address = socket.getaddrinfo(host, CAMERA_PORT, type=socket.SOCK_STREAM)[0]
+            except OSError as e:
+                self._call(lambda: callback(None, e))
+            else:
+                self._call(lambda: callback(address, None))
+
+        with self._lock:
+            if self._resolver is None:
+                self._resolver = ThreadPoolExecutor(max_workers=2, thread_name_prefix="CameraHubResolve")
+            self._resolver.submit(lookup)
+
+    def _wake(self):
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass
+
+    def _schedule(self, delay: float, function):
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._sequence), function))
+
+    def _register(self, stream: CameraStream, events: int):
+        stream._events = events
+        self._selector.register(stream._sock, events, stream)
+
+    def _modify(self, stream: CameraStream, events: int):
+        if stream._events != events:
+            stream._events = events
+            self._selector.modify(stream._sock, events, stream)
+
+    def _unregister(self, stream: CameraStream):
+        try:
+            self._selector.unregister(stream._sock)
+        except (KeyError, ValueError):
+            pass
+
+    def _defer(self, stream: CameraStream):
+        if stream._sock is not None and stream._sock.pending() > 0:
+            self._deferred.append(stream)
+
+    def _run(self):
+        LOGGER.debug("Camera hub started.")
+        while not self._stopping:
+            if len(self._deferred) != 0 or len(self._calls) != 0:
+                timeout = 0
+            elif len(self._timers) != 0:
+                timeout = max(0, self._timers[0][0] - time.monotonic())
+            else:
+                timeout = None
+
+            for key, mask in self._selector.select(timeout):
+                if key.data is None:
+                    try:
+                        while self._wake_reader.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                else:
+                    key.data._on_ready(mask)
+
+            deferred, self._deferred = self._deferred, []
+            for stream in deferred:
+                if stream._state == _STREAMING:
+                    stream._on_ready(selectors.EVENT_READ)
+
+            while len(self._calls) != 0:
+                self._run_safely(self._calls.popleft())
+
+            now = time.monotonic()
+            while len(self._timers) != 0 and self._timers[0][0] <= now:
+                self._run_safely(heapq.heappop(self._timers)[2])
+
+        for stream in self._streams:
+            stream._stopped.set()
+            stream._close()
+        self._timers = []
+        LOGGER.debug("Camera hub exited.")
+
+    def _run_safely(self, function):
+        try:
+            function()
+        except Exception as e:
+            LOGGER.error("A camera hub exception occurred:", exc_info=e)
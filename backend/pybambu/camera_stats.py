@@ -0,0 +1,243 @@
+"""Counters and histograms of a chamber camera stream.
+
+The camera readers only log errors, which says nothing about a printer whose frames arrive slowly or whose
+Wi-Fi keeps dropping the connection. Every client has a CameraStats that the ChamberImageThread or the
+CameraHub stream updates as it goes: connection attempts and their outcome, how long the TCP connect, the
+TLS handshake and the printer's answer to the auth packet take, frames and bytes received, frames with bad
+JPEG markers, and the time between frames. The recording is a few integer updates per read, cheap enough
+to leave on.
+
+The counters are only written by the camera's own thread. Readers on other threads may see a snapshot that
+is a frame out of date, which is fine for monitoring.
+"""
+from __future__ import annotations
+
+import bisect
+import time
+
+# Upper bounds of the histogram buckets, in seconds, roughly three per decade from 1 ms to 60 s.
+TIME_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 60)
+# Frames and bytes per second are averaged over this many seconds.
+RATE_WINDOW = 10
+
+
+class Histogram:
+    """Counts of observations in fixed buckets, with their sum, minimum and maximum"""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, bounds: tuple = TIME_BUCKETS):
+        self.bounds = bounds
+        # The last bucket counts what is above the largest bound.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: Histogram):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the upper bound of the bucket the given fraction of observations falls in"""
+        if self.count == 0:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count != 0:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count != 0 else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "buckets": dict(zip([str(bound) for bound in self.bounds] + ["inf"], self.counts)),
+        }
+
+
+class CameraStats:
+    """Counters and histograms of one printer's chamber camera stream"""
+
+    COUNTERS = ('connect_attempts', 'connections', 'disconnects', 'connect_failures', 'auth_rejections',
+                'frames', 'bad_frames', 'bytes_received')
+    HISTOGRAMS = ('connect_time', 'handshake_time', 'auth_time', 'frame_interval')
+
+    def __init__(self):
+        self.connect_attempts = 0
+        self.connections = 0
+        self.disconnects = 0
+        self.connect_failures = 0
+        self.auth_rejections = 0
+        self.frames = 0
+        self.bad_frames = 0
+        self.bytes_received = 0
+        self.connect_time = Histogram()
+        self.handshake_time = Histogram()
+        self.auth_time = Histogram()
+        self.frame_interval = Histogram()
+        self.connected_since = None
+        self.last_frame = None
+        self.last_error = None
+        # Frames and bytes of the last RATE_WINDOW seconds, one slot per second.
+        self._rate_seconds = [0] * RATE_WINDOW
+        self._rate_frames = [0] * RATE_WINDOW
+        self._rate_bytes = [0] * RATE_WINDOW
+        self._started = None
+        self._auth_sent = None
+        self._last_frame_time = None
+
+    # Called by the camera reader.
+
+    def connect_started(self):
+        self.connect_attempts += 1
+        self._started = time.monotonic()
+
+    def tcp_connected(self):
+        now = time.monotonic()
+        if self._started is not None:
+            self.connect_time.observe(now - self._started)
+        self._started = now
+
+    def auth_sent(self):
+        now = time.monotonic()
+        if self._started is not None:
+            self.handshake_time.observe(now - self._started)
+        self._started = None
+        self._auth_sent = now
+
+    def stream_started(self):
+        """The first frame header arrived, so the printer accepted the access code"""
+        if self._auth_sent is not None:
+            self.auth_time.observe(time.monotonic() - self._auth_sent)
+            self._auth_sent = None
+        self.connections += 1
+        self.connected_since = time.time()
+
+    def frame(self, size: int):
+        now = time.monotonic()
+        self.frames += 1
+        if self._last_frame_time is not None:
+            self.frame_interval.observe(now - self._last_frame_time)
+        self._last_frame_time = now
+        self.last_frame = time.time()
+        second = int(now)
+        slot = second % RATE_WINDOW
+        if self._rate_seconds[slot] != second:
+            self._rate_seconds[slot] = second
+            self._rate_frames[slot] = 0
+            self._rate_bytes[slot] = 0
+        self._rate_frames[slot] += 1
+        self._rate_bytes[slot] += size
+
+    def bad_frame(self):
+        self.bad_frames += 1
+
+    def rejected(self):
+        self.auth_rejections += 1
+        self._auth_sent = None
+
+    def failed(self, error: str):
+        self.connect_failures += 1
+        self.last_error = error
+        self._started = None
+        self._auth_sent = None
+
+    def closed(self):
+        if self.connected_since is not None:
+            self.disconnects += 1
+        self.connected_since = None
+        self._last_frame_time = None
+
+    # Read by anyone.
+
+    @property
+    def frames_per_second(self) -> float:
+        return self._rate(self._rate_frames)
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self._rate(self._rate_bytes)
+
+    @property
+    def reconnects(self) -> int:
+        return max(0, self.connections - 1)
+
+    def _rate(self, values: list) -> float:
+        # The current second is still filling up, so only the whole seconds before it count. Its slot
+        # is the one of the second RATE_WINDOW seconds ago.
+        current = int(time.monotonic())
+        total = 0
+        for slot, second in enumerate(self._rate_seconds):
+            if current - RATE_WINDOW < second < current:
+                total += values[slot]
+        return total / (RATE_WINDOW - 1)
+
+    def merge(self, other: CameraStats):
+        """Add the counts and histograms of another stream, for a farm-wide total"""
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in self.HISTOGRAMS:
+            getattr(self, name).merge(getattr(other, name))
+
+    def as_dict(self) -> dict:
+        stats = {name: getattr(self, name) for name in self.COUNTERS}
+        stats.update({
+            "reconnects": self.reconnects,
+            "connected": self.connected_since is not None,
+            "connected_since": self.connected_since,
+            "last_frame": self.last_frame,
+            "last_error": self.last_error,
+            "frames_per_second": self.frames_per_second,
+            "bytes_per_second": self.bytes_per_second,
+        })
+        for name in self.HISTOGRAMS:
+            stats[name] = getattr(self, name).as_dict()
+        return stats
+
+
+def aggregate_camera_stats(clients) -> dict:
+    """Return the camera stats of every client by serial, and their total"""
+    total = CameraStats()
+    printers = {}
+    connected = 0
+    for client in clients:
+        stats = client.camera_stats
+        total.merge(stats)
+        printers[client._serial] = stats.as_dict()
+        if stats.connected_since is not None:
+            connected += 1
+    summary = total.as_dict()
+    # Per printer fields that don't add up.
+    for name in ("connected", "connected_since", "last_frame", "last_error"):
+        del summary[name]
+    # Each printer's first connection isn't a reconnect, so the merged connections can't give the total.
+    summary["reconnects"] = sum(stats["reconnects"] for stats in printers.values())
+    summary["frames_per_second"] = sum(stats["frames_per_second"] for stats in printers.values())
+    summary["bytes_per_second"] = sum(stats["bytes_per_second"] for stats in printers.values())
+    summary["cameras"] = len(printers)
+    summary["connected_cameras"] = connected
+    return {"total": summary, "printers": printers}
@@ -0,0 +1,57 @@
+"""JSON codec for mqtt payloads.
+
+Uses orjson or msgspec when installed and falls back to the standard library. Payloads are decoded
+straight from the received bytes and commands are encoded straight to bytes, so no intermediate str
+is built on either path. Callers should use `codec.loads` / `codec.dumps` through the module so a
+backend selected with `set_backend` is picked up.
+"""
+from __future__ import annotations
+
+import json
+
+orjson_available = True
+try:
+    import orjson
+except ImportError:
+    orjson_available = False
+
+msgspec_available = True
+try:
+    import msgspec
+except ImportError:
+    msgspec_available = False
+
+
+def _json_loads(data):
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+BACKENDS = {"json": (_json_loads, _json_dumps)}
+if msgspec_available:
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+    BACKENDS["msgspec"] = (_msgspec_decoder.decode, _msgspec_encoder.encode)
+if orjson_available:
+    BACKENDS["orjson"] = (orjson.loads, orjson.dumps)
+
+backend = None
+loads = None
+dumps = None
+
+
+def set_backend(name: str):
+    """Select the json backend by name ('orjson', 'msgspec' or 'json')"""
+    global backend, loads, dumps
+    if name not in BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available")
+    backend = name
+    loads, dumps = BACKENDS[name]
+
+
+set_backend("orjson" if orjson_available else "msgspec" if msgspec_available else "json")
@@ -1,4 +1,6 @@
 """MQTT Commands"""
+from .codec import dumps
+
 CHAMBER_LIGHT_ON = {
     "system": {"sequence_id": "0", "command": "ledctrl", "led_node": "chamber_light", "led_mode": "on",
                "led_on_time": 500, "led_off_time": 500, "loop_times": 0, "interval_time": 0}}
@@ -21,4 +23,16 @@ START_PUSH = { "pushing": {"sequence_id": "0", "command": "start"}}
 SEND_GCODE_TEMPLATE = {"print": {"sequence_id": "0", "command": "gcode_line", "param": ""}} # param = GCODE_EACH_LINE_SEPARATED_BY_\n
 
 # X1 only currently
-GET_ACCESSORIES = {"system": {"sequence_id": "0", "command": "get_accessories", "accessory_type": "none"}}
\ No newline at end of file
+GET_ACCESSORIES = {"system": {"sequence_id": "0", "command": "get_accessories", "accessory_type": "none"}}
+
+# Static commands are encoded once instead of on every publish. Templates are copied and filled in
+# per call, so they are encoded at publish time.
+CHAMBER_LIGHT_ON_PAYLOAD = dumps(CHAMBER_LIGHT_ON)
+CHAMBER_LIGHT_OFF_PAYLOAD = dumps(CHAMBER_LIGHT_OFF)
+GET_VERSION_PAYLOAD = dumps(GET_VERSION)
+PAUSE_PAYLOAD = dumps(PAUSE)
+RESUME_PAYLOAD = dumps(RESUME)
+STOP_PAYLOAD = dumps(STOP)
+PUSH_ALL_PAYLOAD = dumps(PUSH_ALL)
+START_PUSH_PAYLOAD = dumps(START_PUSH)
+GET_ACCESSORIES_PAYLOAD = dumps(GET_ACCESSORIES)
@@ -0,0 +1,188 @@
+"""On-disk cache of the cloud cover images of print tasks.
+
+The cover of the current task used to be downloaded on every print start and for every printer at startup,
+and only kept in memory. A CoverCache stores each image once in a directory, named by the SHA-256 of its
+content, and remembers which cover url and which model plate it belongs to. Restarts and repeated prints
+of the same plate then find the image on disk, and identical images behind different urls share one file.
+The least recently used images are removed to stay within a size budget. CoverImage only reads the file
+when the image is asked for.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+from .const import LOGGER
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    digest TEXT PRIMARY KEY,
+    size INTEGER,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS images_last_used ON images (last_used);
+CREATE TABLE IF NOT EXISTS keys (
+    key TEXT PRIMARY KEY,
+    digest TEXT
+);
+CREATE INDEX IF NOT EXISTS keys_digest ON keys (digest);
+"""
+
+
+def url_key(url: str) -> str:
+    """Return the cache key of a cover url, without the query string that signs it and expires"""
+    return "url:" + url.partition("?")[0]
+
+
+def plate_key(task: dict) -> str | None:
+    """Return the cache key of the model plate a cloud task printed, whose cover stays the same"""
+    model = task.get('modelId', '')
+    profile = task.get('profileId', 0)
+    if model == "" or not profile:
+        return None
+    return f"plate:{model}/{profile}/{task.get('plateIndex', 0)}"
+
+
+class CoverCache:
+    """Content-addressed cover images in a directory, within a size budget"""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        # Downloads in progress by url key, so printers starting the same plate together share one.
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def bytes_used(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def lookup(self, url: str, key: str | None = None) -> str | None:
+        """Return the digest of the cached image for the url or the key, or None"""
+        with self._lock:
+            for name in (key, url_key(url)):
+                if name is None:
+                    continue
+                row = self._db.execute("SELECT digest FROM keys WHERE key = ?", (name,)).fetchone()
+                if row is not None and os.path.exists(self._path(row[0])):
+                    with self._db:
+                        self._db.execute("UPDATE images SET last_used = ? WHERE digest = ?", (time.time(), row[0]))
+                        self._remember(row[0], url, key)
+                    return row[0]
+        return None
+
+    def load(self, digest: str) -> bytes | None:
+        """Return the image with this digest, or None if it has been evicted"""
+        try:
+            with open(self._path(digest), "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        # An image that is being shown is the last to be evicted.
+        with self._lock, self._db:
+            self._db.execute("UPDATE images SET last_used = ? WHERE digest = ?", (time.time(), digest))
+        return data
+
+    def put(self, url: str, data: bytes, key: str | None = None) -> str:
+        """Store the image of the url and return its digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        with self._lock:
+            if not os.path.exists(path):
+                # Written under a temporary name so a reader never sees half an image.
+                fd, temporary = tempfile.mkstemp(dir=self.directory)
+                with os.fdopen(fd, "wb") as file:
+                    file.write(data)
+                os.replace(temporary, path)
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO images (digest, size, last_used) VALUES (?, ?, ?)",
+                                 (digest, len(data), time.time()))
+                self._remember(digest, url, key)
+                self._evict(digest)
+        return digest
+
+    def fetch(self, url: str, download, key: str | None = None) -> str | None:
+        """Return the digest of the url's image, calling download(url) if it isn't cached yet.
+
+        Returns None if the download returned nothing.
+        """
+        digest = self.lookup(url, key)
+        if digest is not None:
+            self.hits += 1
+            return digest
+        name = key or url_key(url)
+        with self._lock:
+            pending = self._pending.get(name)
+            owner = pending is None
+            if owner:
+                pending = self._pending[name] = Future()
+            else:
+                self.hits += 1
+        if not owner:
+            return pending.result()
+
+        self.misses += 1
+        try:
+            data = download(url)
+            digest = self.put(url, data, key) if data else None
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[name]
+        pending.set_result(digest)
+        return digest
+
+    def clear(self):
+        with self._lock, self._db:
+            for (digest,) in self._db.execute("SELECT digest FROM images").fetchall():
+                self._remove(digest)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest)
+
+    def _remember(self, digest: str, url: str, key: str | None):
+        self._db.executemany("INSERT OR REPLACE INTO keys (key, digest) VALUES (?, ?)",
+                             [(name, digest) for name in (url_key(url), key) if name is not None])
+
+    def _evict(self, keep: str):
+        used = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+        if used <= self.max_bytes:
+            return
+        for digest, size in self._db.execute(
+                "SELECT digest, size FROM images WHERE digest != ? ORDER BY last_used", (keep,)).fetchall():
+            LOGGER.debug(f"Evicting cover image {digest} from the cache.")
+            self._remove(digest)
+            used -= size
+            if used <= self.max_bytes:
+                break
+
+    def _remove(self, digest: str):
+        self._db.execute("DELETE FROM images WHERE digest = ?", (digest,))
+        self._db.execute("DELETE FROM keys WHERE digest = ?", (digest,))
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,159 @@
+"""Delivery of client events to a consumer outside the mqtt network thread.
+
+BambuClient fires its events by calling the callback passed to connect() on the thread that received
+the report. EventDelivery.wrap() returns a callback that instead records the event in a bounded queue
+and returns straight away; the queue is drained into a user supplied asyncio loop or executor. While an
+event is waiting, a further event of the same type for the same printer replaces it: the waiting event
+moves to the back of the queue and is delivered to the latest callback, so events are delivered in the
+order they last fired. When the queue is full the oldest waiting event is dropped, so a slow consumer
+never blocks the network thread or the watchdog.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from .const import LOGGER
+
+
+class EventDelivery:
+    """Bounded, coalescing queue of client events delivered to an asyncio loop or an executor"""
+
+    # Events delivered per loop iteration before yielding to the other loop callbacks.
+    BATCH_SIZE = 64
+
+    def __init__(self,
+                 loop: asyncio.AbstractEventLoop | None = None,
+                 executor: Executor | None = None,
+                 max_pending: int = 1024):
+        if loop is not None and executor is not None:
+            raise ValueError("Deliver events either to a loop or to an executor, not both")
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self._loop = loop
+        self._owns_executor = loop is None and executor is None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pybambu-events") if self._owns_executor else executor
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        # (printer, event) -> callback, in the order the events were last queued.
+        self._pending = OrderedDict()
+        self._draining = False
+        self._closed = False
+        self._queued = 0
+        self._delivered = 0
+        self._coalesced = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def wrap(self, callback, printer=None):
+        """Return a client callback that queues each event for delivery to callback(event).
+
+        printer identifies the client whose events are coalesced together, e.g. its serial. It defaults to
+        the callback itself. An async callback is run as a task when delivering to a loop.
+        """
+        key_printer = callback if printer is None else printer
+
+        def queue_event(event):
+            self.put(key_printer, event, callback)
+
+        queue_event.delivery = self
+        return queue_event
+
+    def put(self, printer, event: str, callback):
+        """Queue callback(event) for delivery. Never blocks."""
+        key = (printer, event)
+        with self._lock:
+            if self._closed:
+                self._dropped += 1
+                return
+            if key in self._pending:
+                # Delivered after the events queued since, to the callback of a client that reconnected.
+                self._pending.move_to_end(key)
+                self._pending[key] = callback
+                self._coalesced += 1
+                return
+            if len(self._pending) >= self._max_pending:
+                dropped_key, _ = self._pending.popitem(last=False)
+                self._dropped += 1
+                LOGGER.debug(f"Event queue full, dropped {dropped_key[1]} for {dropped_key[0]}")
+            self._pending[key] = callback
+            self._queued += 1
+            if self._draining:
+                return
+            self._draining = True
+
+        try:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._drain_batch)
+            else:
+                self._executor.submit(self._drain)
+        except RuntimeError as e:
+            # The loop is closed or the executor shut down.
+            with self._lock:
+                self._draining = False
+            LOGGER.debug(f"Unable to schedule event delivery: {e}")
+
+    @property
+    def pending(self) -> int:
+        """Return the number of events waiting to be delivered"""
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        """Return the counts of queued, delivered, coalesced, dropped and failed events"""
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "queued": self._queued,
+                "delivered": self._delivered,
+                "coalesced": self._coalesced,
+                "dropped": self._dropped,
+                "failed": self._failed,
+            }
+
+    def close(self):
+        """Stop accepting events. Events already queued are still delivered."""
+        with self._lock:
+            self._closed = True
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def _next(self):
+        with self._lock:
+            if len(self._pending) == 0:
+                self._draining = False
+                return None
+            return self._pending.popitem(last=False)
+
+    def _drain(self):
+        # Runs on the executor. Only one drain runs at a time so each printer's events keep their order.
+        while True:
+            entry = self._next()
+            if entry is None:
+                return
+            self._deliver(entry)
+
+    def _drain_batch(self):
+        # Runs on the loop. Yields after a batch so a burst of events can't starve the loop.
+        for _ in range(self.BATCH_SIZE):
+            entry = self._next()
+            if entry is None:
+                return
+            self._deliver(entry)
+        self._loop.call_soon(self._drain_batch)
+
+    def _deliver(self, entry):
+        (printer, event), callback = entry
+        try:
+            result = callback(event)
+            if inspect.iscoroutine(result):
+                if self._loop is None:
+                    result.close()
+                    raise TypeError("async callbacks need an EventDelivery loop")
+                self._loop.create_task(result)
+            self._delivered += 1
+        except Exception as e:
+            self._failed += 1
+            LOGGER.error(f"An exception occurred delivering {event} for {printer}:", exc_info=e)
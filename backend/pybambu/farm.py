@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import math
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+from .bambu_client import WATCHDOG_TIMER
+from .camera_hub import CameraHub, CameraStream
+from .camera_stats import aggregate_camera_stats
+from .const import LOGGER
+from .delivery import EventDelivery
+
+# How long an executor thread closing an mqtt socket waits for the loop to unregister it.
+SOCKET_CLOSE_TIMEOUT = 5
+
+
+class AsyncWatchdog:
+    """Timer driven equivalent of WatchdogThread that runs on the farm event loop"""
+
+    def __init__(self, client, loop: asyncio.AbstractEventLoop):
+        self._client = client
+        self._loop = loop
+        self._handle = None
+        self._stopped = False
+        self._watchdog_fired = False
+        self._last_received_data = time.time()
+
+    def start(self):
+        self._loop.call_soon_threadsafe(self._schedule, WATCHDOG_TIMER)
+
+    def stop(self):
+        self._stopped = True
+        self._loop.call_soon_threadsafe(self._cancel)
+
+    def join(self):
+        # Nothing to wait for - there is no thread behind this watchdog.
+        pass
+
+    def received_data(self):
+        self._last_received_data = time.time()
+
+    def _schedule(self, delay):
+        if not self._stopped:
+            self._handle = self._loop.call_later(delay, self._check)
+
+    def _cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _check(self):
+        interval = time.time() - self._last_received_data
+        if not self._watchdog_fired and (interval > WATCHDOG_TIMER):
+            LOGGER.debug(f"Watchdog fired. No data received for {math.floor(interval)} seconds for {self._client._serial}.")
+            self._watchdog_fired = True
+            self._client._on_watchdog_fired()
+        elif interval < WATCHDOG_TIMER:
+            self._watchdog_fired = False
+
+        # Check again once the remainder of the watchdog delay or 1s, whichever is higher, has passed.
+        self._schedule(max(1, WATCHDOG_TIMER - interval))
+
+
+class FarmManager:
+    """Drives the mqtt connections, watchdogs and cameras of many BambuClient instances from one asyncio loop.
+
+    A client added to the manager keeps its normal API. Calling `await client.connect(callback)` hands the
+    connection to the manager instead of starting an MqttThread, and the watchdog runs as a loop timer
+    instead of a WatchdogThread. The chamber cameras of all clients share one CameraHub thread instead of
+    a ChamberImageThread per printer.
+    When an EventDelivery is given, the client callbacks are delivered through it rather than called
+    while the loop is reading the mqtt socket.
+    """
+
+    MISC_INTERVAL = 1
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None, delivery: EventDelivery | None = None):
+        self._loop = loop
+        self._delivery = delivery
+        self._camera_hub = None
+        self._clients = []
+        self._sockets = set()
+        self._misc_task = None
+        self._stopping = False
+
+    @property
+    def clients(self) -> list:
+        """Return the clients managed by this farm"""
+        return list(self._clients)
+
+    def add_client(self, client):
+        """Manage this client from the farm loop. Must be called before the client connects."""
+        # BambuClient is a dataclass so compare by identity rather than the generated __eq__.
+        if client._manager is not self:
+            client._manager = self
+            self._clients.append(client)
+
+    def remove_client(self, client):
+        """Disconnect this client and stop managing it"""
+        if client._manager is self:
+            self._clients = [c for c in self._clients if c is not client]
+            if getattr(client, 'client', None) is not None:
+                client.disconnect()
+            client._manager = None
+
+    def camera_stats(self) -> dict:
+        """Return the chamber camera stats of every managed client by serial, and their total"""
+        return aggregate_camera_stats(self._clients)
+
+    def create_watchdog(self, client) -> AsyncWatchdog:
+        return AsyncWatchdog(client, self._loop)
+
+    def create_camera(self, client) -> CameraStream:
+        # Camera frames are read and decrypted on the hub thread rather than the loop that services mqtt.
+        if self._camera_hub is None:
+            self._camera_hub = CameraHub()
+        return self._camera_hub.create_camera(client)
+
+    async def connect(self, client, callback):
+        """Connect a client to its MQTT broker using the farm loop for all network activity"""
+        self.add_client(client)
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self._stopping = False
+
+        if self._delivery is not None and callback is not None and getattr(callback, 'delivery', None) is not self._delivery:
+            callback = self._delivery.wrap(callback, client._serial)
+        await client._create_mqtt_client(callback)
+        mqttc = client.client
+        mqttc.on_socket_open = self._on_socket_open
+        mqttc.on_socket_close = self._on_socket_close
+        mqttc.on_socket_register_write = self._on_socket_register_write
+        mqttc.on_socket_unregister_write = self._on_socket_unregister_write
+        mqttc.on_disconnect = functools.partial(self._on_disconnect, client)
+
+        if self._misc_task is None:
+            self._misc_task = self._loop.create_task(self._misc_loop())
+
+        self._loop.create_task(self._connect(client, mqttc))
+
+    async def stop(self):
+        """Disconnect every client and stop all farm activity"""
+        self._stopping = True
+        for client in self._clients:
+            if getattr(client, 'client', None) is not None:
+                client.disconnect()
+
+        # Give the loop a moment to flush the disconnect packets and close the sockets.
+        deadline = time.monotonic() + 2
+        while len(self._sockets) != 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        if self._misc_task is not None:
+            self._misc_task.cancel()
+            self._misc_task = None
+
+        if self._camera_hub is not None:
+            await self._loop.run_in_executor(None, self._camera_hub.stop)
+
+    async def _connect(self, client, mqttc: mqtt.Client):
+        exceptionSeen = ""
+        while not self._stopping and client.client is mqttc:
+            try:
+                host = client.mqtt_host
+                LOGGER.debug(f"Connect: Attempting Connection to {host}")
+                # The TCP connect and TLS handshake block so they run in the default executor. Everything after
+                # that is driven by the socket callbacks on the loop.
+                await self._loop.run_in_executor(None, functools.partial(mqttc.connect, host, client._port, keepalive=5))
+                return
+            except TimeoutError as e:
+                if exceptionSeen != "TimeoutError":
+                    LOGGER.debug(f"TimeoutError: {e}.")
+                exceptionSeen = "TimeoutError"
+                await asyncio.sleep(5)
+            except ConnectionError as e:
+                if exceptionSeen != "ConnectionError":
+                    LOGGER.debug(f"ConnectionError: {e}.")
+                exceptionSeen = "ConnectionError"
+                await asyncio.sleep(5)
+            except OSError as e:
+                if e.errno == 113:
+                    if exceptionSeen != "OSError113":
+                        LOGGER.debug(f"OSError: {e}.")
+                    exceptionSeen = "OSError113"
+                    await asyncio.sleep(5)
+                else:
+                    LOGGER.error("A farm connect exception occurred:")
+                    LOGGER.error(f"Exception. Type: {type(e)} Args: {e}")
+                    await asyncio.sleep(1)  # Avoid a tight loop if this is a persistent error.
+            except Exception as e:
+                LOGGER.error("A farm connect exception occurred:")
+                LOGGER.error(f"Exception. Type: {type(e)} Args: {e}")
+                await asyncio.sleep(1)  # Avoid a tight loop if this is a persistent error.
+
+    async def _misc_loop(self):
+        # Keepalive pings and connection timeouts are handled by paho's loop_misc.
+        while True:
+            await asyncio.sleep(self.MISC_INTERVAL)
+            for client in self._clients:
+                mqttc = getattr(client, 'client', None)
+                if mqttc is not None and mqttc.socket() is not None:
+                    mqttc.loop_misc()
+
+    def _on_readable(self, mqttc: mqtt.Client):
+        mqttc.loop_read()
+        # Decrypted TLS records already buffered in the ssl object don't make the socket readable again.
+        sock = mqttc.socket()
+        while sock is not None and hasattr(sock, 'pending') and sock.pending() > 0:
+            mqttc.loop_read()
+            sock = mqttc.socket()
+
+    def _call_in_loop(self, callback, *args):
+        # Socket callbacks fire on the loop while reading and writing, but on an executor thread while connecting.
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _on_socket_open(self, mqttc: mqtt.Client, userdata, sock):
+        self._call_in_loop(self._add_socket, mqttc, sock)
+
+    def _add_socket(self, mqttc: mqtt.Client, sock):
+        self._sockets.add(sock)
+        self._loop.add_reader(sock, self._on_readable, mqttc)
+
+    def _on_socket_close(self, mqttc: mqtt.Client, userdata, sock):
+        # paho closes the socket straight after this callback, and its descriptor can then be reused by the
+        # next connection, so the socket is unregistered before this returns. Off the loop, while connecting
+        # on an executor thread, that means waiting for the loop to do it.
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._remove_socket(sock)
+            return
+        done = threading.Event()
+
+        def remove():
+            try:
+                self._remove_socket(sock)
+            finally:
+                done.set()
+
+        try:
+            self._loop.call_soon_threadsafe(remove)
+        except RuntimeError:
+            # The loop is closed, so nothing is registered any more.
+            return
+        if not done.wait(SOCKET_CLOSE_TIMEOUT):
+            LOGGER.debug("Timed out waiting for the farm loop to unregister a closing mqtt socket.")
+
+    def _remove_socket(self, sock):
+        self._sockets.discard(sock)
+        if sock.fileno() == -1:
+            # Already closed, and its descriptor may belong to another socket by now.
+            return
+        self._loop.remove_reader(sock)
+        self._loop.remove_writer(sock)
+
+    def _on_socket_register_write(self, mqttc: mqtt.Client, userdata, sock):
+        self._call_in_loop(self._loop.add_writer, sock, mqttc.loop_write)
+
+    def _on_socket_unregister_write(self, mqttc: mqtt.Client, userdata, sock):
+        self._call_in_loop(self._loop.remove_writer, sock)
+
+    def _on_disconnect(self, client, mqttc: mqtt.Client, userdata, result_code: int):
+        client.on_disconnect(mqttc, userdata, result_code)
+        if not self._stopping and client.client is mqttc:
+            # Mirror the aggressive 1s reconnect of the threaded client.
+            self._loop.call_later(1, lambda: self._loop.create_task(self._connect(client, mqttc)))
@@ -0,0 +1,237 @@
+"""Recent chamber camera frames of one printer, kept within a fixed memory budget.
+
+ChamberImage only holds the latest frame. A FrameBuffer keeps the last frames received, up to a number of
+frames, a number of seconds and a number of bytes, so the moments before a failure can be looked up by
+time. The frames are copied into one preallocated ring of bytes, either anonymous memory or a memory-mapped
+file, so the budget never grows and old frames are overwritten in place rather than freed.
+
+A FrameRecorder fills a FrameBuffer from a client's camera and writes the frames around a print failure or
+an HMS error to disk.
+"""
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import threading
+import time
+from datetime import datetime
+
+from .const import LOGGER
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# Seconds of frames written before and after an event.
+DEFAULT_BEFORE = 30
+DEFAULT_AFTER = 5
+DEFAULT_EVENTS = ("event_print_failed", "event_hms_errors")
+
+
+class FrameBuffer:
+    """Ring buffer of recent jpeg frames with lookup by timestamp"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_frames: int | None = None,
+                 max_seconds: float | None = None, path: str | None = None):
+        self.max_bytes = max_bytes
+        self.max_frames = max_frames
+        self.max_seconds = max_seconds
+        self.path = path
+        self._file = None
+        if path is not None:
+            self._file = open(path, "w+b")
+            self._file.truncate(max_bytes)
+            self._data = mmap.mmap(self._file.fileno(), max_bytes)
+        else:
+            # Pages of anonymous memory are only committed once a frame is written to them.
+            self._data = mmap.mmap(-1, max_bytes)
+        self._lock = threading.Lock()
+        # Oldest first. Entries before _first have been evicted and are dropped in batches.
+        self._times = []
+        self._spans = []
+        self._first = 0
+        self._head = 0
+        self._used = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._times) - self._first
+
+    @property
+    def bytes_used(self) -> int:
+        """Return the size of the frames held"""
+        return self._used
+
+    @property
+    def oldest(self) -> float | None:
+        """Return the timestamp of the oldest frame held"""
+        with self._lock:
+            return self._times[self._first] if len(self) != 0 else None
+
+    @property
+    def newest(self) -> float | None:
+        """Return the timestamp of the newest frame held"""
+        with self._lock:
+            return self._times[-1] if len(self) != 0 else None
+
+    def append(self, jpeg, timestamp: float | None = None) -> bool:
+        """Copy a frame into the buffer. Returns False if it is larger than the whole buffer."""
+        size = len(jpeg)
+        if size > self.max_bytes or size == 0:
+            self.dropped += 1
+            return False
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._lock:
+            if len(self) != 0 and timestamp < self._times[-1]:
+                # Lookup needs the timestamps in order.
+                timestamp = self._times[-1]
+            start = self._head
+            if start + size > self.max_bytes:
+                # The frames at the end of the ring are the oldest: they're dropped before wrapping.
+                while len(self) != 0 and self._spans[self._first][0] >= start:
+                    self._evict()
+                start = 0
+            while len(self) != 0 and self._overlaps(self._spans[self._first], start, size):
+                self._evict()
+            if self.max_frames is not None:
+                while len(self) >= self.max_frames:
+                    self._evict()
+            if self.max_seconds is not None:
+                while len(self) != 0 and self._times[self._first] < timestamp - self.max_seconds:
+                    self._evict()
+
+            self._data[start:start + size] = jpeg
+            self._times.append(timestamp)
+            self._spans.append((start, size))
+            self._head = start + size
+            self._used += size
+        return True
+
+    def frame_at(self, timestamp: float) -> tuple | None:
+        """Return the (timestamp, jpeg) of the last frame received at or before timestamp"""
+        with self._lock:
+            index = bisect.bisect_right(self._times, timestamp, self._first) - 1
+            if index < self._first:
+                return None
+            return self._times[index], self._read(index)
+
+    def frames(self, start: float | None = None, end: float | None = None) -> list:
+        """Return copies of the (timestamp, jpeg) frames received from start to end inclusive, oldest first"""
+        with self._lock:
+            first = self._first if start is None else bisect.bisect_left(self._times, start, self._first)
+            last = len(self._times) if end is None else bisect.bisect_right(self._times, end, self._first)
+            return [(self._times[index], self._read(index)) for index in range(first, last)]
+
+    def dump(self, directory: str, start: float | None = None, end: float | None = None) -> int:
+        """Write the frames from start to end to directory as numbered jpeg files and return how many were written"""
+        frames = self.frames(start, end)
+        os.makedirs(directory, exist_ok=True)
+        for index, (timestamp, jpeg) in enumerate(frames):
+            name = f"{index:05d}-{datetime.fromtimestamp(timestamp).strftime('%H%M%S.%f')[:-3]}.jpg"
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(jpeg)
+        return len(frames)
+
+    def clear(self):
+        with self._lock:
+            self._times = []
+            self._spans = []
+            self._first = 0
+            self._head = 0
+            self._used = 0
+
+    def close(self):
+        with self._lock:
+            self._times = []
+            self._spans = []
+            self._first = 0
+            self._data.close()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @staticmethod
+    def _overlaps(span: tuple, start: int, size: int) -> bool:
+        return span[0] < start + size and start < span[0] + span[1]
+
+    def _read(self, index: int) -> bytes:
+        offset, size = self._spans[index]
+        return self._data[offset:offset + size]
+
+    def _evict(self):
+        self._used -= self._spans[self._first][1]
+        self._first += 1
+        if self._first == len(self._times):
+            self._times = []
+            self._spans = []
+            self._first = 0
+        elif self._first > 1024 and self._first * 2 > len(self._times):
+            del self._times[:self._first]
+            del self._spans[:self._first]
+            self._first = 0
+
+
+class FrameRecorder:
+    """Keeps a client's recent camera frames and writes the frames around failures to disk.
+
+    When one of the events fires, the frames from before seconds earlier to after seconds later are written
+    to a new directory under directory, named after the printer, the event and the time.
+    """
+
+    def __init__(self, client, directory: str, before: float = DEFAULT_BEFORE, after: float = DEFAULT_AFTER,
+                 events: tuple = DEFAULT_EVENTS, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_frames: int | None = None, path: str | None = None):
+        chamber_image = getattr(client.get_device(), 'chamber_image', None)
+        if chamber_image is None:
+            raise ValueError(f"Printer {client._serial} has no chamber camera image to record")
+        self._client = client
+        self.directory = directory
+        self.before = before
+        self.after = after
+        self.events = events
+        self.buffer = FrameBuffer(max_bytes=max_bytes, max_frames=max_frames,
+                                  max_seconds=before + after, path=path)
+        self.dumps = []
+        self._timers = set()
+        self._lock = threading.Lock()
+        self._remove_frame_listener = chamber_image.add_frame_listener(self._on_frame)
+        self._remove_event_listener = client.add_event_listener(self._on_event)
+
+    def close(self):
+        """Stop recording. Dumps that are still waiting for their after frames are cancelled."""
+        self._remove_frame_listener()
+        self._remove_event_listener()
+        with self._lock:
+            timers, self._timers = self._timers, set()
+        for timer in timers:
+            timer.cancel()
+        self.buffer.close()
+
+    def _on_frame(self, jpeg, version: int):
+        self.buffer.append(jpeg)
+
+    def _on_event(self, event: str):
+        if event not in self.events:
+            return
+        if event == "event_hms_errors" and len(self._client.get_device().hms.errors) == 0:
+            # Also sent when the errors clear.
+            return
+        # Runs on the mqtt thread, so the frames are written from a timer thread once the after frames are in.
+        now = time.time()
+        name = f"{self._client._serial}-{event.removeprefix('event_')}-{datetime.fromtimestamp(now).strftime('%Y%m%d-%H%M%S')}"
+        timer = threading.Timer(self.after, self._dump, args=(os.path.join(self.directory, name), now))
+        timer.daemon = True
+        with self._lock:
+            self._timers.add(timer)
+        timer.start()
+
+    def _dump(self, path: str, timestamp: float):
+        with self._lock:
+            self._timers.discard(threading.current_thread())
+        try:
+            count = self.buffer.dump(path, timestamp - self.before, timestamp + self.after)
+        except (OSError, ValueError) as e:
+            LOGGER.error(f"Unable to write camera frames to {path}: {e}")
+            return
+        LOGGER.info(f"Wrote {count} camera frames to {path}")
+        self.dumps.append(path)
@@ -0,0 +1,118 @@
+"""Detection of chamber camera frames that show nothing new.
+
+An idle printer with the light off keeps sending frames of the same scene, and every one used to reach
+every consumer. A FrameChangeDetector only lets a frame through when it differs from the last one that did.
+Byte for byte repeats are caught with a checksum on the camera thread. When Pillow is installed and a
+threshold is set, frames are also compared by the luminance of a tiny grayscale copy, decoded at 1/8 scale
+in a worker thread, so sensor noise doesn't count as a change.
+"""
+from __future__ import annotations
+
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .camera import Image, decode_scaled, pil_available
+from .const import LOGGER
+
+# Frames are compared at this size, in 0-255 levels of luminance.
+THUMBNAIL_SIZE = (32, 24)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="FrameChange")
+        return _executor
+
+
+def luminance_thumbnail(jpeg) -> bytes:
+    """Return the luminance of the frame scaled down to THUMBNAIL_SIZE, one byte per pixel"""
+    image = decode_scaled(jpeg, (THUMBNAIL_SIZE[0] * 2, THUMBNAIL_SIZE[1] * 2), "L")
+    return image.resize(THUMBNAIL_SIZE, Image.BILINEAR).tobytes()
+
+
+def luminance_difference(first: bytes, second: bytes) -> float:
+    """Return the mean absolute difference between two thumbnails"""
+    return sum(abs(a - b) for a, b in zip(first, second)) / len(first)
+
+
+class FrameChangeDetector:
+    """Passes on the frames of one camera that differ from the last one passed on.
+
+    With a threshold of 0, only byte for byte repeats are held back. A higher threshold is the mean
+    luminance difference, out of 255, a frame needs to count as changed. It is only used when Pillow is
+    installed. Frames are compared with the last frame passed on rather than the previous frame, so a
+    slow change still gets through once it adds up.
+    """
+
+    def __init__(self, threshold: float = 0, executor=None):
+        self.threshold = threshold
+        self.published = 0
+        self.suppressed = 0
+        self._executor = executor
+        self._last_digest = None
+        self._reference = None
+        self._lock = threading.Lock()
+        self._busy = False
+        self._waiting = None
+
+    @property
+    def compares_luminance(self) -> bool:
+        return self.threshold > 0 and pil_available
+
+    def check(self, jpeg, publish):
+        """Call publish(jpeg) if the frame shows a change, possibly later from a worker thread"""
+        digest = (len(jpeg), zlib.crc32(jpeg))
+        if digest == self._last_digest:
+            self.suppressed += 1
+            return
+        self._last_digest = digest
+        if not self.compares_luminance:
+            self.published += 1
+            publish(jpeg)
+            return
+
+        with self._lock:
+            if self._busy:
+                # Only the newest frame waits for the worker. One that was already waiting is skipped.
+                if self._waiting is not None:
+                    self.suppressed += 1
+                self._waiting = (jpeg, publish)
+                return
+            self._busy = True
+        (self._executor or _shared_executor()).submit(self._compare, jpeg, publish)
+
+    def reset(self):
+        """Forget the last frame so the next one is passed on"""
+        self._last_digest = None
+        self._reference = None
+
+    def _compare(self, jpeg, publish):
+        while True:
+            try:
+                thumbnail = luminance_thumbnail(jpeg)
+            except Exception as e:
+                LOGGER.debug(f"Unable to compare a chamber image, passing it on: {e}")
+                thumbnail = None
+            if thumbnail is None or self._reference is None or \
+                    luminance_difference(thumbnail, self._reference) > self.threshold:
+                self._reference = thumbnail
+                self.published += 1
+                try:
+                    publish(jpeg)
+                except Exception as e:
+                    LOGGER.error("An exception occurred publishing a chamber image:", exc_info=e)
+            else:
+                self.suppressed += 1
+
+            with self._lock:
+                if self._waiting is None:
+                    self._busy = False
+                    return
+                jpeg, publish = self._waiting
+                self._waiting = None
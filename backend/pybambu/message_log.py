@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import collections
+import json
+import logging
+import re
+import time
+
+from .const import LOGGER
+
+# X1 mqtt payload is inconsistent. Adjust it for consistent logging.
+CLEAN_PAYLOAD_PATTERN = re.compile(r"\\n *")
+
+
+def clean_payload(payload: bytes) -> str:
+    """Return the payload formatted on a single line for logging"""
+    return CLEAN_PAYLOAD_PATTERN.sub("", str(payload))
+
+
+class MessageLog:
+    """Debug logging and capture of the raw mqtt payloads received from one printer.
+
+    Payloads are only formatted when the debug level is enabled and the message is logged: either
+    because logging is forced (e.g. after a manual refresh) or because it is one of every
+    `sample_rate` messages. The last `capture_size` payloads are kept as received so they can be
+    dumped on demand without any per message formatting cost.
+    """
+
+    def __init__(self, serial: str, sample_rate: int = 0, capture_size: int = 0):
+        self._serial = serial
+        self._sample_rate = sample_rate
+        self._count = 0
+        self._capture = collections.deque(maxlen=capture_size) if capture_size > 0 else None
+
+    @property
+    def sample_rate(self) -> int:
+        """Log one in this many messages at debug level. 0 only logs forced messages."""
+        return self._sample_rate
+
+    def set_sample_rate(self, sample_rate: int):
+        self._sample_rate = sample_rate
+
+    @property
+    def capture_size(self) -> int:
+        return 0 if self._capture is None else self._capture.maxlen
+
+    def set_capture_size(self, capture_size: int):
+        if capture_size > 0:
+            self._capture = collections.deque(self._capture or (), maxlen=capture_size)
+        else:
+            self._capture = None
+
+    def record(self, payload: bytes, force: bool = False):
+        if self._capture is not None:
+            self._capture.append((time.time(), payload))
+
+        self._count += 1
+        if not LOGGER.isEnabledFor(logging.DEBUG):
+            return
+        if force or (self._sample_rate > 0 and self._count % self._sample_rate == 0):
+            LOGGER.debug(f"Received data: {clean_payload(payload)}")
+
+    @property
+    def captured(self) -> list:
+        """Return the captured (timestamp, payload) pairs, oldest first"""
+        return [] if self._capture is None else list(self._capture)
+
+    def dump(self, path: str) -> int:
+        """Write the captured payloads to path as json lines and return how many were written"""
+        captured = self.captured
+        with open(path, "w") as f:
+            for timestamp, payload in captured:
+                f.write(json.dumps({"serial": self._serial, "time": timestamp,
+                                    "payload": bytes(payload).decode(errors="replace")}))
+                f.write("\n")
+        return len(captured)
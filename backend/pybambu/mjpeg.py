@@ -0,0 +1,240 @@
+"""HTTP server that fans the chamber camera frames of each printer out to any number of viewers.
+
+Printers accept only a few port 6000 connections, so the frames the client already receives are served
+from here instead:
+
+    GET /cameras/<serial>/stream[?fps=N]   multipart/x-mixed-replace MJPEG stream
+    GET /cameras/<serial>/snapshot.jpg     the latest frame
+    GET /cameras/<serial>/thumbnail.jpg[?size=WxH]   the latest frame scaled down, with a ThumbnailCache
+    GET /cameras/<serial>/thumbnail.webp[?size=WxH]
+
+A MosaicCompositor added with add_mosaic is served the same way, as /cameras/mosaic/ by default.
+
+Every viewer has its own frame rate cap. A viewer is only ever sent the newest frame: while it is still
+receiving one frame, the frames that arrive in the meantime replace each other rather than queueing up.
+"""
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+import urllib.parse
+
+from .const import LOGGER
+
+BOUNDARY = "frame"
+# Seconds a viewer has to send its request line and headers.
+REQUEST_TIMEOUT = 10
+MAX_REQUEST_SIZE = 8192
+# Kernel send buffer of a streaming viewer.
+SEND_BUFFER_SIZE = 32 * 1024
+THUMBNAIL_TYPES = {
+    "thumbnail.jpg": ("jpeg", "image/jpeg"),
+    "thumbnail.webp": ("webp", "image/webp"),
+}
+
+
+class CameraFeed:
+    """The latest frame of one printer's camera, shared by its viewers on the server loop"""
+
+    def __init__(self, name: str, client=None):
+        self.name = name
+        self.client = client
+        self.jpeg = None
+        self.version = 0
+        self.viewers = 0
+        self._changed = asyncio.Event()
+        self._remove_listener = None
+
+    def publish(self, jpeg, version: int):
+        self.jpeg = jpeg
+        self.version = version
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def next_frame(self, after: int) -> tuple:
+        """Wait for a frame newer than version after. Returns the newest (jpeg, version)."""
+        while self.version == after or self.jpeg is None:
+            await self._changed.wait()
+        return self.jpeg, self.version
+
+
+class MJPEGServer:
+    """Serves the chamber camera frames of the added clients over HTTP.
+
+    There is no authentication, so the server only listens on the loopback address unless given another host.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, max_fps: float = 10.0, thumbnails=None):
+        self.host = host
+        self.port = port
+        self.max_fps = max_fps
+        self.thumbnails = thumbnails
+        self._loop = None
+        self._server = None
+        self._feeds = {}
+        self._connections = set()
+
+    @property
+    def feeds(self) -> dict:
+        """Return the camera feeds by name"""
+        return dict(self._feeds)
+
+    def add_client(self, client, name: str | None = None) -> CameraFeed:
+        """Serve this client's chamber camera as /cameras/<name>/, named by its serial by default"""
+        chamber_image = getattr(client.get_device(), 'chamber_image', None)
+        if chamber_image is None:
+            raise ValueError(f"Printer {client._serial} has no chamber camera image to serve")
+        return self._add_feed(CameraFeed(name or client._serial, client), chamber_image)
+
+    def add_mosaic(self, mosaic, name: str = "mosaic") -> CameraFeed:
+        """Serve the grid image of a MosaicCompositor as /cameras/<name>/"""
+        return self._add_feed(CameraFeed(name), mosaic)
+
+    def _add_feed(self, feed: CameraFeed, source) -> CameraFeed:
+        def on_frame(jpeg, version):
+            # Called on the camera thread. The frame itself is shared, only the reference crosses over.
+            loop = self._loop
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(feed.publish, jpeg, version)
+
+        if source.version != 0:
+            feed.jpeg = source.get_jpeg()
+            feed.version = source.version
+        feed._remove_listener = source.add_frame_listener(on_frame)
+        self.remove_feed(feed.name)
+        self._feeds[feed.name] = feed
+        return feed
+
+    def remove_feed(self, name: str):
+        feed = self._feeds.pop(name, None)
+        if feed is not None:
+            feed._remove_listener()
+
+    async def start(self):
+        """Start serving on the running loop"""
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_REQUEST_SIZE)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        LOGGER.debug(f"MJPEG server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        """Stop serving and disconnect every viewer"""
+        if self._server is not None:
+            self._server.close()
+            # Streams never end by themselves.
+            for task in list(self._connections):
+                task.cancel()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            try:
+                request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+                method, target, _ = request.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                return
+
+            url = urllib.parse.urlsplit(target)
+            parts = url.path.strip("/").split("/")
+            feed = self._feeds.get(parts[1]) if len(parts) == 3 and parts[0] == "cameras" else None
+            if method not in ("GET", "HEAD"):
+                await self._respond(writer, "405 Method Not Allowed", b"")
+            elif feed is None:
+                await self._respond(writer, "404 Not Found", b"")
+            elif parts[2] == "snapshot.jpg":
+                if feed.jpeg is None:
+                    await self._respond(writer, "503 Service Unavailable", b"")
+                else:
+                    await self._respond(writer, "200 OK", feed.jpeg if method == "GET" else b"", "image/jpeg",
+                                        content_length=len(feed.jpeg))
+            elif parts[2] in THUMBNAIL_TYPES and self.thumbnails is not None and feed.client is not None:
+                await self._thumbnail(writer, feed, parts[2], urllib.parse.parse_qs(url.query), method == "HEAD")
+            elif parts[2] == "stream":
+                fps = self.max_fps
+                query = urllib.parse.parse_qs(url.query)
+                if "fps" in query:
+                    try:
+                        fps = min(fps, max(0.1, float(query["fps"][0])))
+                    except ValueError:
+                        pass
+                await self._stream(writer, feed, fps, method == "HEAD")
+            else:
+                await self._respond(writer, "404 Not Found", b"")
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            LOGGER.error("An MJPEG server exception occurred:", exc_info=e)
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: str, body, content_type: str = "text/plain",
+                       content_length: int | None = None):
+        writer.write((f"HTTP/1.1 {status}\r\n"
+                      f"Content-Type: {content_type}\r\n"
+                      f"Content-Length: {len(body) if content_length is None else content_length}\r\n"
+                      "Cache-Control: no-cache, no-store\r\n"
+                      "Connection: close\r\n\r\n").encode("latin-1"))
+        writer.write(body)
+        await writer.drain()
+
+    async def _thumbnail(self, writer: asyncio.StreamWriter, feed: CameraFeed, name: str, query: dict,
+                         head_only: bool):
+        size = None
+        if "size" in query:
+            try:
+                size = tuple(int(value) for value in query["size"][0].split("x", 1))
+            except ValueError:
+                await self._respond(writer, "400 Bad Request", b"")
+                return
+        try:
+            variant = await self.thumbnails.thumbnail(feed.client, size, format=THUMBNAIL_TYPES[name][0])
+        except ValueError as e:
+            await self._respond(writer, "400 Bad Request", str(e).encode())
+            return
+        if variant is None:
+            await self._respond(writer, "503 Service Unavailable", b"")
+        else:
+            await self._respond(writer, "200 OK", variant if not head_only else b"", THUMBNAIL_TYPES[name][1],
+                                content_length=len(variant))
+
+    async def _stream(self, writer: asyncio.StreamWriter, feed: CameraFeed, fps: float, head_only: bool):
+        writer.write(("HTTP/1.1 200 OK\r\n"
+                      f"Content-Type: multipart/x-mixed-replace; boundary={BOUNDARY}\r\n"
+                      "Cache-Control: no-cache, no-store\r\n"
+                      "Pragma: no-cache\r\n"
+                      "Connection: close\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+        if head_only:
+            return
+
+        # Keep at most the frame being sent buffered for a slow viewer, in the transport and in the kernel, so
+        # drain waits rather than frames piling up on the way to it.
+        writer.transport.set_write_buffer_limits(high=0)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_SIZE)
+        interval = 1 / fps
+        version = 0
+        feed.viewers += 1
+        try:
+            while True:
+                jpeg, version = await feed.next_frame(version)
+                sent = time.monotonic()
+                writer.write((f"--{BOUNDARY}\r\n"
+                              "Content-Type: image/jpeg\r\n"
+                              f"Content-Length: {len(jpeg)}\r\n\r\n").encode("latin-1"))
+                writer.write(jpeg)
+                writer.write(b"\r\n")
+                await writer.drain()
+                # Frames that arrive before the cap allows the next one are skipped, the newest is sent after.
+                delay = interval - (time.monotonic() - sent)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        finally:
+            feed.viewers -= 1
@@ -1,12 +1,16 @@
+import copy
 import math
+import re
+import sys
+import threading
 
-from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from dateutil import parser, tz
 from packaging import version
 
 from .utils import (
-    search,
     fan_percentage,
     fan_percentage_to_gcode,
     get_current_stage,
@@ -35,13 +39,220 @@ from .const import (
     PRINT_TYPE_OPTIONS,
     TempEnum,
 )
+from .schema import Report, parse_print_report
+from .bambu_cloud import TASK_LIST_PRINT_START_AGE, TASK_LIST_TTL
+from .cover_cache import plate_key
+from .camera import FrameListeners
+from .frame_change import FrameChangeDetector
+from .snapshot import freeze
 from .commands import (
-    CHAMBER_LIGHT_ON,
-    CHAMBER_LIGHT_OFF,
+    CHAMBER_LIGHT_ON_PAYLOAD,
+    CHAMBER_LIGHT_OFF_PAYLOAD,
     SPEED_PROFILE_TEMPLATE,
 )
 
+_UNSET = object()
+
+# Fetches the cloud task data and cover images of every client, so the MQTT network threads never wait on HTTP.
+_task_data_executor = None
+_task_data_executor_lock = threading.Lock()
+
+
+def _shared_task_data_executor() -> ThreadPoolExecutor:
+    global _task_data_executor
+    with _task_data_executor_lock:
+        if _task_data_executor is None:
+            _task_data_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="TaskData")
+        return _task_data_executor
+
+
+class ChangeTracker:
+    """Records the previous value of each annotated field when it is written with a different value.
+
+    print_update implementations return _take_changes() so callers get the exact set of fields that
+    changed, mapped to their previous values, without formatting the whole object before and after.
+    """
+    __slots__ = ('_changes',)
+    _tracked_fields = frozenset()
+
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls)
+        object.__setattr__(self, '_changes', None)
+        return self
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        tracked = set()
+        for klass in cls.__mro__:
+            tracked.update(klass.__dict__.get('__annotations__', {}))
+        cls._tracked_fields = frozenset(tracked)
+
+    def __setattr__(self, name, value):
+        if name in self._tracked_fields:
+            old = getattr(self, name, _UNSET)
+            if old is not _UNSET and old != value:
+                if self._changes is None:
+                    object.__setattr__(self, '_changes', {})
+                self._changes.setdefault(name, old)
+        object.__setattr__(self, name, value)
+
+    def _take_changes(self) -> dict:
+        """Return the changed fields mapped to their previous values and reset the record"""
+        changes = self._changes
+        if not changes:
+            return {}
+        object.__setattr__(self, '_changes', None)
+        # A field written more than once may have ended up back at its original value.
+        return {name: old for name, old in changes.items() if getattr(self, name) != old}
+
+    def _apply(self, report: Report, fields: tuple):
+        """Copy the values present in the report onto the fields they map to, as (report key, field) pairs"""
+        # Absent keys are skipped, which is most of them for a delta report, and the change record is kept
+        # here directly rather than through __setattr__ for each field.
+        changes = self._changes
+        for key, name in fields:
+            value = getattr(report, key, _UNSET)
+            if value is not _UNSET:
+                old = getattr(self, name)
+                if old != value:
+                    if changes is None:
+                        changes = {}
+                        object.__setattr__(self, '_changes', changes)
+                    changes.setdefault(name, old)
+                    object.__setattr__(self, name, value)
+
+
+# Maps each top level key of the "print" report to the Device members whose print_update consumes it.
+# Every key listed here must also be declared in schema.PRINT, which types the values the members read.
+# Printers mostly send small delta reports so only the members affected by a report are updated.
+PRINT_UPDATE_DISPATCH = {
+    "wifi_signal": ("info",),
+    "upgrade_state": ("info",),
+    "nozzle_diameter": ("info",),
+    "nozzle_type": ("info",),
+    "mc_percent": ("print_job",),
+    "gcode_state": ("print_job",),
+    "gcode_file": ("print_job",),
+    "subtask_name": ("print_job",),
+    "layer_num": ("print_job",),
+    "total_layer_num": ("print_job",),
+    "gcode_start_time": ("print_job",),
+    "mc_remaining_time": ("print_job",),
+    "print_type": ("print_job", "stage"),
+    "print_error": ("print_job", "print_error"),
+    "bed_temper": ("temperature",),
+    "bed_target_temper": ("temperature",),
+    "chamber_temper": ("temperature",),
+    "nozzle_temper": ("temperature",),
+    "nozzle_target_temper": ("temperature",),
+    "lights_report": ("lights",),
+    "big_fan1_speed": ("fans",),
+    "big_fan2_speed": ("fans",),
+    "cooling_fan_speed": ("fans",),
+    "heatbreak_fan_speed": ("fans",),
+    "spd_lvl": ("speed",),
+    "spd_mag": ("speed",),
+    "stg_cur": ("stage",),
+    "ams": ("ams",),
+    "vt_tray": ("external_spool",),
+    "hms": ("hms",),
+    "ipcam": ("camera",),
+    "home_flag": ("home_flag",),
+}
+
+# The order the Device members are updated in when several are affected by the same report.
+PRINT_UPDATE_ORDER = (
+    "info",
+    "print_job",
+    "temperature",
+    "lights",
+    "fans",
+    "speed",
+    "stage",
+    "ams",
+    "external_spool",
+    "hms",
+    "print_error",
+    "camera",
+    "home_flag",
+)
+
+# Field paths are shared by every device so the changed_fields of a large farm don't each hold a copy.
+_FIELD_PATHS = {}
+
+
+def _field_path(member: str, name: str) -> str:
+    path = _FIELD_PATHS.get((member, name))
+    if path is None:
+        path = _FIELD_PATHS[(member, name)] = sys.intern(f"{member}.{name}")
+    return path
+
+
+def _get_field(root, path: str):
+    value = root
+    for segment in path.split("."):
+        if segment.isdigit():
+            value = value[int(segment)]
+        else:
+            value = getattr(value, segment)
+    return value
+
+
+def _same_state(frozen, previous) -> bool:
+    return all(getattr(frozen, name, None) == getattr(previous, name, None) for name in type(frozen)._snapshot_slots)
+
+
+class DeviceSnapshot:
+    """Read-only view of the Device members as of one published update.
+
+    version increases by one with every published update so readers can skip work when it is unchanged,
+    and changed_fields holds the field paths that update changed.
+    """
+    __slots__ = ('version', 'changed_fields') + PRINT_UPDATE_ORDER
+
+    def __init__(self, version: int, changed_fields: frozenset, members: dict):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'changed_fields', changed_fields)
+        for member in PRINT_UPDATE_ORDER:
+            object.__setattr__(self, member, members[member])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"'{type(self).__name__}' is read-only")
+
+    def get_field(self, path: str):
+        """Return the value of the field at path in this snapshot, e.g. "ams.0.tray.1.remain" """
+        return _get_field(self, path)
+
+
 class Device:
+    __slots__ = (
+        '_client',
+        'temperature',
+        'lights',
+        'info',
+        'print_job',
+        'fans',
+        'speed',
+        'stage',
+        'ams',
+        'external_spool',
+        'hms',
+        'print_error',
+        'camera',
+        'home_flag',
+        'push_all_data',
+        'get_version_data',
+        'changed_fields',
+        '_subscriptions',
+        '_pattern_subscriptions',
+        '_update_lock',
+        '_snapshot',
+        'chamber_image',
+        'cover_image',
+    )
     def __init__(self, client):
         self._client = client
         self.temperature = Temperature(client = client)
@@ -59,38 +270,189 @@ class Device:
         self.home_flag = HomeFlag(client=client)
         self.push_all_data = None
         self.get_version_data = None
+        self.changed_fields = frozenset()
+        self._subscriptions = {}
+        self._pattern_subscriptions = []
+        # Held while the members are updated and the next snapshot is published. Readers never take it.
+        self._update_lock = threading.RLock()
+        self._snapshot = DeviceSnapshot(0, frozenset(), {member: freeze(getattr(self, member)) for member in PRINT_UPDATE_ORDER})
         if self.supports_feature(Features.CAMERA_IMAGE):
             self.chamber_image = ChamberImage(client = client)
         self.cover_image = CoverImage(client = client)
 
-    def print_update(self, data) -> bool:
-        send_event = False
-        send_event = send_event | self.info.print_update(data = data)
-        send_event = send_event | self.print_job.print_update(data = data)
-        send_event = send_event | self.temperature.print_update(data = data)
-        send_event = send_event | self.lights.print_update(data = data)
-        send_event = send_event | self.fans.print_update(data = data)
-        send_event = send_event | self.speed.print_update(data = data)
-        send_event = send_event | self.stage.print_update(data = data)
-        send_event = send_event | self.ams.print_update(data = data)
-        send_event = send_event | self.external_spool.print_update(data = data)
-        send_event = send_event | self.hms.print_update(data = data)
-        send_event = send_event | self.print_error.print_update(data = data)
-        send_event = send_event | self.camera.print_update(data = data)
-        send_event = send_event | self.home_flag.print_update(data = data)
-
-        if send_event and self._client.callback is not None:
+    def print_update(self, data) -> frozenset:
+        # Validate and convert the payload once; the members consume the typed report.
+        report = parse_print_report(data)
+        targets = set()
+        for key in data:
+            members = PRINT_UPDATE_DISPATCH.get(key)
+            if members is not None:
+                targets.update(members)
+        # Fan overrides expire on the next update even if it carries no fan data.
+        if self.fans.has_pending_override:
+            targets.add("fans")
+        # Likewise the chamber light override, which the baseline cleared on any message.
+        if self.lights.has_pending_override:
+            targets.add("lights")
+
+        changes = {}
+        with self._update_lock:
+            for member in PRINT_UPDATE_ORDER:
+                if member in targets:
+                    for name, old in getattr(self, member).print_update(report).items():
+                        changes[_field_path(member, name)] = old
+            # PrintJob adds to info.usage_hours when a print ends, after info has been updated.
+            for name, old in self.info._take_changes().items():
+                changes.setdefault(_field_path("info", name), old)
+
+            # Callbacks can read which fields the report changed, e.g. "temperature.nozzle_temp" or "ams.0.tray.1.remain".
+            self.changed_fields = frozenset(changes)
+            # The print error list does not record its changes so it is republished whenever the report carries it.
+            self._publish_snapshot(changes, ("print_error",) if "print_error" in targets else ())
+        self._notify_subscribers(changes)
+        if len(changes) != 0 and self._client.callback is not None:
             self._client.callback("event_printer_data_update")
 
         if data.get("msg", 0) == 0:
             self.push_all_data = data
 
+        return self.changed_fields
+
     def info_update(self, data):
-        self.info.info_update(data = data)
-        self.home_flag.info_update(data = data)
-        self.ams.info_update(data = data)
-        if data.get("command") == "get_version":
-            self.get_version_data = data
+        with self._update_lock:
+            self.info.info_update(data = data)
+            self.home_flag.info_update(data = data)
+            self.ams.info_update(data = data)
+            if data.get("command") == "get_version":
+                self.get_version_data = data
+
+            changes = {}
+            for member in ("info", "home_flag"):
+                for name, old in getattr(self, member)._take_changes().items():
+                    changes[_field_path(member, name)] = old
+            # The AMS units may have been created or had their versions updated.
+            self._publish_snapshot(changes, ("info", "home_flag", "ams"))
+        self._notify_subscribers(changes)
+
+    def snapshot(self) -> DeviceSnapshot:
+        """Return the latest published read-only view of the device state.
+
+        Every update publishes a new snapshot with a single reference assignment, so a snapshot is never
+        modified after it is returned and can be read from any thread without locking.
+        """
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """The version of the latest snapshot, increased by every update that changed a field"""
+        return self._snapshot.version
+
+    def _publish_snapshot(self, changes: dict, members: tuple = ()):
+        """Publish the next snapshot, reusing the previous snapshot of every member the update left unchanged"""
+        if len(changes) == 0 and len(members) == 0:
+            return
+
+        previous = self._snapshot
+        rebuild = set(members)
+        # AMS unit index -> indices of its changed trays
+        ams_units = {}
+        for path in changes:
+            member, _, field = path.partition(".")
+            rebuild.add(member)
+            if member == "ams":
+                unit, _, field = field.partition(".")
+                if unit.isdigit():
+                    trays = ams_units.setdefault(int(unit), set())
+                    name, _, field = field.partition(".")
+                    if name == "tray" and field.partition(".")[0].isdigit():
+                        trays.add(int(field.partition(".")[0]))
+
+        frozen = {}
+        for member in PRINT_UPDATE_ORDER:
+            if member not in rebuild:
+                frozen[member] = getattr(previous, member)
+            elif member == "ams" and "ams" not in members:
+                frozen[member] = freeze(self.ams, data=self._freeze_ams_units(previous.ams, ams_units))
+            else:
+                frozen[member] = freeze(getattr(self, member))
+        if len(changes) == 0 and all(_same_state(frozen[member], getattr(previous, member)) for member in members):
+            return
+        self._snapshot = DeviceSnapshot(previous.version + 1, frozenset(changes), frozen)
+
+    def _publish_changes(self, member: str) -> dict:
+        """Publish and notify the fields of a member changed outside of an update, e.g. by a command"""
+        with self._update_lock:
+            changes = {_field_path(member, name): old for name, old in getattr(self, member)._take_changes().items()}
+            self._publish_snapshot(changes)
+        self._notify_subscribers(changes)
+        return changes
+
+    def _freeze_ams_units(self, previous: "AMSList", changed: dict) -> tuple:
+        """Copy the changed AMS units and trays, sharing the previous snapshot of the others"""
+        units = []
+        for index, unit in enumerate(self.ams.data):
+            previous_unit = previous.data[index]
+            if index not in changed:
+                units.append(previous_unit)
+            elif unit is None or previous_unit is None:
+                units.append(freeze(unit))
+            else:
+                trays = tuple(freeze(tray) if tray_index in changed[index] else previous_unit.tray[tray_index]
+                              for tray_index, tray in enumerate(unit.tray))
+                units.append(freeze(unit, tray=trays))
+        return tuple(units)
+
+    def subscribe(self, path: str, callback):
+        """Call callback(path, old_value, new_value) whenever the field at path changes.
+
+        The path names a field the way it is reached from the device, e.g. "temperature.nozzle_temp" or
+        "ams.0.tray.1.remain". A "*" segment matches any single segment, so "ams.*.tray.*.remain" follows
+        the remaining filament of every AMS tray. Returns a function that removes the subscription.
+        """
+        if "*" in path:
+            pattern = re.compile(r"\.".join("[^.]*" if segment == "*" else re.escape(segment) for segment in path.split(".")))
+            entry = (pattern, callback)
+            # Replace rather than mutate so a notification in progress on the mqtt thread is unaffected.
+            self._pattern_subscriptions = self._pattern_subscriptions + [entry]
+
+            def unsubscribe():
+                self._pattern_subscriptions = [e for e in self._pattern_subscriptions if e is not entry]
+        else:
+            self._subscriptions = {**self._subscriptions, path: self._subscriptions.get(path, ()) + (callback,)}
+
+            def unsubscribe():
+                callbacks = tuple(c for c in self._subscriptions.get(path, ()) if c is not callback)
+                subscriptions = {**self._subscriptions, path: callbacks}
+                if len(callbacks) == 0:
+                    del subscriptions[path]
+                self._subscriptions = subscriptions
+
+        return unsubscribe
+
+    def get_field(self, path: str):
+        """Return the current value of the field at path, e.g. "ams.0.tray.1.remain" """
+        return _get_field(self, path)
+
+    def _notify_subscribers(self, changes: dict):
+        subscriptions = self._subscriptions
+        pattern_subscriptions = self._pattern_subscriptions
+        if len(changes) == 0 or (len(subscriptions) == 0 and len(pattern_subscriptions) == 0):
+            return
+
+        for path, old in changes.items():
+            callbacks = list(subscriptions.get(path, ()))
+            for pattern, callback in pattern_subscriptions:
+                if pattern.fullmatch(path):
+                    callbacks.append(callback)
+            if len(callbacks) == 0:
+                continue
+
+            new = self.get_field(path)
+            for callback in callbacks:
+                try:
+                    callback(path, old, new)
+                except Exception as e:
+                    LOGGER.error(f"An exception occurred notifying a subscriber of '{path}':", exc_info=e)
 
     def _supports_temperature_set(self):
         # When talking to the Bambu cloud mqtt, setting the temperatures is allowed.
@@ -156,8 +518,9 @@ class Device:
             return self.external_spool
 
 @dataclass
-class Lights:
+class Lights(ChangeTracker):
     """Return all light related info"""
+    __slots__ = ('_client', 'chamber_light', 'chamber_light_override', 'work_light')
     chamber_light: str
     chamber_light_override: str
     work_light: str
@@ -168,9 +531,7 @@ class Lights:
         self.work_light = "unknown"
         self.chamber_light_override = ""
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
-
+    def print_update(self, report: Report) -> dict:
         # "lights_report": [
         #     {
         #         "node": "chamber_light",
@@ -182,38 +543,43 @@ class Lights:
         #     }
         # ],
 
-        chamber_light = \
-            search(data.get("lights_report", []), lambda x: x.get('node', "") == "chamber_light",
-                   {"mode": self.chamber_light}).get("mode")
+        # The schema maps the report to {node: mode}.
+        lights = getattr(report, "lights_report", {})
+        chamber_light = lights.get("chamber_light", self.chamber_light)
         if self.chamber_light_override != "":
             if self.chamber_light_override == chamber_light:
                 self.chamber_light_override = ""
         else:
             self.chamber_light = chamber_light
-        self.work_light = \
-            search(data.get("lights_report", []), lambda x: x.get('node', "") == "work_light",
-                   {"mode": self.work_light}).get("mode")
-        
-        return (old_data != f"{self.__dict__}")
+        self.work_light = lights.get("work_light", self.work_light)
+
+        return self._take_changes()
+
+    @property
+    def has_pending_override(self) -> bool:
+        return self.chamber_light_override != ""
 
     def TurnChamberLightOn(self):
         self.chamber_light = "on"
         self.chamber_light_override = "on"
+        self._client._device._publish_changes("lights")
         if self._client.callback is not None:
             self._client.callback("event_light_update")
-        self._client.publish(CHAMBER_LIGHT_ON)
+        self._client.publish(CHAMBER_LIGHT_ON_PAYLOAD)
 
     def TurnChamberLightOff(self):
         self.chamber_light = "off"
         self.chamber_light_override = "off"
+        self._client._device._publish_changes("lights")
         if self._client.callback is not None:
             self._client.callback("event_light_update")
-        self._client.publish(CHAMBER_LIGHT_OFF)
+        self._client.publish(CHAMBER_LIGHT_OFF_PAYLOAD)
 
 
 @dataclass
-class Camera:
+class Camera(ChangeTracker):
     """Return camera related info"""
+    __slots__ = ('_client', 'recording', 'resolution', 'rtsp_url', 'timelapse')
     recording: str
     resolution: str
     rtsp_url: str
@@ -226,9 +592,13 @@ class Camera:
         self.rtsp_url = None
         self.timelapse = ''
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
+    REPORT_FIELDS = (
+        ("timelapse", "timelapse"),
+        ("ipcam_record", "recording"),
+        ("resolution", "resolution"),
+    )
 
+    def print_update(self, report: Report) -> dict:
         # "ipcam": {
         #   "ipcam_dev": "1",
         #   "ipcam_record": "enable",
@@ -239,19 +609,20 @@ class Camera:
         #   "tutk_server": "disable"
         # }
 
-        self.timelapse = data.get("ipcam", {}).get("timelapse", self.timelapse)
-        self.recording = data.get("ipcam", {}).get("ipcam_record", self.recording)
-        self.resolution = data.get("ipcam", {}).get("resolution", self.resolution)
-        if self._client._enable_camera:
-            self.rtsp_url = data.get("ipcam", {}).get("rtsp_url", self.rtsp_url)
-        else:
+        ipcam = getattr(report, "ipcam", None)
+        if ipcam is not None:
+            self._apply(ipcam, self.REPORT_FIELDS)
+            if self._client._enable_camera:
+                self.rtsp_url = getattr(ipcam, "rtsp_url", self.rtsp_url)
+        if not self._client._enable_camera:
             self.rtsp_url = None
-        
-        return (old_data != f"{self.__dict__}")
+
+        return self._take_changes()
 
 @dataclass
-class Temperature:
+class Temperature(ChangeTracker):
     """Return all temperature related info"""
+    __slots__ = ('_client', 'bed_temp', 'target_bed_temp', 'chamber_temp', 'nozzle_temp', 'target_nozzle_temp')
     bed_temp: int
     target_bed_temp: int
     chamber_temp: int
@@ -266,16 +637,18 @@ class Temperature:
         self.nozzle_temp = 0
         self.target_nozzle_temp = 0
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
+    REPORT_FIELDS = (
+        ("bed_temper", "bed_temp"),
+        ("bed_target_temper", "target_bed_temp"),
+        ("chamber_temper", "chamber_temp"),
+        ("nozzle_temper", "nozzle_temp"),
+        ("nozzle_target_temper", "target_nozzle_temp"),
+    )
 
-        self.bed_temp = round(data.get("bed_temper", self.bed_temp))
-        self.target_bed_temp = round(data.get("bed_target_temper", self.target_bed_temp))
-        self.chamber_temp = round(data.get("chamber_temper", self.chamber_temp))
-        self.nozzle_temp = round(data.get("nozzle_temper", self.nozzle_temp))
-        self.target_nozzle_temp = round(data.get("nozzle_target_temper", self.target_nozzle_temp))
-        
-        return (old_data != f"{self.__dict__}")
+    def print_update(self, report: Report) -> dict:
+        self._apply(report, self.REPORT_FIELDS)
+
+        return self._take_changes()
 
     def set_target_temp(self, temp: TempEnum, temperature: int):
         command = set_temperature_to_gcode(temp, temperature)
@@ -293,8 +666,25 @@ class Temperature:
 
 
 @dataclass
-class Fans:
+class Fans(ChangeTracker):
     """Return all fan related info"""
+    __slots__ = (
+        '_client',
+        '_aux_fan_speed_percentage',
+        '_aux_fan_speed',
+        '_aux_fan_speed_override',
+        '_aux_fan_speed_override_time',
+        '_chamber_fan_speed_percentage',
+        '_chamber_fan_speed',
+        '_chamber_fan_speed_override',
+        '_chamber_fan_speed_override_time',
+        '_cooling_fan_speed_percentage',
+        '_cooling_fan_speed',
+        '_cooling_fan_speed_override',
+        '_cooling_fan_speed_override_time',
+        '_heatbreak_fan_speed_percentage',
+        '_heatbreak_fan_speed',
+    )
     _aux_fan_speed_percentage: int
     _aux_fan_speed: int
     _aux_fan_speed_override: int
@@ -327,31 +717,35 @@ class Fans:
         self._heatbreak_fan_speed_percentage = 0
         self._heatbreak_fan_speed = 0
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
-
-        self._aux_fan_speed = data.get("big_fan1_speed", self._aux_fan_speed)
+    def print_update(self, report: Report) -> dict:
+        self._aux_fan_speed = getattr(report, "big_fan1_speed", self._aux_fan_speed)
         self._aux_fan_speed_percentage = fan_percentage(self._aux_fan_speed)
         if self._aux_fan_speed_override_time is not None:
             delta = datetime.now() - self._aux_fan_speed_override_time
             if delta.seconds > 5:
                 self._aux_fan_speed_override_time = None
-        self._chamber_fan_speed = data.get("big_fan2_speed", self._chamber_fan_speed)
+        self._chamber_fan_speed = getattr(report, "big_fan2_speed", self._chamber_fan_speed)
         self._chamber_fan_speed_percentage = fan_percentage(self._chamber_fan_speed)
         if self._chamber_fan_speed_override_time is not None:
             delta = datetime.now() - self._chamber_fan_speed_override_time
             if delta.seconds > 5:
                 self._chamber_fan_speed_override_time = None
-        self._cooling_fan_speed = data.get("cooling_fan_speed", self._cooling_fan_speed)
+        self._cooling_fan_speed = getattr(report, "cooling_fan_speed", self._cooling_fan_speed)
         self._cooling_fan_speed_percentage = fan_percentage(self._cooling_fan_speed)
         if self._cooling_fan_speed_override_time is not None:
             delta = datetime.now() - self._cooling_fan_speed_override_time
             if delta.seconds > 5:
                 self._cooling_fan_speed_override_time = None
-        self._heatbreak_fan_speed = data.get("heatbreak_fan_speed", self._heatbreak_fan_speed)
+        self._heatbreak_fan_speed = getattr(report, "heatbreak_fan_speed", self._heatbreak_fan_speed)
         self._heatbreak_fan_speed_percentage = fan_percentage(self._heatbreak_fan_speed)
-        
-        return (old_data != f"{self.__dict__}")
+
+        return self._take_changes()
+
+    @property
+    def has_pending_override(self) -> bool:
+        return self._aux_fan_speed_override_time is not None or \
+               self._chamber_fan_speed_override_time is not None or \
+               self._cooling_fan_speed_override_time is not None
 
     def set_fan_speed(self, fan: FansEnum, percentage: int):
         """Set fan speed"""
@@ -371,6 +765,7 @@ class Fans:
         LOGGER.debug(command)
         self._client.publish(command)
 
+        self._client._device._publish_changes("fans")
         if self._client.callback is not None:
             self._client.callback("event_printer_data_update")
 
@@ -394,8 +789,30 @@ class Fans:
             return self._heatbreak_fan_speed_percentage
 
 @dataclass
-class PrintJob:
+class PrintJob(ChangeTracker):
     """Return all information related content"""
+    __slots__ = (
+        '_client',
+        '_task_data',
+        '_task_request',
+        'print_percentage',
+        'gcode_state',
+        'file_type_icon',
+        'gcode_file',
+        'subtask_name',
+        'start_time',
+        'end_time',
+        'remaining_time',
+        'current_layer',
+        'total_layers',
+        'print_error',
+        'print_weight',
+        'print_length',
+        'print_bed_type',
+        'print_type',
+        '_ams_print_weights',
+        '_ams_print_lengths',
+    )
 
     print_percentage: int
     gcode_state: str
@@ -433,6 +850,9 @@ class PrintJob:
 
     def __init__(self, client):
         self._client = client
+        self._task_data = None
+        # Counts the task data requests, so a result that a newer request overtook is dropped.
+        self._task_request = 0
         self.print_percentage = 0
         self.gcode_state = "unknown"
         self.gcode_file = ""
@@ -451,9 +871,15 @@ class PrintJob:
         self.file_type_icon = "mdi:file"
         self.print_type = ""
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
+    REPORT_FIELDS = (
+        ("mc_percent", "print_percentage"),
+        ("gcode_file", "gcode_file"),
+        ("subtask_name", "subtask_name"),
+        ("layer_num", "current_layer"),
+        ("total_layer_num", "total_layers"),
+    )
 
+    def print_update(self, report: Report) -> dict:
         # Example payload:
         # {
         #     "print": {
@@ -473,9 +899,9 @@ class PrintJob:
         #         "layer_num": 0,
         #         "total_layer_num": 0,
 
-        self.print_percentage = data.get("mc_percent", self.print_percentage)
+        self._apply(report, self.REPORT_FIELDS)
         previous_gcode_state = self.gcode_state
-        self.gcode_state = data.get("gcode_state", self.gcode_state)
+        self.gcode_state = getattr(report, "gcode_state", self.gcode_state)
         if previous_gcode_state != self.gcode_state:
             LOGGER.debug(f"GCODE_STATE: {previous_gcode_state} -> {self.gcode_state}")
         if self.gcode_state.lower() not in GCODE_STATE_OPTIONS:
@@ -483,31 +909,28 @@ class PrintJob:
             self.gcode_state = "unknown"
         if previous_gcode_state != self.gcode_state:
             LOGGER.debug(f"GCODE_STATE: {previous_gcode_state} -> {self.gcode_state}")
-        self.gcode_file = data.get("gcode_file", self.gcode_file)
-        self.print_type = data.get("print_type", self.print_type)
+        self.print_type = getattr(report, "print_type", self.print_type)
         if self.print_type.lower() not in PRINT_TYPE_OPTIONS:
             if self.print_type != "":
                 LOGGER.debug(f"Unknown print_type. Please log an issue : '{self.print_type}'")
             self.print_type = "unknown"
-        self.subtask_name = data.get("subtask_name", self.subtask_name)
         self.file_type_icon = "mdi:file" if self.print_type != "cloud" else "mdi:cloud-outline"
-        self.current_layer = data.get("layer_num", self.current_layer)
-        self.total_layers = data.get("total_layer_num", self.total_layers)
 
         # Initialize task data at startup.
         if previous_gcode_state == "unknown" and self.gcode_state != "unknown":
             self._update_task_data()
 
         # Calculate start / end time after we update task data so we don't stomp on prepopulated values while idle on integration start.
-        if data.get("gcode_start_time") is not None:
-            if self.start_time != get_start_time(int(data.get("gcode_start_time"))):
+        if hasattr(report, "gcode_start_time"):
+            start_time = get_start_time(report.gcode_start_time)
+            if self.start_time != start_time:
                 LOGGER.debug(f"GCODE START TIME: {self.start_time}")
-            self.start_time = get_start_time(int(data.get("gcode_start_time")))
+            self.start_time = start_time
 
         # Generate the end_time from the remaining_time mqtt payload value if present.
-        if data.get("mc_remaining_time") is not None:
+        if hasattr(report, "mc_remaining_time"):
             existing_remaining_time = self.remaining_time
-            self.remaining_time = data.get("mc_remaining_time")
+            self.remaining_time = report.mc_remaining_time
             if existing_remaining_time != self.remaining_time:
                 self.end_time = get_end_time(self.remaining_time)
                 LOGGER.debug(f"END TIME2: {self.end_time}")
@@ -529,8 +952,8 @@ class PrintJob:
                 self.end_time = None
                 LOGGER.debug(f"GENERATED START TIME: {self.start_time}")
 
-            # Update task data if bambu cloud connected
-            self._update_task_data()
+            # Update task data if bambu cloud connected. The cached task list may predate this print.
+            self._update_task_data(TASK_LIST_PRINT_START_AGE)
 
         # When a print is canceled by the user, this is the payload that's sent. A couple of seconds later
         # print_error will be reset to zero.
@@ -540,11 +963,11 @@ class PrintJob:
         #     }
         # }
         isCanceledPrint = False
-        if data.get("print_error") == 50348044 and self.print_error == 0:
+        if getattr(report, "print_error", None) == 50348044 and self.print_error == 0:
             isCanceledPrint = True
             if self._client.callback is not None:
                self._client.callback("event_print_canceled")
-        self.print_error = data.get("print_error", self.print_error)
+        self.print_error = getattr(report, "print_error", self.print_error)
 
         # Handle print failed
         if previous_gcode_state != "unknown" and previous_gcode_state != "FAILED" and self.gcode_state == "FAILED":
@@ -568,7 +991,7 @@ class PrintJob:
                 LOGGER.debug(f"NEW USAGE HOURS: {new_hours}")
                 self._client._device.info.usage_hours += new_hours
 
-        return (old_data != f"{self.__dict__}")
+        return self._take_changes()
 
     # The task list is of the following form with a 'hits' array with typical 20 entries.
     #
@@ -612,69 +1035,141 @@ class PrintJob:
     #     "bedType": "textured_plate"
     #     },
 
-    def _update_task_data(self):
+    def _update_task_data(self, max_age: float = TASK_LIST_TTL):
+        """Fetch the latest cloud task in the background. The result is applied when it arrives.
+
+        The account's task list is shared with its other clients and reused for up to max_age seconds.
+        """
         if self._client.bambu_cloud.auth_token != "":
-            self._task_data = self._client.bambu_cloud.get_latest_task_for_printer(self._client._serial)
-            if self._task_data is None:
-                LOGGER.debug("No bambu cloud task data found for printer.")
-                self._client._device.cover_image.set_jpeg(None)
-                self.print_weight = 0
-                self._ams_print_weights = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-                self._ams_print_lengths = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-                self.print_length = 0
-                self.print_bed_type = "unknown"
-                self.start_time = None
-                self.end_time = None
+            self._task_request += 1
+            _shared_task_data_executor().submit(self._fetch_task_data, self._task_request, max_age)
+
+    def _fetch_task_data(self, request: int, max_age: float):
+        # Runs on a task data worker thread, where an exception would otherwise go unnoticed.
+        try:
+            self._load_task_data(request, max_age)
+        except Exception as e:
+            LOGGER.error("An exception occurred updating the bambu cloud task data:", exc_info=e)
+
+    def _load_task_data(self, request: int, max_age: float = TASK_LIST_TTL):
+        task_data = self._client.bambu_cloud.get_latest_task_for_printer(self._client._serial, max_age)
+        cover = None
+        cover_digest = None
+        cover_cache = self._client._cover_cache
+        if task_data is not None:
+            url = task_data.get('cover', '')
+            if url != "":
+                try:
+                    if cover_cache is not None:
+                        cover_digest = cover_cache.fetch(url, self._client.bambu_cloud.download, plate_key(task_data))
+                    else:
+                        cover = self._client.bambu_cloud.download(url)
+                except Exception as e:
+                    LOGGER.error("An exception occurred downloading the cover image:", exc_info=e)
+
+        device = self._client._device
+        with device._update_lock:
+            if request != self._task_request:
+                LOGGER.debug("Dropping bambu cloud task data of a superseded request.")
+                return
+            cover_changed = self._apply_task_data(task_data, cover, cover_cache, cover_digest)
+            changes = {_field_path("print_job", name): old for name, old in self._take_changes().items()}
+            device._publish_snapshot(changes)
+        device._notify_subscribers(changes)
+        if self._client.callback is not None:
+            if cover_changed:
+                self._client.callback("event_printer_cover_image_update")
+            self._client.callback("event_print_task_data_update")
+            if len(changes) != 0:
+                self._client.callback("event_printer_data_update")
+
+    def _apply_task_data(self, task_data: dict, cover, cover_cache=None, cover_digest: str | None = None) -> bool:
+        """Apply the task data and return whether the cover image changed"""
+        self._task_data = task_data
+        cover_changed = True
+        if self._task_data is None:
+            LOGGER.debug("No bambu cloud task data found for printer.")
+            self._client._device.cover_image.set_jpeg(None)
+            self.print_weight = 0
+            self._ams_print_weights = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+            self._ams_print_lengths = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+            self.print_length = 0
+            self.print_bed_type = "unknown"
+            self.start_time = None
+            self.end_time = None
+        else:
+            LOGGER.debug("Updating bambu cloud task data found for printer.")
+            cover_image = self._client._device.cover_image
+            if cover_digest is not None:
+                cover_changed = cover_image.set_cached(cover_cache, cover_digest)
+            elif cover is not None:
+                cover_image.set_jpeg(cover)
             else:
-                LOGGER.debug("Updating bambu cloud task data found for printer.")
-                url = self._task_data.get('cover', '')
-                if url != "":
-                    data = self._client.bambu_cloud.download(url)
-                    self._client._device.cover_image.set_jpeg(data)
-
-                self.print_length = self._task_data.get('length', self.print_length * 100) / 100
-                self.print_bed_type = self._task_data.get('bedType', self.print_bed_type)
-                self.print_weight = self._task_data.get('weight', self.print_weight)
-                ams_print_data = self._task_data.get('amsDetailMapping', [])
-                self._ams_print_weights = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-                self._ams_print_lengths = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-                if self.print_weight != 0:
-                    for ams_data in ams_print_data:
-                        index = ams_data['ams']
-                        weight = ams_data['weight']
-                        self._ams_print_weights[index] = weight
-                        self._ams_print_lengths[index] = self.print_length * weight / self.print_weight
-
-                status = self._task_data['status']
-                LOGGER.debug(f"CLOUD PRINT STATUS: {status}")
-                if self._client._device.supports_feature(Features.START_TIME_GENERATED) and (status == 4):
-                    # If we generate the start time (not X1), then rely more heavily on the cloud task data and
-                    # do so uniformly so we always have matched start/end times.
-
-                    # "startTime": "2023-12-21T19:02:16Z"
-                    cloud_time_str = self._task_data.get('startTime', "")
-                    LOGGER.debug(f"CLOUD START TIME1: {self.start_time}")
-                    if cloud_time_str != "":
-                        local_dt = parser.parse(cloud_time_str).astimezone(tz.tzlocal())
-                        # Convert it to timestamp and back to get rid of timezone in printed output to match datetime objects created from mqtt timestamps.
-                        local_dt = datetime.fromtimestamp(local_dt.timestamp())
-                        self.start_time = local_dt
-                        LOGGER.debug(f"CLOUD START TIME2: {self.start_time}")
-
-                    # "endTime": "2023-12-21T19:02:35Z"
-                    cloud_time_str = self._task_data.get('endTime', "")
-                    LOGGER.debug(f"CLOUD END TIME1: {self.end_time}")
-                    if cloud_time_str != "":
-                        local_dt = parser.parse(cloud_time_str).astimezone(tz.tzlocal())
-                        # Convert it to timestamp and back to get rid of timezone in printed output to match datetime objects created from mqtt timestamps.
-                        local_dt = datetime.fromtimestamp(local_dt.timestamp())
-                        self.end_time = local_dt
-                        LOGGER.debug(f"CLOUD END TIME2: {self.end_time}")
+                # The task has no cover or it failed to download, so the previous print's cover is cleared.
+                cover_changed = cover_image._digest is not None or bool(cover_image._bytes)
+                cover_image.set_jpeg(None)
+
+            self.print_length = self._task_data.get('length', self.print_length * 100) / 100
+            self.print_bed_type = self._task_data.get('bedType', self.print_bed_type)
+            self.print_weight = self._task_data.get('weight', self.print_weight)
+            ams_print_data = self._task_data.get('amsDetailMapping', [])
+            # Build the lists before assigning them so the change tracking sees the new values.
+            ams_print_weights = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+            ams_print_lengths = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+            if self.print_weight != 0:
+                for ams_data in ams_print_data:
+                    index = ams_data['ams']
+                    weight = ams_data['weight']
+                    ams_print_weights[index] = weight
+                    ams_print_lengths[index] = self.print_length * weight / self.print_weight
+            self._ams_print_weights = ams_print_weights
+            self._ams_print_lengths = ams_print_lengths
+
+            status = self._task_data['status']
+            LOGGER.debug(f"CLOUD PRINT STATUS: {status}")
+            if self._client._device.supports_feature(Features.START_TIME_GENERATED) and (status == 4):
+                # If we generate the start time (not X1), then rely more heavily on the cloud task data and
+                # do so uniformly so we always have matched start/end times.
+
+                # "startTime": "2023-12-21T19:02:16Z"
+                cloud_time_str = self._task_data.get('startTime', "")
+                LOGGER.debug(f"CLOUD START TIME1: {self.start_time}")
+                if cloud_time_str != "":
+                    local_dt = parser.parse(cloud_time_str).astimezone(tz.tzlocal())
+                    # Convert it to timestamp and back to get rid of timezone in printed output to match datetime objects created from mqtt timestamps.
+                    local_dt = datetime.fromtimestamp(local_dt.timestamp())
+                    self.start_time = local_dt
+                    LOGGER.debug(f"CLOUD START TIME2: {self.start_time}")
+
+                # "endTime": "2023-12-21T19:02:35Z"
+                cloud_time_str = self._task_data.get('endTime', "")
+                LOGGER.debug(f"CLOUD END TIME1: {self.end_time}")
+                if cloud_time_str != "":
+                    local_dt = parser.parse(cloud_time_str).astimezone(tz.tzlocal())
+                    # Convert it to timestamp and back to get rid of timezone in printed output to match datetime objects created from mqtt timestamps.
+                    local_dt = datetime.fromtimestamp(local_dt.timestamp())
+                    self.end_time = local_dt
+                    LOGGER.debug(f"CLOUD END TIME2: {self.end_time}")
+        return cover_changed
 
 
 @dataclass
-class Info:
+class Info(ChangeTracker):
     """Return all device related content"""
+    __slots__ = (
+        '_client',
+        'serial',
+        'device_type',
+        'wifi_signal',
+        'hw_ver',
+        'sw_ver',
+        'online',
+        'new_version_state',
+        'mqtt_mode',
+        'nozzle_diameter',
+        'nozzle_type',
+        'usage_hours',
+    )
 
     # Device state
     serial: str
@@ -705,9 +1200,21 @@ class Info:
         self.nozzle_type = "unknown"
         self.usage_hours = client._usage_hours
 
+    REPORT_FIELDS = (
+        ("wifi_signal", "wifi_signal"),
+        ("nozzle_diameter", "nozzle_diameter"),
+        ("nozzle_type", "nozzle_type"),
+    )
+
     def set_online(self, online):
         if self.online != online:
-            self.online = online
+            device = self._client._device
+            with device._update_lock:
+                self.online = online
+                # Online state changes outside of a print report so publish and notify field subscribers straight away.
+                changes = {_field_path("info", name): old for name, old in self._take_changes().items()}
+                device._publish_snapshot(changes)
+            device._notify_subscribers(changes)
             if self._client.callback is not None:
                 self._client.callback("event_printer_data_update")
 
@@ -741,9 +1248,7 @@ class Info:
         if self._client.callback is not None:
             self._client.callback("event_printer_info_update")
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
-
+    def print_update(self, report: Report) -> dict:
         # Example payload:
         # {
         #     "print": {
@@ -763,7 +1268,10 @@ class Info:
         #         "layer_num": 0,
         #         "total_layer_num": 0,
 
-        self.wifi_signal = int(data.get("wifi_signal", str(self.wifi_signal)).replace("dBm", ""))
+        # "wifi_signal": "-53dBm",
+        # "nozzle_diameter": "0.4",
+        # "nozzle_type": "hardened_steel",
+        self._apply(report, self.REPORT_FIELDS)
 
         # Version data is provided differently for X1 and P1
         # P1P example:
@@ -815,22 +1323,20 @@ class Info:
         # and new versions provided for each component. While the X1 lists only the new version
         # in separate string properties.
 
-        self.new_version_state = data.get("upgrade_state", {}).get("new_version_state", self.new_version_state)
-
-        # "nozzle_diameter": "0.4",
-        # "nozzle_type": "hardened_steel",
-        self.nozzle_diameter = float(data.get("nozzle_diameter", self.nozzle_diameter))
-        self.nozzle_type = data.get("nozzle_type", self.nozzle_type)
+        upgrade_state = getattr(report, "upgrade_state", None)
+        if upgrade_state is not None:
+            self.new_version_state = getattr(upgrade_state, "new_version_state", self.new_version_state)
 
-        return (old_data != f"{self.__dict__}")
+        return self._take_changes()
 
     @property
     def has_bambu_cloud_connection(self) -> bool:
         return self._client.bambu_cloud.auth_token != ""
 
 @dataclass
-class AMSInstance:
+class AMSInstance(ChangeTracker):
     """Return all AMS instance related info"""
+    __slots__ = ('serial', 'sw_version', 'hw_version', 'humidity_index', 'temperature', 'tray')
     serial: str
     sw_version: str
     hw_version: str
@@ -852,8 +1358,9 @@ class AMSInstance:
 
 
 @dataclass
-class AMSList:
+class AMSList(ChangeTracker):
     """Return all AMS related info"""
+    __slots__ = ('_client', 'tray_now', 'data', '_first_initialization_done')
     tray_now: int
     data: list[AMSInstance]
 
@@ -863,9 +1370,10 @@ class AMSList:
         self.data = [None] * 4
         self._first_initialization_done = False
 
-    def info_update(self, data):
-        old_data = f"{self.__dict__}"
+    def __getitem__(self, index: int) -> AMSInstance:
+        return self.data[index]
 
+    def info_update(self, data):
         # First determine if this the version info data or the json payload data. We use the version info to determine
         # what devices to add to humidity_index assistant and add all the sensors as entities. And then then json payload data
         # to populate the values for all those entities.
@@ -907,30 +1415,24 @@ class AMSList:
                 if not module['sn'] == '':
                     # May get data before info so create entries if necessary
                     if self.data[index] is None:
+                        data_changed = True
                         self.data[index] = AMSInstance(self._client)
 
-                    if self.data[index].serial != module['sn']:
-                        data_changed = True
-                        self.data[index].serial = module['sn']
-                    if self.data[index].sw_version != module['sw_ver']:
-                        data_changed = True
-                        self.data[index].sw_version = module['sw_ver']
-                    if self.data[index].hw_version != module['hw_ver']:
+                    self.data[index].serial = module['sn']
+                    self.data[index].sw_version = module['sw_ver']
+                    self.data[index].hw_version = module['hw_ver']
+                    # Version changes are reported by the ams info event rather than the next print_update.
+                    if len(self.data[index]._take_changes()) != 0:
                         data_changed = True
-                        self.data[index].hw_version = module['hw_ver']
             elif not self._first_initialization_done:
                 self._first_initialization_done = True
                 data_changed = True
 
-        data_changed = data_changed or (old_data != f"{self.__dict__}")
-
         if data_changed:
             if self._client.callback is not None:
                 self._client.callback("event_ams_info_update")
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
-
+    def print_update(self, report: Report) -> dict:
         # AMS json payload is of the form:
         # "ams": {
         #     "ams": [
@@ -989,33 +1491,53 @@ class AMSList:
         #     "power_on_flag": false
         # },
 
-        ams_data = data.get("ams", [])
-        if len(ams_data) != 0:
-            self.tray_now = int(ams_data.get('tray_now', self.tray_now))
+        changes = {}
+        ams_data = getattr(report, "ams", None)
+        if ams_data is not None:
+            self.tray_now = getattr(ams_data, 'tray_now', self.tray_now)
 
-            ams_list = ams_data.get("ams", [])
-            for ams in ams_list:
-                index = int(ams['id'])
+            for ams in getattr(ams_data, "ams", []):
+                if not hasattr(ams, 'id'):
+                    continue
+                index = ams.id
                 # May get data before info so create entry if necessary
                 if self.data[index] is None:
                     self.data[index] = AMSInstance(self._client)
+                    changes[f"{index}"] = None
 
-                if self.data[index].humidity_index != int(ams['humidity']):
-                    self.data[index].humidity_index = int(ams['humidity'])
-                if self.data[index].temperature != float(ams['temp']):
-                    self.data[index].temperature = float(ams['temp'])
+                self.data[index].humidity_index = getattr(ams, 'humidity', self.data[index].humidity_index)
+                self.data[index].temperature = getattr(ams, 'temp', self.data[index].temperature)
+                for name, old in self.data[index]._take_changes().items():
+                    changes[f"{index}.{name}"] = old
 
-                tray_list = ams['tray']
-                for tray in tray_list:
-                    tray_id = int(tray['id'])
-                    self.data[index].tray[tray_id].print_update(tray)
+                for tray in getattr(ams, 'tray', []):
+                    if not hasattr(tray, 'id'):
+                        continue
+                    tray_id = tray.id
+                    for name, old in self.data[index].tray[tray_id].print_update(tray).items():
+                        changes[f"{index}.tray.{tray_id}.{name}"] = old
 
-        data_changed = (old_data != f"{self.__dict__}")
-        return data_changed
+        changes.update(self._take_changes())
+        return changes
 
 @dataclass
-class AMSTray:
+class AMSTray(ChangeTracker):
     """Return all AMS tray related info"""
+    __slots__ = (
+        '_client',
+        'empty',
+        'idx',
+        'name',
+        'type',
+        'sub_brands',
+        'color',
+        'nozzle_temp_min',
+        'nozzle_temp_max',
+        'remain',
+        'k',
+        'tag_uid',
+        'tray_uuid',
+    )
     empty: bool
     idx: int
     name: str
@@ -1045,10 +1567,21 @@ class AMSTray:
         self.tag_uid = ""
         self.tray_uuid = ""
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
-
-        if len(data) == 1:
+    REPORT_FIELDS = (
+        ("tray_info_idx", "idx"),
+        ("tray_type", "type"),
+        ("tray_sub_brands", "sub_brands"),
+        ("tray_color", "color"),
+        ("nozzle_temp_min", "nozzle_temp_min"),
+        ("nozzle_temp_max", "nozzle_temp_max"),
+        ("remain", "remain"),
+        ("tag_uid", "tag_uid"),
+        ("tray_uuid", "tray_uuid"),
+        ("k", "k"),
+    )
+
+    def print_update(self, tray: Report) -> dict:
+        if tray.key_count == 1:
             # If the data is exactly one entry then it's just the ID and the tray is empty.
             self.empty = True
             self.idx = ""
@@ -1064,30 +1597,22 @@ class AMSTray:
             self.k = 0
         else:
             self.empty = False
-            self.idx = data.get('tray_info_idx', self.idx)
+            self._apply(tray, self.REPORT_FIELDS)
             self.name = get_filament_name(self.idx, self._client.slicer_settings.custom_filaments)
-            self.type = data.get('tray_type', self.type)
-            self.sub_brands = data.get('tray_sub_brands', self.sub_brands)
-            self.color = data.get('tray_color', self.color)
-            self.nozzle_temp_min = data.get('nozzle_temp_min', self.nozzle_temp_min)
-            self.nozzle_temp_max = data.get('nozzle_temp_max', self.nozzle_temp_max)
-            self.remain = data.get('remain', self.remain)
-            self.tag_uid = data.get('tag_uid', self.tag_uid)
-            self.tray_uuid = data.get('tray_uuid', self.tray_uuid)
-            self.k = data.get('k', self.k)
-        
-        return (old_data != f"{self.__dict__}")
+
+        return self._take_changes()
 
 
 @dataclass
 class ExternalSpool(AMSTray):
     """Return the virtual tray related info"""
+    __slots__ = ()
 
     def __init__(self, client):
         super().__init__(client)
         self._client = client
 
-    def print_update(self, data) -> bool:
+    def print_update(self, report: Report) -> dict:
 
         # P1P virtual tray example
         # "vt_tray": {
@@ -1117,17 +1642,17 @@ class ExternalSpool(AMSTray):
         # This is exact same data as the AMS exposes so we can just defer to the AMSTray object
         # to parse this json.
 
-        received_virtual_tray_data = False
-        tray_data = data.get("vt_tray", {})
-        if len(tray_data) != 0:
-            received_virtual_tray_data = super().print_update(tray_data)
+        tray_data = getattr(report, "vt_tray", None)
+        if tray_data is not None and tray_data.key_count != 0:
+            return super().print_update(tray_data)
 
-        return received_virtual_tray_data
+        return {}
 
 
 @dataclass
-class Speed:
+class Speed(ChangeTracker):
     """Return speed profile information"""
+    __slots__ = ('_client', '_id', 'name', 'modifier')
     _id: int
     name: str
     modifier: int
@@ -1138,30 +1663,30 @@ class Speed:
         self.name = get_speed_name(2)
         self.modifier = 100
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
-
-        self._id = int(data.get("spd_lvl", self._id))
+    def print_update(self, report: Report) -> dict:
+        self._id = getattr(report, "spd_lvl", self._id)
         self.name = get_speed_name(self._id)
-        self.modifier = int(data.get("spd_mag", self.modifier))
-        
-        return (old_data != f"{self.__dict__}")
+        self.modifier = getattr(report, "spd_mag", self.modifier)
+
+        return self._take_changes()
 
     def SetSpeed(self, option: str):
         for id, speed in SPEED_PROFILE.items():
             if option == speed:
                 self._id = id
                 self.name = speed
-                command = SPEED_PROFILE_TEMPLATE
+                command = copy.deepcopy(SPEED_PROFILE_TEMPLATE)
                 command['print']['param'] = f"{id}"
                 self._client.publish(command)
+                self._client._device._publish_changes("speed")
                 if self._client.callback is not None:
                     self._client.callback("event_speed_update")
 
 
 @dataclass
-class StageAction:
+class StageAction(ChangeTracker):
     """Return Stage Action information"""
+    __slots__ = ('_id', '_print_type', 'description')
     _id: int
     _print_type: str
     description: str
@@ -1171,23 +1696,22 @@ class StageAction:
         self._print_type = ""
         self.description = get_current_stage(self._id)
 
-    def print_update(self, data) -> bool:
-        old_data = f"{self.__dict__}"
-
-        self._print_type = data.get("print_type", self._print_type)
+    def print_update(self, report: Report) -> dict:
+        self._print_type = getattr(report, "print_type", self._print_type)
         if self._print_type.lower() not in PRINT_TYPE_OPTIONS:
             self._print_type = "unknown"
-        self._id = int(data.get("stg_cur", self._id))
+        self._id = getattr(report, "stg_cur", self._id)
         if (self._print_type == "idle") and (self._id == 0):
             # On boot the printer reports stg_cur == 0 incorrectly instead of 255. Attempt to correct for this.
             self._id = 255
         self.description = get_current_stage(self._id)
 
-        return (old_data != f"{self.__dict__}")
+        return self._take_changes()
 
 @dataclass
-class HMSList:
+class HMSList(ChangeTracker):
     """Return all HMS related info"""
+    __slots__ = ('_client', '_count', '_errors')
     _count: int
     _errors: dict
 
@@ -1197,7 +1721,7 @@ class HMSList:
         self._errors = {}
         self._errors["Count"] = 0
         
-    def print_update(self, data) -> bool:
+    def print_update(self, report: Report) -> dict:
         # Example payload:
         # "hms": [
         #     {
@@ -1209,8 +1733,8 @@ class HMSList:
         # https://wiki.bambulab.com/en/x1/troubleshooting/hmscode/0300_0100_0001_0007
         # 'The heatbed temperature is abnormal; the sensor may have an open circuit.'
 
-        if 'hms' in data.keys():
-            hmsList = data.get('hms', [])
+        if hasattr(report, 'hms'):
+            hmsList = report.hms
             self._count = len(hmsList)
             errors = {}
             errors["Count"] = self._count
@@ -1218,8 +1742,8 @@ class HMSList:
             index: int = 0
             for hms in hmsList:
                 index = index + 1
-                attr = int(hms['attr'])
-                code = int(hms['code'])
+                attr = getattr(hms, 'attr', 0)
+                code = getattr(hms, 'code', 0)
                 hms_notif = HMSNotification(attr=attr, code=code)
                 errors[f"{index}-Error"] = f"HMS_{hms_notif.hms_code}: {get_HMS_error_text(hms_notif.hms_code)}"
                 errors[f"{index}-Wiki"] = hms_notif.wiki_url
@@ -1234,9 +1758,8 @@ class HMSList:
                     LOGGER.warning(f"HMS ERRORS: {errors}")
                 if self._client.callback is not None:
                     self._client.callback("event_hms_errors")
-                return True
-        
-        return False
+
+        return self._take_changes()
     
     @property
     def errors(self) -> dict:
@@ -1250,6 +1773,7 @@ class HMSList:
 @dataclass
 class PrintErrorList:
     """Return all print_error related info"""
+    __slots__ = ('_client', '_error', '_count')
     _error: dict
     _count: int
 
@@ -1258,16 +1782,16 @@ class PrintErrorList:
         self._count = 0
         self._client = client
         
-    def print_update(self, data) -> bool:
+    def print_update(self, report: Report) -> dict:
         # Example payload:
         # "print_error": 117473286 
         # So this is 07008006 which we make more human readable to 0700-8006
         # https://e.bambulab.com/query.php?lang=en
         # 'Unable to feed filament into the extruder. This could be due to entangled filament or a stuck spool. If not, please check if the AMS PTFE tube is connected.'
 
-        if 'print_error' in data.keys():
+        if hasattr(report, 'print_error'):
             errors = None
-            print_error_code = data.get('print_error')
+            print_error_code = report.print_error
             if print_error_code != 0:
                 hex_conversion = f'0{int(print_error_code):x}'
                 print_error_code_hex = hex_conversion[slice(0,4,1)] + "_" + hex_conversion[slice(4,8,1)]
@@ -1281,8 +1805,8 @@ class PrintErrorList:
                 if self._client.callback is not None:
                     self._client.callback("event_print_error")
 
-        # We send the error event directly so always return False for the general data event.
-        return False
+        # We send the error event directly so never report changes for the general data event.
+        return {}
     
     @property
     def error(self) -> dict:
@@ -1296,6 +1820,7 @@ class PrintErrorList:
 @dataclass
 class HMSNotification:
     """Return an HMS object and all associated details"""
+    __slots__ = ('attr', 'code')
     attr: int
     code: int
 
@@ -1327,19 +1852,57 @@ class HMSNotification:
 @dataclass
 class ChamberImage:
     """Returns the latest jpeg data from the P1P camera"""
+    __slots__ = ('_client', '_frame', '_image_last_updated', '_frame_listeners', '_detector')
     def __init__(self, client):
         self._client = client
-        self._bytes = bytearray()
+        # The latest frame and its version, replaced together so a reader never pairs one with the other's.
+        self._frame = (b"", 0)
         self._image_last_updated = datetime.now()
+        self._frame_listeners = FrameListeners("chamber image")
+        threshold = client._frame_change_threshold
+        self._detector = None if threshold is None else FrameChangeDetector(threshold)
 
-    def set_jpeg(self, bytes):
-        self._bytes = bytes
+    def set_jpeg(self, jpeg):
         self._image_last_updated = datetime.now()
+        if self._detector is None:
+            self._publish(jpeg)
+        else:
+            # A frame that shows nothing new only updates the time.
+            self._detector.check(jpeg, self._publish)
+
+    def _publish(self, jpeg):
+        # The frame is shared by every reader rather than copied for each, so a mutable buffer is only
+        # exposed read-only. The caller hands it over and must not write to it again.
+        jpeg = jpeg if isinstance(jpeg, bytes) else memoryview(jpeg).toreadonly()
+        self._frame = (jpeg, self._frame[1] + 1)
+        self._frame_listeners.notify(*self._frame)
         if self._client.callback is not None:
             self._client.callback("event_printer_chamber_image_update")
 
-    def get_jpeg(self) -> bytearray:
-        return self._bytes.copy()
+    def get_jpeg(self) -> bytes | memoryview:
+        """Return the latest frame. It is shared with the other readers and is read-only."""
+        return self._frame[0]
+
+    def get_frame(self) -> tuple:
+        """Return the latest frame together with its version"""
+        return self._frame
+
+    @property
+    def frame_change_detector(self) -> FrameChangeDetector | None:
+        """Return the detector that holds back unchanged frames, None if every frame is passed on"""
+        return self._detector
+
+    @property
+    def version(self) -> int:
+        """The number of frames passed on, so a reader can tell whether get_jpeg has a new frame"""
+        return self._frame[1]
+
+    def add_frame_listener(self, listener):
+        """Call listener(jpeg, version) with every new frame, on the camera or frame change worker thread.
+
+        Returns a function that removes the listener.
+        """
+        return self._frame_listeners.add(listener)
     
     def get_last_update_time(self) -> datetime:
         return self._image_last_updated
@@ -1351,28 +1914,76 @@ class ChamberImage:
 @dataclass
 class CoverImage:
     """Returns the cover image from the Bambu API"""
+    __slots__ = ('_client', '_bytes', '_image_last_updated', '_version', '_cache', '_digest', '_lock')
 
     def __init__(self, client):
         self._client = client
         self._bytes = bytearray()
         self._image_last_updated = datetime.now()
+        self._version = 0
+        self._cache = None
+        self._digest = None
+        # Set by the task data worker and read by the dashboards, so the image and its version change together.
+        self._lock = threading.Lock()
         if self._client.callback is not None:
             self._client.callback("event_printer_cover_image_update")
 
     def set_jpeg(self, bytes):
-        self._bytes = bytes
-        self._image_last_updated = datetime.now()
-    
+        with self._lock:
+            self._bytes = bytes
+            self._cache = None
+            self._digest = None
+            self._image_last_updated = datetime.now()
+            self._version += 1
+
+    def set_cached(self, cache, digest: str) -> bool:
+        """Show the image with this digest from a CoverCache, read when it is first asked for.
+
+        Returns False if the image is already shown.
+        """
+        with self._lock:
+            if digest == self._digest and cache is self._cache:
+                return False
+            self._cache = cache
+            self._digest = digest
+            self._bytes = None
+            self._image_last_updated = datetime.now()
+            self._version += 1
+            return True
+
+    @property
+    def digest(self) -> str | None:
+        """The content hash of the image when it comes from a CoverCache"""
+        return self._digest
+
+    @property
+    def version(self) -> int:
+        """The number of times the image was set, so a reader can tell whether get_jpeg has changed"""
+        return self._version
+
     def get_jpeg(self) -> bytearray:
-        return self._bytes
+        return self.get_frame()[0]
+
+    def get_frame(self) -> tuple:
+        """Return the image together with its version. May read the image from the CoverCache on disk."""
+        with self._lock:
+            if self._bytes is None and self._digest is not None:
+                data = self._cache.load(self._digest)
+                if data is None:
+                    # Not kept, so the next read finds the image once a task data update has stored it again.
+                    LOGGER.debug(f"Cover image {self._digest} was evicted from the cache.")
+                    return bytearray(), self._version
+                self._bytes = data
+            return self._bytes, self._version
 
     def get_last_update_time(self) -> datetime:
         return self._image_last_updated
 
 
 @dataclass
-class HomeFlag:
+class HomeFlag(ChangeTracker):
     """Contains parsed _values from the homeflag sensor"""
+    __slots__ = ('_client', '_value', '_sw_ver', '_device_type')
     _value: int
     _sw_ver: str
     _device_type: str 
@@ -1388,10 +1999,9 @@ class HomeFlag:
         self._device_type = get_printer_type(modules, self._device_type)
         self._sw_ver = get_sw_version(modules, self._sw_ver)
 
-    def print_update(self, data: dict) -> bool:
-        old_data = f"{self.__dict__}"
-        self._value = int(data.get("home_flag", str(self._value)))
-        return (old_data != f"{self.__dict__}")
+    def print_update(self, report: Report) -> dict:
+        self._value = getattr(report, "home_flag", self._value)
+        return self._take_changes()
 
     @property
     def door_open(self) -> bool or None:
@@ -1476,21 +2086,24 @@ class HomeFlag:
 
 
 class SlicerSettings:
-    custom_filaments: dict = field(default_factory=dict)
+    __slots__ = ('_client', 'custom_filaments')
+    custom_filaments: dict
 
     def __init__(self, client):
         self._client = client
         self.custom_filaments = {}
 
     def _load_custom_filaments(self, slicer_settings: dict):
+        custom_filaments = {}
         if 'private' in slicer_settings["filament"]:
             for filament in slicer_settings['filament']['private']:
                 name = filament["name"]
                 if " @" in name:
                     name = name[:name.index(" @")]
                 if filament.get("filament_id", "") != "":
-                    self.custom_filaments[filament["filament_id"]] = name
-            LOGGER.debug("Got custom filaments: %s", self.custom_filaments)
+                    custom_filaments[filament["filament_id"]] = name
+            LOGGER.debug("Got custom filaments: %s", custom_filaments)
+        self.custom_filaments = custom_filaments
 
     def update(self):
         self.custom_filaments = {}
@@ -1499,3 +2112,19 @@ class SlicerSettings:
             slicer_settings = self._client.bambu_cloud.get_slicer_settings()
             if slicer_settings is not None:
                 self._load_custom_filaments(slicer_settings)
+
+    async def update_async(self):
+        """Load the slicer settings without blocking the loop"""
+        if self._client.bambu_cloud.auth_token == "":
+            self.custom_filaments = {}
+            return
+        LOGGER.debug("Loading slicer settings")
+        try:
+            slicer_settings = await self._client.bambu_cloud.get_slicer_settings_async()
+        except Exception as e:
+            LOGGER.error("An exception occurred loading the slicer settings:", exc_info=e)
+            return
+        if slicer_settings is not None:
+            self._load_custom_filaments(slicer_settings)
+        else:
+            self.custom_filaments = {}
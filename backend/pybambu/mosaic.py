@@ -0,0 +1,197 @@
+"""One grid image of every chamber camera in the farm.
+
+Watching 40 printers used to mean 40 image streams per viewer. A MosaicCompositor tiles the newest frame of
+each printer into a single JPEG at a fixed refresh rate. The grid is kept in a worker process between
+refreshes and only the tiles whose frame changed are sent over, decoded, scaled and pasted in again, so
+an idle farm costs next to nothing and the event loop never decodes or encodes an image. The mosaic has
+the version, get_jpeg and add_frame_listener interface of ChamberImage, so MJPEGServer.add_mosaic serves
+it like a camera.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import math
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .camera import FrameListeners, Image, decode_scaled, pil_available
+from .const import LOGGER
+
+DEFAULT_TILE_SIZE = (320, 180)
+DEFAULT_FPS = 1.0
+DEFAULT_QUALITY = 70
+BACKGROUND = (0, 0, 0)
+
+# The grid of the worker process, kept between renders.
+_canvas = None
+_layout = None
+
+
+def render_mosaic(layout: tuple, tiles: list, quality: int) -> bytes:
+    """Paste the (index, jpeg) tiles into the grid and return it encoded. Runs in the worker process.
+
+    layout is (columns, rows, tile width, tile height). A different layout starts a new, empty grid.
+    A tile without a jpeg is cleared.
+    """
+    global _canvas, _layout
+    columns, rows, width, height = layout
+    if _canvas is None or _layout != layout:
+        _canvas = Image.new("RGB", (columns * width, rows * height), BACKGROUND)
+        _layout = layout
+    for index, data in tiles:
+        x = (index % columns) * width
+        y = (index // columns) * height
+        _canvas.paste(BACKGROUND, (x, y, x + width, y + height))
+        if data is None:
+            continue
+        try:
+            image = decode_scaled(data, (width, height))
+            image.thumbnail((width, height))
+        except Exception:
+            continue
+        _canvas.paste(image, (x + (width - image.width) // 2, y + (height - image.height) // 2))
+    output = io.BytesIO()
+    _canvas.save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
+
+class MosaicCompositor:
+    """Composes the chamber images of many clients into one grid image"""
+
+    def __init__(self, tile_size: tuple = DEFAULT_TILE_SIZE, columns: int | None = None,
+                 fps: float = DEFAULT_FPS, quality: int = DEFAULT_QUALITY):
+        if not pil_available:
+            raise ImportError("MosaicCompositor needs Pillow: pip install pillow")
+        self.tile_size = tuple(tile_size)
+        self.columns = columns
+        self.fps = fps
+        self.quality = quality
+        self._clients = []
+        # The chamber image version drawn in each tile, None when the tile needs drawing.
+        self._drawn = []
+        self._layout = None
+        # The number of tiles in the last mosaic.
+        self._count = 0
+        # Changes when clients are added or removed.
+        self._generation = 0
+        self._bytes = b""
+        self._version = 0
+        self._frame_listeners = FrameListeners("mosaic")
+        self._executor = None
+        self._task = None
+        self.tiles_drawn = 0
+
+    @property
+    def clients(self) -> list:
+        return list(self._clients)
+
+    @property
+    def version(self) -> int:
+        """The number of mosaics composed"""
+        return self._version
+
+    def get_jpeg(self) -> bytes:
+        """Return the latest mosaic"""
+        return self._bytes
+
+    def add_frame_listener(self, listener):
+        """Call listener(jpeg, version) with every new mosaic, on the loop. Returns a function that removes it."""
+        return self._frame_listeners.add(listener)
+
+    def add_client(self, client):
+        """Add a tile for this client's chamber camera"""
+        if getattr(client.get_device(), 'chamber_image', None) is None:
+            raise ValueError(f"Printer {client._serial} has no chamber camera image to show")
+        if not any(c is client for c in self._clients):
+            self._clients.append(client)
+            self._drawn.append(None)
+            self._generation += 1
+
+    def remove_client(self, client):
+        for index, c in enumerate(self._clients):
+            if c is client:
+                del self._clients[index]
+                # The tiles after it move, so every tile is drawn again.
+                self._drawn = [None] * len(self._clients)
+                self._generation += 1
+                return
+
+    def start(self):
+        """Start composing on the running loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def compose(self) -> bool:
+        """Redraw the tiles whose frame changed. Returns False if nothing changed."""
+        count = len(self._clients)
+        generation = self._generation
+        if count == 0:
+            return False
+        columns = self.columns or math.ceil(math.sqrt(count))
+        layout = (columns, math.ceil(count / columns)) + self.tile_size
+        if layout != self._layout:
+            self._drawn = [None] * count
+            vacated = ()
+        else:
+            # The worker keeps the grid, so the tiles of removed clients still show their last frame.
+            vacated = range(count, self._count)
+
+        tiles = [(index, None) for index in vacated]
+        versions = []
+        for index, client in enumerate(self._clients):
+            image = client.get_device().chamber_image
+            version = image.version
+            versions.append(version)
+            if version != self._drawn[index]:
+                jpeg = image.get_jpeg()
+                tiles.append((index, bytes(jpeg) if version != 0 and len(jpeg) != 0 else None))
+        if len(tiles) == 0:
+            return False
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1)
+        try:
+            jpeg = await asyncio.get_running_loop().run_in_executor(self._executor, render_mosaic, layout, tiles,
+                                                                    self.quality)
+        except BrokenProcessPool:
+            LOGGER.error("The mosaic worker process stopped. Starting a new one.")
+            self._executor = None
+            self._layout = None
+            self._drawn = [None] * len(self._clients)
+            return False
+        if generation != self._generation:
+            # A client was added or removed while the tiles were drawn.
+            return False
+        self._layout = layout
+        self._count = count
+        self._drawn = versions
+        self.tiles_drawn += len(tiles)
+        self._bytes = jpeg
+        self._version += 1
+        self._frame_listeners.notify(self._bytes, self._version)
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                await self.compose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOGGER.error("A mosaic exception occurred:", exc_info=e)
+            await asyncio.sleep(max(0, 1 / self.fps - (loop.time() - started)))
@@ -0,0 +1,221 @@
+"""Declarative schema of the mqtt "print" report.
+
+Each Schema maps the payload keys the models consume to the converter that validates and types the
+value. At import every schema is compiled into a slotted Report class and a generated extractor that
+converts a payload in a single pass. Keys that are not in the schema are ignored, and values
+that fail conversion are logged and left out of the report, so the models only ever see typed values
+and firmware differences in the payload are handled here.
+"""
+from __future__ import annotations
+
+from .const import LOGGER
+
+
+class Report:
+    """Typed values extracted from a payload. Keys absent from the payload are unset slots."""
+    __slots__ = ()
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def has(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def __repr__(self):
+        values = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__ if hasattr(self, key))
+        return f"{type(self).__name__}({values})"
+
+
+class Schema:
+    """A payload object: its keys mapped to converters, plus values derived from the whole object"""
+
+    def __init__(self, name: str, fields: dict, derived: dict = None):
+        self.name = name
+        self.fields = fields
+        self.derived = derived or {}
+        keys = tuple(fields) + tuple(self.derived)
+        for key in keys:
+            if not key.isidentifier():
+                raise ValueError(f"Schema {name} key '{key}' is not a valid attribute name")
+        self.report_class = type(name, (Report,), {"__slots__": keys, "__module__": __name__})
+        self.extract = self._compile()
+
+    def __call__(self, data) -> Report:
+        return self.extract(data)
+
+    def _compile(self):
+        """Generate the extractor source for this schema and compile it"""
+        report_class = self.report_class
+        namespace = {
+            "report_class": report_class,
+            "MISSING": object(),
+            "conversion_errors": (TypeError, ValueError, AttributeError, KeyError),
+            "skip": self._skip,
+        }
+        setters = {}
+        lines = []
+        for index, (key, convert) in enumerate(self.fields.items()):
+            # Slot descriptors set the values directly, bypassing attribute lookup on every message.
+            namespace[f"set_{index}"] = report_class.__dict__[key].__set__
+            namespace[f"convert_{index}"] = convert
+            setters[key] = (namespace[f"set_{index}"], convert)
+            lines += [
+                f"    value = get({key!r}, MISSING)",
+                f"    if value is not MISSING:",
+                f"        try:",
+                f"            set_{index}(report, convert_{index}(value))",
+                f"        except conversion_errors as e:",
+                f"            skip({key!r}, value, e)",
+            ]
+        for index, (key, derive) in enumerate(self.derived.items()):
+            namespace[f"set_derived_{index}"] = report_class.__dict__[key].__set__
+            namespace[f"derive_{index}"] = derive
+            lines.append(f"    set_derived_{index}(report, derive_{index}(data))")
+        namespace["get_setter"] = setters.get
+        namespace["field_count"] = len(self.fields)
+
+        # Small delta reports carry only a few of the schema keys so those walk the payload keys instead of
+        # looking up every schema key.
+        source = "\n".join([
+            "def extract(data):",
+            "    report = report_class()",
+            "    if len(data) < field_count:",
+            "        for key, value in data.items():",
+            "            entry = get_setter(key)",
+            "            if entry is not None:",
+            "                set_value, convert = entry",
+            "                try:",
+            "                    set_value(report, convert(value))",
+            "                except conversion_errors as e:",
+            "                    skip(key, value, e)",
+            "    else:",
+            "        get = data.get",
+            *["    " + line for line in lines if not line.startswith("    set_derived_")],
+            *[line for line in lines if line.startswith("    set_derived_")],
+            "    return report",
+        ])
+        exec(compile(source, f"<schema {self.name}>", "exec"), namespace)
+        return namespace["extract"]
+
+    def _skip(self, key: str, value, error: Exception):
+        LOGGER.debug(f"Skipping {self.name}.{key} value {value!r}: {error}")
+
+
+def list_of(schema: Schema):
+    """Converter for a list of objects described by schema"""
+    extract = schema.extract
+    return lambda value: [extract(item) for item in value]
+
+
+def rounded(value) -> int:
+    return round(float(value))
+
+
+def dbm(value) -> int:
+    # "-53dBm"
+    return int(str(value).replace("dBm", ""))
+
+
+def lights(value) -> dict:
+    # [{"node": "chamber_light", "mode": "on"}, {"node": "work_light", "mode": "flashing"}]
+    modes = {}
+    for light in value:
+        modes.setdefault(light.get("node", ""), light.get("mode"))
+    return modes
+
+
+TRAY = Schema("TrayReport", {
+    "id": int,
+    "tray_info_idx": str,
+    "tray_type": str,
+    "tray_sub_brands": str,
+    "tray_color": str,
+    "nozzle_temp_min": str,
+    "nozzle_temp_max": str,
+    "remain": int,
+    "tag_uid": str,
+    "tray_uuid": str,
+    "k": float,
+}, derived={
+    # A tray payload holding only its id is an empty slot.
+    "key_count": len,
+})
+
+AMS_UNIT = Schema("AMSUnitReport", {
+    "id": int,
+    "humidity": int,
+    "temp": float,
+    "tray": list_of(TRAY),
+})
+
+AMS = Schema("AMSReport", {
+    "tray_now": int,
+    "ams": list_of(AMS_UNIT),
+})
+
+IPCAM = Schema("IPCamReport", {
+    "ipcam_record": str,
+    "resolution": str,
+    "rtsp_url": str,
+    "timelapse": str,
+})
+
+UPGRADE_STATE = Schema("UpgradeStateReport", {
+    "new_version_state": int,
+})
+
+HMS = Schema("HMSReport", {
+    "attr": int,
+    "code": int,
+})
+
+PRINT = Schema("PrintReport", {
+    # Info
+    "wifi_signal": dbm,
+    "upgrade_state": UPGRADE_STATE,
+    "nozzle_diameter": float,
+    "nozzle_type": str,
+    # PrintJob
+    "mc_percent": int,
+    "gcode_state": str,
+    "gcode_file": str,
+    "print_type": str,
+    "subtask_name": str,
+    "layer_num": int,
+    "total_layer_num": int,
+    "gcode_start_time": int,
+    "mc_remaining_time": int,
+    "print_error": int,
+    # Temperature
+    "bed_temper": rounded,
+    "bed_target_temper": rounded,
+    "chamber_temper": rounded,
+    "nozzle_temper": rounded,
+    "nozzle_target_temper": rounded,
+    # Lights
+    "lights_report": lights,
+    # Fans
+    "big_fan1_speed": int,
+    "big_fan2_speed": int,
+    "cooling_fan_speed": int,
+    "heatbreak_fan_speed": int,
+    # Speed
+    "spd_lvl": int,
+    "spd_mag": int,
+    # StageAction
+    "stg_cur": int,
+    # AMSList / ExternalSpool
+    "ams": AMS,
+    "vt_tray": TRAY,
+    # HMSList
+    "hms": list_of(HMS),
+    # Camera
+    "ipcam": IPCAM,
+    # HomeFlag
+    "home_flag": int,
+})
+
+
+def parse_print_report(data: dict) -> Report:
+    """Convert a "print" report payload into its typed PrintReport"""
+    return PRINT.extract(data)
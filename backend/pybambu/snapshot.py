@@ -0,0 +1,80 @@
+"""Read-only copies of the state models for Device snapshots.
+
+freeze() copies a model into a subclass of its own class whose attributes cannot be set, so a
+snapshot keeps the public attributes, properties and isinstance() checks of the live model. Lists
+become tuples and dicts become read-only mappings. Snapshots that are already frozen are shared as
+they are, which is what lets a new Device snapshot reuse every member that did not change.
+"""
+from __future__ import annotations
+
+import types
+from datetime import date, datetime, time, timedelta
+
+_SNAPSHOT_CLASSES = {}
+_FROZEN_CLASSES = set()
+# Values of these types are shared between the model and its snapshots as they are.
+_IMMUTABLE = frozenset({type(None), bool, int, float, complex, str, bytes, date, datetime, time, timedelta,
+                        types.MappingProxyType})
+
+
+def _readonly(self, *args):
+    raise AttributeError(f"'{type(self).__name__}' is a read-only snapshot")
+
+
+def _slot_names(cls) -> tuple:
+    names = []
+    for klass in reversed(cls.__mro__):
+        for name in klass.__dict__.get('__slots__', ()):
+            if name not in names:
+                names.append(name)
+    return tuple(names)
+
+
+def snapshot_class(cls):
+    """Return the read-only subclass used to snapshot instances of cls"""
+    frozen = _SNAPSHOT_CLASSES.get(cls)
+    if frozen is None:
+        frozen = type(f"{cls.__name__}Snapshot", (cls,), {
+            "__slots__": (),
+            "__module__": __name__,
+            "__setattr__": _readonly,
+            "__delattr__": _readonly,
+        })
+        frozen._snapshot_slots = _slot_names(cls)
+        # The slot descriptors read and write the values directly, which is most of the cost of a copy.
+        frozen._snapshot_copy = tuple((name, getattr(cls, name).__get__, getattr(cls, name).__set__)
+                                      for name in frozen._snapshot_slots if name != '_changes')
+        _SNAPSHOT_CLASSES[cls] = frozen
+        _FROZEN_CLASSES.add(frozen)
+    return frozen
+
+
+def is_frozen(value) -> bool:
+    return type(value) in _FROZEN_CLASSES
+
+
+def freeze(value, **overrides):
+    """Return a read-only copy of value. Keyword arguments replace the frozen value of those attributes."""
+    value_type = type(value)
+    if value_type in _IMMUTABLE or value_type in _FROZEN_CLASSES:
+        return value
+    if value_type is list or value_type is tuple:
+        return tuple(freeze(item) for item in value)
+    if value_type is dict:
+        return types.MappingProxyType(dict(value))
+    if not hasattr(value_type, '__slots__'):
+        return value
+
+    frozen_class = _SNAPSHOT_CLASSES.get(value_type) or snapshot_class(value_type)
+    frozen = object.__new__(frozen_class)
+    for name, get, set in frozen_class._snapshot_copy:
+        if name in overrides:
+            set(frozen, overrides[name])
+            continue
+        try:
+            item = get(value)
+        except AttributeError:
+            continue
+        item_type = type(item)
+        set(frozen, item if item_type in _IMMUTABLE or item_type in _FROZEN_CLASSES else freeze(item))
+    return frozen
@@ -0,0 +1,275 @@
+"""Local SQLite mirror of an account's cloud print task history.
+
+The cloud task list is paged newest first, so usage reports over a month or a year used to download
+hundreds of tasks on every call. A TaskMirror keeps the tasks in a SQLite database. sync() fetches only
+the pages with tasks newer than the newest one mirrored, and backfill() fetches older pages when a report
+needs to reach further back than the mirror does. Queries then run locally, on indexes by device, start
+time, status and filament type.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import datetime
+
+from dateutil import parser
+
+from . import codec
+from .const import LOGGER
+
+PAGE_SIZE = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    device_id TEXT,
+    status INTEGER,
+    start_time REAL,
+    end_time REAL,
+    weight REAL,
+    length REAL,
+    cost_time INTEGER,
+    title TEXT,
+    data BLOB
+);
+CREATE INDEX IF NOT EXISTS tasks_device ON tasks (device_id, start_time);
+CREATE INDEX IF NOT EXISTS tasks_start ON tasks (start_time);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, start_time);
+CREATE TABLE IF NOT EXISTS task_filaments (
+    task_id INTEGER,
+    ams INTEGER,
+    filament_type TEXT,
+    filament_id TEXT,
+    color TEXT,
+    weight REAL
+);
+CREATE INDEX IF NOT EXISTS task_filaments_task ON task_filaments (task_id);
+CREATE INDEX IF NOT EXISTS task_filaments_type ON task_filaments (filament_type, task_id);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+GROUPS = {
+    "device_id": ("tasks.device_id", "tasks"),
+    "status": ("tasks.status", "tasks"),
+    # A task can use the same filament type from several slots, which count as one.
+    "filament_type": ("filaments.filament_type",
+                      "(SELECT task_id, filament_type, SUM(weight) AS weight FROM task_filaments "
+                      "GROUP BY task_id, filament_type) AS filaments JOIN tasks ON tasks.id = filaments.task_id"),
+}
+
+
+def _timestamp(value) -> float | None:
+    """Return seconds since the epoch of a datetime, an ISO time string from the cloud, or a number"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return parser.isoparse(value).timestamp()
+    return float(value)
+
+
+class TaskMirror:
+    """Print tasks of a cloud account, mirrored into a SQLite database"""
+
+    def __init__(self, cloud, path: str = ":memory:", page_size: int = PAGE_SIZE):
+        self._cloud = cloud
+        self.path = path
+        self.page_size = page_size
+        # Syncs run on a worker thread and queries anywhere, one at a time.
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(SCHEMA)
+        self.requests = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    @property
+    def complete(self) -> bool:
+        """Whether the whole history has been backfilled"""
+        return bool(self._get_state("complete", False))
+
+    @property
+    def oldest(self) -> datetime | None:
+        """Start time of the oldest mirrored task"""
+        with self._lock:
+            value = self._db.execute("SELECT MIN(start_time) FROM tasks").fetchone()[0]
+        return None if value is None else datetime.fromtimestamp(value)
+
+    def sync(self) -> int:
+        """Fetch the tasks newer than the mirrored ones and return how many were added.
+
+        Paging stops at the first page that holds a mirrored task. That page is stored again, which
+        updates the tasks that were still running when it was last fetched. An empty mirror only gets
+        the first page; older ones are left to backfill().
+        """
+        with self._lock:
+            before = len(self)
+        pages = []
+        offset = 0
+        while True:
+            hits = self._fetch(offset)
+            pages.append(hits)
+            # Task ids aren't assumed to grow with time, so a mirrored task is looked up by id.
+            if before == 0 or len(hits) < self.page_size or len(self._known(hits)) != 0:
+                complete = len(hits) < self.page_size
+                break
+            offset += len(hits)
+        # Stored together so a failed request in between never leaves a gap in the mirror.
+        with self._lock, self._db:
+            for hits in pages:
+                self._store(hits)
+            if before == 0 and complete:
+                self._set_state("complete", True)
+            return len(self) - before
+
+    def backfill(self, until: datetime | None = None, pages: int | None = None) -> int:
+        """Fetch older pages until the mirror reaches back before `until`, or all of them, at most `pages` pages.
+
+        Returns how many tasks were added. The mirror must be up to date, so call sync() first.
+        """
+        until = _timestamp(until)
+        added = 0
+        fetched = 0
+        offset = None
+        synced = False
+        while not self.complete and (pages is None or fetched < pages):
+            with self._lock:
+                count, oldest = self._db.execute("SELECT COUNT(*), MIN(start_time) FROM tasks").fetchone()
+            if until is not None and oldest is not None and oldest <= until:
+                break
+            if offset is None:
+                # The mirror holds the newest tasks without gaps, so the older ones start around its size.
+                # Starting one early overlaps the mirror.
+                offset = max(0, count - 1)
+            hits = self._fetch(offset)
+            fetched += 1
+            known = self._known(hits)
+            # A page must start with a mirrored task, or the tasks between the mirror and the page would be
+            # skipped. The first page only has to reach the mirror, unless it holds the whole history.
+            if offset != 0:
+                overlaps = len(hits) != 0 and hits[0]['id'] in known
+            else:
+                overlaps = count == 0 or len(known) != 0 or len(hits) < self.page_size
+            if not overlaps:
+                if offset != 0:
+                    # Tasks deleted from the cloud moved the older ones up.
+                    LOGGER.debug("Task history pages shifted. Stepping back to overlap the mirror.")
+                    offset = max(0, offset - max(1, self.page_size - 1))
+                    continue
+                if synced:
+                    LOGGER.debug("The task history keeps changing. Stopping the backfill.")
+                    break
+                # New tasks fill the whole first page.
+                LOGGER.debug("The task history has new tasks. Syncing before backfilling further.")
+                self.sync()
+                synced = True
+                offset = None
+                continue
+            with self._lock, self._db:
+                self._store(hits)
+                if len(hits) < self.page_size:
+                    self._set_state("complete", True)
+                new = len(self) - count
+            added += new
+            if new != 0:
+                synced = False
+            # New tasks move the pages the other way, which only means more of the mirror is fetched again.
+            offset += max(1, len(hits) - 1)
+        return added
+
+    def tasks(self, device_id: str | None = None, since=None, until=None, status: int | None = None,
+              filament_type: str | None = None, limit: int | None = None) -> list:
+        """Return the mirrored tasks that match, as the cloud returned them, newest first"""
+        where, args = self._filter(device_id, since, until, status)
+        if filament_type is not None:
+            where.append("id IN (SELECT task_id FROM task_filaments WHERE filament_type = ?)")
+            args.append(filament_type)
+        query = "SELECT data FROM tasks"
+        if len(where) != 0:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY start_time DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, args).fetchall()
+        return [codec.loads(row[0]) for row in rows]
+
+    def usage(self, group_by: str = "device_id", device_id: str | None = None, since=None, until=None,
+              status: int | None = None) -> dict:
+        """Return the prints, filament weight and length and print time, totalled by device, status or filament type.
+
+        Grouped by filament type, the weight is the weight of that filament and the length and print time
+        are those of the tasks that used it.
+        """
+        column, source = GROUPS[group_by]
+        where, args = self._filter(device_id, since, until, status, "tasks.")
+        weight = "filaments.weight" if group_by == "filament_type" else "tasks.weight"
+        query = (f"SELECT {column}, COUNT(tasks.id), SUM({weight}), SUM(tasks.length), SUM(tasks.cost_time) "
+                 f"FROM {source}")
+        if len(where) != 0:
+            query += " WHERE " + " AND ".join(where)
+        query += f" GROUP BY {column}"
+        with self._lock:
+            rows = self._db.execute(query, args).fetchall()
+        return {key: {"prints": prints, "weight": weight or 0, "length": length or 0, "print_time": cost_time or 0}
+                for key, prints, weight, length, cost_time in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _fetch(self, offset: int) -> list:
+        self.requests += 1
+        data = self._cloud.get_tasklist(offset, self.page_size)
+        if data is None:
+            raise ValueError("The cloud task list request was blocked")
+        return data.get('hits', [])
+
+    def _known(self, hits: list) -> set:
+        """Return the ids of the tasks in hits that are mirrored"""
+        ids = [task['id'] for task in hits]
+        with self._lock:
+            return {row[0] for row in self._db.execute(
+                f"SELECT id FROM tasks WHERE id IN ({', '.join('?' * len(ids))})", ids)}
+
+    def _store(self, hits: list):
+        for task in hits:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tasks (id, device_id, status, start_time, end_time, weight, length, cost_time, "
+                "title, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (task['id'], task.get('deviceId'), task.get('status'), _timestamp(task.get('startTime')),
+                 _timestamp(task.get('endTime')), task.get('weight', 0), task.get('length', 0),
+                 task.get('costTime', 0), task.get('title'), codec.dumps(task)))
+            self._db.execute("DELETE FROM task_filaments WHERE task_id = ?", (task['id'],))
+            self._db.executemany(
+                "INSERT INTO task_filaments (task_id, ams, filament_type, filament_id, color, weight) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(task['id'], ams.get('ams'), ams.get('filamentType'), ams.get('filamentId'), ams.get('sourceColor'),
+                  ams.get('weight', 0)) for ams in task.get('amsDetailMapping') or ()])
+
+    def _filter(self, device_id, since, until, status, prefix: str = "") -> tuple:
+        where = []
+        args = []
+        for value, condition in ((device_id, "device_id = ?"), (_timestamp(since), "start_time >= ?"),
+                                 (_timestamp(until), "start_time < ?"), (status, "status = ?")):
+            if value is not None:
+                where.append(prefix + condition)
+                args.append(value)
+        return where, args
+
+    def _get_state(self, key: str, default=None):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set_state(self, key: str, value):
+        self._db.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
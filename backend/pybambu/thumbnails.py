@@ -0,0 +1,184 @@
+"""Downscaled copies of the chamber and cover images for views that show many printers at once.
+
+A grid of printer tiles doesn't need full size frames. A ThumbnailCache renders JPEG or WebP variants of
+the latest chamber or cover image at the configured sizes in a process pool, so the decoding and encoding
+never holds up the event loop. Each variant is rendered once per image version: concurrent requests for
+the same one share the render, and the result is kept in an LRU cache under a byte budget. A variant is
+dropped as soon as a newer image of the same printer has been rendered at that size.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from .camera import decode_scaled, pil_available
+from .const import LOGGER
+
+DEFAULT_SIZES = ((320, 240), (640, 480))
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_QUALITY = 75
+FORMATS = {"jpeg": "JPEG", "webp": "WEBP"}
+SOURCES = ("chamber", "cover")
+
+
+def render_thumbnail(data: bytes, size: tuple, format: str, quality: int) -> bytes:
+    """Return the image scaled down to fit within size, encoded as format. Runs in a worker process."""
+    image = decode_scaled(data, size)
+    image.thumbnail(size)
+    output = io.BytesIO()
+    image.save(output, format=FORMATS[format], quality=quality)
+    return output.getvalue()
+
+
+class ThumbnailCache:
+    """Renders and caches downscaled variants of the chamber and cover images of many printers"""
+
+    def __init__(self, sizes: tuple = DEFAULT_SIZES, format: str = "jpeg", quality: int = DEFAULT_QUALITY,
+                 max_bytes: int = DEFAULT_MAX_BYTES, executor=None):
+        if not pil_available:
+            raise ImportError("ThumbnailCache needs Pillow: pip install pillow")
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported thumbnail format '{format}'")
+        self.sizes = tuple(tuple(size) for size in sizes)
+        self.format = format
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self._executor = executor
+        self._own_executor = executor is None
+        # (serial, source, version, size, format) -> encoded variant, least recently used first.
+        self._variants = OrderedDict()
+        self._bytes = 0
+        # (serial, source, size, format) -> the key of the newest version rendered.
+        self._latest = {}
+        self._rendering = {}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._variants)
+
+    def get(self, client, size: tuple | None = None, source: str = "chamber", format: str | None = None) -> bytes | None:
+        """Return the variant of the current image if it has been rendered already"""
+        key = self._key(client, size, source, format)
+        if key is None:
+            return None
+        return self._lookup(key)
+
+    async def thumbnail(self, client, size: tuple | None = None, source: str = "chamber",
+                        format: str | None = None) -> bytes | None:
+        """Return the current image of the client scaled down to size, one of the configured sizes.
+
+        Returns None when there is no image yet.
+        """
+        key = self._key(client, size, source, format)
+        if key is None:
+            return None
+        variant = self._lookup(key)
+        if variant is None and key not in self._rendering:
+            image = self._image(client, source)
+            if source == "cover":
+                # A cover evicted from memory is read back from its CoverCache on disk.
+                data, version = await asyncio.get_running_loop().run_in_executor(None, image.get_frame)
+            else:
+                data, version = image.get_frame()
+            if version == 0 or not data:
+                return None
+            # Keyed by the version read with the bytes, which is newer if an image arrived since the lookup.
+            key = key[:2] + (version,) + key[3:]
+            variant = self._lookup(key)
+        if variant is not None:
+            self.hits += 1
+            return variant
+
+        future = self._rendering.get(key)
+        if future is None:
+            self.misses += 1
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), render_thumbnail, bytes(data), key[3], key[4],
+                                          self.quality)
+            self._rendering[key] = future
+            try:
+                variant = await future
+            except Exception as e:
+                LOGGER.error(f"Unable to render a {source} thumbnail for {key[0]}: {e}")
+                return None
+            finally:
+                del self._rendering[key]
+            self._store(key, variant)
+            return variant
+        else:
+            self.hits += 1
+            try:
+                # Shielded so a caller giving up doesn't cancel the render the others are waiting for.
+                return await asyncio.shield(future)
+            except Exception:
+                return None
+
+    def clear(self):
+        self._variants.clear()
+        self._latest.clear()
+        self._bytes = 0
+
+    def close(self):
+        """Drop every variant and shut down the worker processes this cache started"""
+        self.clear()
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=min(2, os.cpu_count() or 1))
+        return self._executor
+
+    @staticmethod
+    def _image(client, source: str):
+        device = client.get_device()
+        return getattr(device, 'chamber_image' if source == "chamber" else 'cover_image', None)
+
+    def _key(self, client, size: tuple | None, source: str, format: str | None) -> tuple | None:
+        if source not in SOURCES:
+            raise ValueError(f"Unknown image source '{source}'")
+        size = self.sizes[0] if size is None else tuple(size)
+        if size not in self.sizes:
+            raise ValueError(f"Thumbnail size {size} is not one of {self.sizes}")
+        format = format or self.format
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported thumbnail format '{format}'")
+        image = self._image(client, source)
+        if image is None or image.version == 0:
+            return None
+        return client._serial, source, image.version, size, format
+
+    def _lookup(self, key: tuple) -> bytes | None:
+        variant = self._variants.get(key)
+        if variant is not None:
+            self._variants.move_to_end(key)
+        return variant
+
+    def _store(self, key: tuple, variant: bytes):
+        group = key[:2] + key[3:]
+        latest = self._latest.get(group)
+        if latest is not None:
+            if latest[2] >= key[2]:
+                return
+            # The older version won't be asked for again.
+            stale = self._variants.pop(latest, None)
+            if stale is not None:
+                self._bytes -= len(stale)
+        self._latest[group] = key
+        self._variants[key] = variant
+        self._bytes += len(variant)
+        while self._bytes > self.max_bytes and len(self._variants) > 1:
+            evicted_key, evicted = self._variants.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._latest.pop(evicted_key[:2] + evicted_key[3:], None)
+            self.evicted += 1
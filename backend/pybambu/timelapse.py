@@ -0,0 +1,247 @@
+"""Timelapses of P1/A1 prints built from the chamber camera frames the client already receives.
+
+Only X1 printers record timelapses themselves. A TimelapseRecorder starts a new video when a print starts,
+adds a frame on every layer change or at a fixed interval, and closes the video when the print ends. The
+frames are JPEGs already, so they are written as they are into an MJPEG AVI file. Nothing but the index
+entries is kept per frame, and those are spilled to a temporary file, so memory use stays the same however
+long the print runs.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from .const import LOGGER
+
+# AVI 1.0 readers handle files up to 1 GiB reliably. Longer recordings continue in a new part.
+MAX_FILE_SIZE = 2 ** 30
+DEFAULT_FPS = 30
+AVIF_HASINDEX = 0x10
+AVIIF_KEYFRAME = 0x10
+
+_IDLE_STATES = ("IDLE", "FAILED", "FINISH", "unknown")
+_END_EVENTS = ("event_print_finished", "event_print_failed", "event_print_canceled")
+
+
+def get_jpeg_size(jpeg) -> tuple | None:
+    """Return the (width, height) in the start of frame segment of a JPEG"""
+    data = memoryview(jpeg)
+    offset = 2
+    while offset + 9 < len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker in (0xC0, 0xC1, 0xC2):
+            height, width = struct.unpack_from(">HH", data, offset + 5)
+            return width, height
+        offset += 2 + struct.unpack_from(">H", data, offset + 2)[0]
+    return None
+
+
+class AVIWriter:
+    """Writes JPEG frames to an MJPEG AVI file as they arrive"""
+
+    def __init__(self, path: str, width: int, height: int, fps: float = DEFAULT_FPS):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frames = 0
+        self._largest = 0
+        self._file = open(path, "wb")
+        # 16 bytes per frame for idx1, which has to follow the frames.
+        self._index = tempfile.TemporaryFile()
+        self._write_headers()
+
+    @property
+    def size(self) -> int:
+        """Return the size of the file once closed"""
+        return self._file.tell() + self._index.tell() + 8
+
+    @property
+    def full(self) -> bool:
+        return self.size >= MAX_FILE_SIZE
+
+    def write(self, jpeg):
+        size = len(jpeg)
+        offset = self._file.tell() - self._movi_offset
+        self._file.write(b"00dc" + struct.pack("<I", size))
+        self._file.write(jpeg)
+        if size % 2 != 0:
+            self._file.write(b"\0")
+        self._index.write(b"00dc" + struct.pack("<III", AVIIF_KEYFRAME, offset, size))
+        self.frames += 1
+        self._largest = max(self._largest, size)
+
+    def close(self):
+        """Write the index and the final sizes and close the file"""
+        if self._file.closed:
+            return
+        movi_end = self._file.tell()
+        self._file.write(b"idx1" + struct.pack("<I", self._index.tell()))
+        self._index.seek(0)
+        shutil.copyfileobj(self._index, self._file)
+        self._index.close()
+        end = self._file.tell()
+
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", end - 8))
+        self._file.seek(self._movi_offset - 4)
+        self._file.write(struct.pack("<I", movi_end - self._movi_offset))
+        for offset in (self._total_frames_offset, self._length_offset):
+            self._file.seek(offset)
+            self._file.write(struct.pack("<I", self.frames))
+        for offset in (self._avih_buffer_offset, self._strh_buffer_offset):
+            self._file.seek(offset)
+            self._file.write(struct.pack("<I", self._largest))
+        self._file.close()
+
+    def _write_headers(self):
+        rate = int(round(self.fps * 1000))
+        avih = struct.pack("<14I", int(1e6 / self.fps), 0, 0, AVIF_HASINDEX, 0, 0, 1, 0,
+                           self.width, self.height, 0, 0, 0, 0)
+        strh = (b"vidsMJPG" + struct.pack("<IHHIIIIIIII4h", 0, 0, 0, 0, 1000, rate, 0, 0, 0, 0xFFFFFFFF, 0,
+                                          0, 0, self.width, self.height))
+        strf = struct.pack("<IiiHH4sIiiII", 40, self.width, self.height, 1, 24, b"MJPG",
+                           self.width * self.height * 3, 0, 0, 0, 0)
+        strl = b"strl" + _chunk(b"strh", strh) + _chunk(b"strf", strf)
+        hdrl = b"hdrl" + _chunk(b"avih", avih) + _chunk(b"LIST", strl)
+        header = b"RIFF\0\0\0\0AVI " + _chunk(b"LIST", hdrl) + b"LIST\0\0\0\0movi"
+        # Where the sizes and counts that are only known at the end go.
+        avih_start = 12 + 12 + 8
+        strh_start = avih_start + len(avih) + 12 + 8
+        self._total_frames_offset = avih_start + 16
+        self._avih_buffer_offset = avih_start + 28
+        self._length_offset = strh_start + 32
+        self._strh_buffer_offset = strh_start + 36
+        self._file.write(header)
+        # idx1 offsets count from the movi fourcc.
+        self._movi_offset = self._file.tell() - 4
+
+
+def _chunk(fourcc: bytes, data: bytes) -> bytes:
+    return fourcc + struct.pack("<I", len(data)) + data + (b"\0" if len(data) % 2 != 0 else b"")
+
+
+class TimelapseRecorder:
+    """Records a timelapse of every print from a client's chamber camera.
+
+    A frame is added on every layer change, or every interval seconds when an interval is given. The
+    videos are written to directory, named after the printer and the time the print started.
+    """
+
+    def __init__(self, client, directory: str, interval: float | None = None, fps: float = DEFAULT_FPS):
+        device = client.get_device()
+        chamber_image = getattr(device, 'chamber_image', None)
+        if chamber_image is None:
+            raise ValueError(f"Printer {client._serial} has no chamber camera image to record")
+        self._client = client
+        self.directory = directory
+        self.interval = interval
+        self.fps = fps
+        self.videos = []
+        self._writer = None
+        self._name = None
+        self._part = 0
+        self._pending = False
+        self._last_sample = 0
+        self._lock = threading.Lock()
+        self._remove_frame_listener = chamber_image.add_frame_listener(self._on_frame)
+        self._remove_event_listener = client.add_event_listener(self._on_event)
+        self._unsubscribe = device.subscribe("print_job.current_layer", self._on_layer)
+        if device.print_job.gcode_state not in _IDLE_STATES:
+            self.start()
+
+    @property
+    def recording(self) -> bool:
+        return self._name is not None
+
+    def start(self):
+        """Start a new timelapse, finishing the current one first"""
+        with self._lock:
+            self._finish()
+            os.makedirs(self.directory, exist_ok=True)
+            self._name = f"{self._client._serial}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            self._part = 0
+            # The first frame of a print is always taken.
+            self._pending = True
+            self._last_sample = 0
+        LOGGER.debug(f"Timelapse {self._name} started.")
+
+    def stop(self):
+        """Finish the current timelapse"""
+        with self._lock:
+            self._finish()
+
+    def close(self):
+        """Finish the current timelapse and stop recording"""
+        self._remove_frame_listener()
+        self._remove_event_listener()
+        self._unsubscribe()
+        self.stop()
+
+    def _on_event(self, event: str):
+        if event == "event_print_started":
+            self.start()
+        elif event in _END_EVENTS:
+            self.stop()
+
+    def _on_layer(self, path: str, old, new):
+        # Taken so a frame being written on the camera thread can't clear the flag after this sets it.
+        with self._lock:
+            self._pending = True
+
+    def _on_frame(self, jpeg, version: int):
+        if self._name is None:
+            return
+        now = time.monotonic()
+        if self.interval is not None:
+            if now - self._last_sample < self.interval:
+                return
+        elif not self._pending:
+            return
+
+        with self._lock:
+            if self._name is None:
+                return
+            self._pending = False
+            self._last_sample = now
+            try:
+                if self._writer is not None and self._writer.full:
+                    self._close_writer()
+                if self._writer is None:
+                    self._open_writer(jpeg)
+                if self._writer is not None:
+                    self._writer.write(jpeg)
+            except OSError as e:
+                LOGGER.error(f"Unable to write the timelapse {self._name}: {e}")
+                self._finish()
+
+    def _open_writer(self, jpeg):
+        size = get_jpeg_size(jpeg)
+        if size is None:
+            LOGGER.debug("Skipping a timelapse frame without a JPEG frame header.")
+            return
+        self._part += 1
+        name = self._name if self._part == 1 else f"{self._name}-{self._part}"
+        self._writer = AVIWriter(os.path.join(self.directory, f"{name}.avi"), size[0], size[1], self.fps)
+
+    def _close_writer(self):
+        writer, self._writer = self._writer, None
+        try:
+            writer.close()
+        except OSError as e:
+            LOGGER.error(f"Unable to finish the timelapse {writer.path}: {e}")
+            return
+        LOGGER.info(f"Wrote a timelapse of {writer.frames} frames to {writer.path}")
+        self.videos.append(writer.path)
+
+    def _finish(self):
+        if self._writer is not None:
+            self._close_writer()
+        self._name = None
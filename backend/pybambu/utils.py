@@ -1,3 +1,4 @@
+import copy
 import math
 from datetime import datetime, timedelta
 
@@ -45,7 +46,7 @@ def fan_percentage_to_gcode(fan: FansEnum, percentage: int):
 
     percentage = round(percentage / 10) * 10
     speed = math.ceil(255 * percentage / 100)
-    command = SEND_GCODE_TEMPLATE
+    command = copy.deepcopy(SEND_GCODE_TEMPLATE)
     command['print']['param'] = f"M106 {fanString} S{speed}\n"
     return command
 
@@ -57,7 +58,7 @@ def set_temperature_to_gcode(temp: TempEnum, temperature: int):
     elif temp == TempEnum.HEATBED:
         tempCommand = "M140"
 
-    command = SEND_GCODE_TEMPLATE
+    command = copy.deepcopy(SEND_GCODE_TEMPLATE)
     command['print']['param'] = f"{tempCommand} S{temperature}\n"
     return command
 
@@ -0,0 +1,19 @@
+import pytest
+
+from pybambu.bambu_client import BambuClient
+
+CLIENT_CONFIG = {'device_type': 'P1S', 'serial': 'serial', 'host': 'host', 'access_code': 'code'}
+
+
+@pytest.fixture
+def make_client():
+    """Return a function that builds a P1S client, with the given config values in place of the defaults"""
+    def make(**config) -> BambuClient:
+        return BambuClient({**CLIENT_CONFIG, **config})
+
+    return make
+
+
+@pytest.fixture
+def client(make_client) -> BambuClient:
+    return make_client()
@@ -0,0 +1,81 @@
+import pytest
+
+from benchmarks.standins import fake_jpeg, frame_header
+from pybambu.camera import MAX_PAYLOAD_SIZE, FrameAssembler, get_jpeg_error
+
+
+class ChunkedSocket:
+    """Returns a byte stream from recv_into in pieces of at most the given sizes, then 0 at the end"""
+
+    def __init__(self, data: bytes, sizes: list):
+        self.data = memoryview(data)
+        self.sizes = sizes
+        self.offset = 0
+        self.reads = 0
+
+    def recv_into(self, buffer) -> int:
+        size = min(len(buffer), self.sizes[self.reads % len(self.sizes)], len(self.data) - self.offset)
+        buffer[:size] = self.data[self.offset:self.offset + size]
+        self.offset += size
+        self.reads += 1
+        return size
+
+
+def assemble(sock: ChunkedSocket) -> tuple:
+    assembler = FrameAssembler()
+    frames = []
+    while assembler.receive(sock) != 0:
+        frame = assembler.take_frame()
+        if frame is not None:
+            frames.append(frame)
+    return assembler, frames
+
+
+@pytest.mark.parametrize("sizes", [[1], [3, 7], [5, 4096], [100000]])
+def test_frames_split_across_reads(sizes):
+    jpegs = [fake_jpeg(size, seed) for seed, size in enumerate((50, 1000, 17))]
+    sock = ChunkedSocket(b"".join(frame_header(len(jpeg)) + jpeg for jpeg in jpegs), sizes)
+    assembler, frames = assemble(sock)
+    assert [bytes(frame) for frame in frames] == jpegs
+    assert assembler.headers_received == 3
+    assert assembler.buffered == 0
+    assert all(get_jpeg_error(frame) is None for frame in frames)
+
+
+def test_reads_stop_at_the_end_of_each_frame():
+    first, second = fake_jpeg(40, 1), fake_jpeg(60, 2)
+    sock = ChunkedSocket(frame_header(len(first)) + first + frame_header(len(second)) + second, [1000])
+    assembler = FrameAssembler()
+    # The header, then the frame, are each read whole without reading into what follows.
+    assert assembler.receive(sock) == 16
+    assert assembler.take_frame() is None
+    assert assembler.receive(sock) == len(first)
+    frame = assembler.take_frame()
+    assert bytes(frame) == first
+    assert assembler.receive(sock) == 16
+    assert assembler.buffered == 0
+
+
+def test_frames_are_shared_read_only():
+    jpeg = fake_jpeg(100)
+    _, frames = assemble(ChunkedSocket(frame_header(len(jpeg)) + jpeg + frame_header(len(jpeg)) + jpeg, [33]))
+    assert frames[0].readonly
+    with pytest.raises(TypeError):
+        frames[0][0] = 0
+    # Each frame has its own buffer, so a new frame never overwrites one already handed out.
+    assert frames[0].obj is not frames[1].obj
+    assert bytes(frames[0]) == jpeg
+
+
+def test_partial_frame_at_the_end_of_the_stream():
+    jpeg = fake_jpeg(100)
+    assembler, frames = assemble(ChunkedSocket(frame_header(len(jpeg)) + jpeg[:60], [25]))
+    assert frames == []
+    assert assembler.headers_received == 1
+    assert assembler.buffered == 60
+
+
+def test_oversized_payload_is_rejected():
+    assembler = FrameAssembler()
+    with pytest.raises(ValueError):
+        assembler.receive(ChunkedSocket(frame_header(MAX_PAYLOAD_SIZE + 1), [16]))
@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+from benchmarks.standins import FakeCamera, make_server_ssl_context
+from pybambu import camera_hub
+from pybambu.camera import MAX_CONNECT_ATTEMPTS
+from pybambu.camera_hub import MAX_RETRY_DELAY, CameraHub, CameraStream
+
+# Loopback addresses of their own, so the camera stand-ins can listen on the printer's port 6000.
+CAMERA_HOST = "127.0.13.1"
+CLOSED_HOST = "127.0.13.2"
+
+
+class RecordingHub:
+    """Records what a CameraStream asks of its hub instead of running it"""
+
+    def __init__(self):
+        self.calls = []
+        self.delays = []
+
+    def _call(self, function):
+        self.calls.append(function)
+
+    def _schedule(self, delay: float, function):
+        self.delays.append(delay)
+
+
+def test_connects_authenticates_and_streams(make_client):
+    async def run():
+        camera = FakeCamera("code", interval=0.02, frame_size=1000)
+        server = await camera.start(make_server_ssl_context(), host=CAMERA_HOST)
+        client = make_client(host=CAMERA_HOST)
+        hub = CameraHub()
+        stream = hub.create_camera(client)
+        stream.start()
+        try:
+            await _wait_for(lambda: client.get_device().chamber_image.version >= 2)
+            assert stream.state == "streaming"
+            stats = client.camera_stats
+            assert (stats.connect_attempts, stats.connections, stats.auth_rejections) == (1, 1, 0)
+            assert stats.connect_time.count == stats.handshake_time.count == stats.auth_time.count == 1
+            assert stream._attempts == 0
+        finally:
+            stream.stop()
+            await asyncio.get_running_loop().run_in_executor(None, hub.stop)
+            server.close()
+        assert stream.state is None
+
+    asyncio.run(run())
+
+
+def test_rejected_access_code_is_retried_later(monkeypatch, make_client):
+    monkeypatch.setattr(camera_hub, "REJECTED_RETRY_DELAY", 0.2)
+
+    async def run():
+        camera = FakeCamera("code", interval=0.02, frame_size=1000)
+        server = await camera.start(make_server_ssl_context(), host=CAMERA_HOST)
+        client = make_client(host=CAMERA_HOST, access_code="wrong")
+        hub = CameraHub()
+        stream = hub.create_camera(client)
+        stream.start()
+        try:
+            await _wait_for(lambda: client.camera_stats.auth_rejections == 2)
+            assert client.camera_stats.frames == 0
+            assert client.camera_stats.connect_attempts >= 2
+        finally:
+            stream.stop()
+            await asyncio.get_running_loop().run_in_executor(None, hub.stop)
+            server.close()
+
+    asyncio.run(run())
+
+
+def test_refused_connection_is_retried(monkeypatch, make_client):
+    monkeypatch.setattr(camera_hub, "RETRY_DELAY", 0.01)
+    client = make_client(host=CLOSED_HOST)
+    hub = CameraHub()
+    stream = hub.create_camera(client)
+    stream.start()
+    try:
+        deadline = time.monotonic() + 10
+        while client.camera_stats.connect_failures < 3:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert client.camera_stats.connections == 0
+    finally:
+        stream.stop()
+        hub.stop()
+
+
+def test_retry_delays_back_off(client):
+    hub = RecordingHub()
+    stream = CameraStream(hub, client)
+    for attempts in range(1, MAX_CONNECT_ATTEMPTS):
+        stream._attempts = attempts
+        stream._retry()
+    expected = [min(MAX_RETRY_DELAY, 2 ** (attempts - 1)) for attempts in range(1, MAX_CONNECT_ATTEMPTS)]
+    assert all(0.9 * full <= delay <= full for delay, full in zip(hub.delays, expected))
+    assert hub.delays[-1] >= 0.9 * MAX_RETRY_DELAY
+
+    # The rejected delay is a minimum, the backoff still applies above it.
+    hub.delays.clear()
+    stream._attempts = 1
+    stream._retry(5)
+    assert hub.delays == [5]
+
+
+def test_start_after_giving_up_gets_every_attempt_again(client):
+    hub = RecordingHub()
+    stream = CameraStream(hub, client)
+    stream._attempts = MAX_CONNECT_ATTEMPTS
+    stream._retry()
+    assert hub.delays == []
+    assert stream._closed.is_set()
+
+    stream.start()
+    assert stream._attempts == 0
+    assert hub.calls == [stream._connect]
+
+
+def test_replaced_stream_is_stopped(make_client):
+    client = make_client(host=CLOSED_HOST)
+    hub = CameraHub()
+    try:
+        first = hub.create_camera(client)
+        first.start()
+        second = hub.create_camera(client)
+        assert first._stopped.is_set()
+        assert hub.streams == [second]
+        first.join()
+        assert first._sock is None
+    finally:
+        hub.stop()
+
+
+def test_removed_client_is_forgotten(make_client):
+    client = make_client(host=CLOSED_HOST)
+    hub = CameraHub()
+    hub.add_client(client)
+    try:
+        client._camera = stream = hub.create_camera(client)
+        stream.start()
+        hub.remove_client(client)
+        assert stream._stopped.is_set()
+        assert hub.streams == []
+        assert hub.camera_stats()["printers"] == {}
+        assert client._camera_hub is None
+    finally:
+        hub.stop()
+
+
+async def _wait_for(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
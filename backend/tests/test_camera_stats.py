@@ -0,0 +1,111 @@
+import types
+
+import pytest
+
+from pybambu import camera_stats
+from pybambu.camera_stats import RATE_WINDOW, TIME_BUCKETS, CameraStats, Histogram, aggregate_camera_stats
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=100.0)
+    monkeypatch.setattr(camera_stats, "time", types.SimpleNamespace(monotonic=lambda: clock.now,
+                                                                    time=lambda: clock.now))
+    return clock
+
+
+def test_bounds_are_the_top_of_their_bucket():
+    histogram = Histogram()
+    for value in (0.001, 0.0015, 60, 61):
+        histogram.observe(value)
+    assert histogram.counts[0] == 1
+    assert histogram.counts[1] == 1
+    assert histogram.counts[len(TIME_BUCKETS) - 1] == 1
+    # Above the largest bound.
+    assert histogram.counts[-1] == 1
+    assert (histogram.count, histogram.min, histogram.max) == (4, 0.001, 61)
+
+
+def test_percentiles_are_bucket_bounds():
+    histogram = Histogram()
+    assert histogram.percentile(0.5) is None
+    for value in [0.0008] * 5 + [0.3] * 4 + [100]:
+        histogram.observe(value)
+    assert histogram.percentile(0.5) == 0.001
+    assert histogram.percentile(0.9) == 0.5
+    # Past the largest bound the maximum is the best there is.
+    assert histogram.percentile(0.99) == 100
+    summary = histogram.as_dict()
+    assert (summary["p50"], summary["p90"], summary["p99"]) == (0.001, 0.5, 100)
+    assert summary["buckets"]["0.001"] == 5 and summary["buckets"]["inf"] == 1
+
+
+def test_merge_adds_counts_and_keeps_the_extremes():
+    first, second = Histogram(), Histogram()
+    first.observe(0.01)
+    second.observe(0.002)
+    second.observe(5)
+    first.merge(second)
+    assert (first.count, first.min, first.max) == (3, 0.002, 5)
+    assert first.sum == pytest.approx(5.012)
+
+
+def test_rates_count_the_whole_seconds_of_the_window(clock):
+    stats = CameraStats()
+
+    def frames(at: float, count: int):
+        clock.now = at
+        for _ in range(count):
+            stats.frame(1000)
+
+    frames(100.5, 1)
+    frames(101.2, 2)
+    frames(105.0, 2)
+    # The current second is still filling up.
+    clock.now = 105.5
+    assert stats.frames_per_second == 3 / (RATE_WINDOW - 1)
+    assert stats.bytes_per_second == 3000 / (RATE_WINDOW - 1)
+    clock.now = 110.5
+    assert stats.frames_per_second == 4 / (RATE_WINDOW - 1)
+    # Second 110 takes over the slot of second 100.
+    frames(110.2, 1)
+    clock.now = 111.5
+    assert stats.frames_per_second == 3 / (RATE_WINDOW - 1)
+    assert stats.frame_interval.count == 5
+
+
+def connect(stats: CameraStats):
+    stats.connect_started()
+    stats.tcp_connected()
+    stats.auth_sent()
+    stats.stream_started()
+
+
+def test_farm_total_adds_up_the_printers(make_client, clock):
+    steady, flaky = make_client(serial="steady"), make_client(serial="flaky")
+    connect(steady.camera_stats)
+    steady.camera_stats.frame(2000)
+    connect(flaky.camera_stats)
+    flaky.camera_stats.closed()
+    connect(flaky.camera_stats)
+    flaky.camera_stats.closed()
+    flaky.camera_stats.connect_started()
+    flaky.camera_stats.failed("Host is unreachable")
+
+    stats = aggregate_camera_stats([steady, flaky])
+    printers = stats["printers"]
+    assert (printers["steady"]["reconnects"], printers["flaky"]["reconnects"]) == (0, 1)
+    assert printers["flaky"]["last_error"] == "Host is unreachable"
+    total = stats["total"]
+    assert (total["connections"], total["reconnects"], total["disconnects"]) == (3, 1, 2)
+    assert (total["connect_attempts"], total["connect_failures"], total["frames"]) == (4, 1, 1)
+    assert total["connect_time"]["count"] == 3
+    assert (total["cameras"], total["connected_cameras"]) == (2, 1)
+    assert "last_error" not in total
+
+
+def test_every_printer_connecting_once_is_no_reconnect(make_client):
+    clients = [make_client(serial=f"printer{index}") for index in range(10)]
+    for client in clients:
+        connect(client.camera_stats)
+    assert aggregate_camera_stats(clients)["total"]["reconnects"] == 0
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("curl_cffi")
+
+from benchmarks.bench_cloud import point_at, serve_cloud
+from benchmarks.standins import FakeCloud
+from pybambu import bambu_cloud
+from pybambu.bambu_cloud import BambuCloud
+from pybambu.const import BAMBU_URL
+
+
+@pytest.fixture
+def fake_cloud():
+    server = FakeCloud(devices=3, tasks=50)
+    ready = threading.Event()
+    threading.Thread(target=serve_cloud, args=(server, ready), daemon=True).start()
+    assert ready.wait(30)
+    urls = dict(BAMBU_URL)
+    options = dict(bambu_cloud.SESSION_OPTIONS)
+    point_at(server.port)
+    yield server
+    bambu_cloud.close_session()
+    BAMBU_URL.update(urls)
+    bambu_cloud.SESSION_OPTIONS.clear()
+    bambu_cloud.SESSION_OPTIONS.update(options)
+
+
+def test_session_reuses_one_connection(fake_cloud):
+    cloud = BambuCloud("", "", "", "token")
+    assert len(cloud.get_device_list()) == 3
+    page = cloud.get_tasklist()
+    assert len(page['hits']) == 20
+    assert cloud.download(page['hits'][0]['cover'])
+    assert fake_cloud.requests == 3
+    assert fake_cloud.connections == 1
+
+
+def test_task_list_paging(fake_cloud):
+    cloud = BambuCloud("", "", "", "token")
+    first = cloud.get_tasklist(0, 30)
+    second = cloud.get_tasklist(30, 30)
+    assert first['total'] == 50
+    ids = [task['id'] for task in first['hits'] + second['hits']]
+    assert ids == [task['id'] for task in fake_cloud.tasks]
+
+
+def test_async_session(fake_cloud):
+    cloud = BambuCloud("", "", "", "token")
+
+    async def run():
+        try:
+            devices, page = await asyncio.gather(cloud.get_device_list_async(), cloud.get_tasklist_async(10, 5))
+            cover = await cloud.download_async(page['hits'][0]['cover'])
+            settings = await cloud.get_slicer_settings_async()
+            return devices, page, cover, settings
+        finally:
+            await bambu_cloud.close_async_session()
+
+    devices, page, cover, settings = asyncio.run(run())
+    assert len(devices) == 3
+    assert [task['id'] for task in page['hits']] == [task['id'] for task in fake_cloud.tasks[10:15]]
+    assert cover
+    assert settings is not None
+
+
+def test_errors_raise(fake_cloud):
+    cloud = BambuCloud("", "", "", "token")
+    BAMBU_URL[bambu_cloud.BambuUrl.TASKS] = fake_cloud.url("/missing")
+    with pytest.raises(ValueError):
+        cloud.get_tasklist()
@@ -0,0 +1,21 @@
+import itertools
+
+from pybambu import cover_cache
+from pybambu.cover_cache import CoverCache
+
+
+def test_loaded_images_are_evicted_last(tmp_path, monkeypatch):
+    clock = itertools.count(1000)
+    monkeypatch.setattr(cover_cache.time, "time", lambda: next(clock))
+    cache = CoverCache(str(tmp_path), max_bytes=10)
+    shown = cache.put("https://example.invalid/a.png", b"aaaa")
+    other = cache.put("https://example.invalid/b.png", b"bbbb")
+    # The first cover is read by digest, as CoverImage does, and stays on screen.
+    assert cache.load(shown) == b"aaaa"
+
+    newest = cache.put("https://example.invalid/c.png", b"cccc")
+    assert cache.load(other) is None
+    assert cache.load(shown) == b"aaaa"
+    assert cache.load(newest) == b"cccc"
+    assert cache.bytes_used == 8
+    cache.close()
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from concurrent.futures import Executor
+
+import pytest
+
+from pybambu.delivery import EventDelivery
+
+
+class ManualExecutor(Executor):
+    """Holds the submitted drains until the test runs them"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        self.submitted.append((function, args))
+
+    def run(self):
+        submitted, self.submitted = self.submitted, []
+        for function, args in submitted:
+            function(*args)
+
+
+def recorder(seen: list, name: str):
+    return lambda event: seen.append((name, event))
+
+
+def test_repeated_events_are_coalesced_and_moved_back():
+    executor = ManualExecutor()
+    delivery = EventDelivery(executor=executor)
+    seen = []
+    delivery.put("A", "event_printer_data_update", recorder(seen, "first"))
+    delivery.put("A", "event_light_update", recorder(seen, "first"))
+    delivery.put("B", "event_printer_data_update", recorder(seen, "first"))
+    # The client reconnected with a new callback.
+    delivery.put("A", "event_printer_data_update", recorder(seen, "second"))
+    assert delivery.pending == 3
+    assert len(executor.submitted) == 1
+
+    executor.run()
+    assert seen == [("first", "event_light_update"), ("first", "event_printer_data_update"),
+                    ("second", "event_printer_data_update")]
+    assert delivery.stats() == {"pending": 0, "queued": 3, "delivered": 3, "coalesced": 1, "dropped": 0, "failed": 0}
+
+
+def test_full_queue_drops_the_oldest_event():
+    executor = ManualExecutor()
+    delivery = EventDelivery(executor=executor, max_pending=3)
+    seen = []
+    for index in range(5):
+        delivery.put(index, "event_printer_data_update", recorder(seen, index))
+    assert delivery.pending == 3
+
+    executor.run()
+    assert [name for name, _ in seen] == [2, 3, 4]
+    stats = delivery.stats()
+    assert (stats["queued"], stats["delivered"], stats["dropped"]) == (5, 3, 2)
+
+
+def test_failed_and_closed_deliveries_are_counted():
+    executor = ManualExecutor()
+    delivery = EventDelivery(executor=executor)
+    seen = []
+
+    def fail(event):
+        raise RuntimeError("consumer failed")
+
+    delivery.put("A", "event_printer_data_update", fail)
+    delivery.put("B", "event_printer_data_update", recorder(seen, "B"))
+    delivery.close()
+    delivery.put("C", "event_printer_data_update", recorder(seen, "C"))
+
+    executor.run()
+    assert seen == [("B", "event_printer_data_update")]
+    stats = delivery.stats()
+    assert (stats["delivered"], stats["failed"], stats["dropped"]) == (1, 1, 1)
+
+
+def test_events_from_another_thread_are_delivered_on_the_loop():
+    async def run():
+        loop = asyncio.get_running_loop()
+        delivery = EventDelivery(loop=loop)
+        seen = []
+        done = asyncio.Event()
+
+        async def consumer(event):
+            seen.append((event, threading.current_thread() is threading.main_thread()))
+            if len(seen) == 2:
+                done.set()
+
+        callback = delivery.wrap(consumer, "serial")
+        thread = threading.Thread(target=lambda: [callback("event_printer_data_update"), callback("event_light_update")])
+        thread.start()
+        thread.join()
+        await asyncio.wait_for(done.wait(), 5)
+        return seen
+
+    assert asyncio.run(run()) == [("event_printer_data_update", True), ("event_light_update", True)]
+
+
+def test_loop_and_executor_are_exclusive():
+    loop = asyncio.new_event_loop()
+    with pytest.raises(ValueError):
+        EventDelivery(loop=loop, executor=ManualExecutor())
+    loop.close()
+    with pytest.raises(ValueError):
+        EventDelivery(max_pending=0)
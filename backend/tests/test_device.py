@@ -0,0 +1,132 @@
+import pytest
+
+from pybambu.commands import SEND_GCODE_TEMPLATE, SPEED_PROFILE_TEMPLATE
+from pybambu.const import SPEED_PROFILE, FansEnum
+
+
+@pytest.fixture
+def device(client):
+    client.publish = lambda payload: True
+    return client._device
+
+
+def test_commands_publish_snapshot_and_notify(device):
+    seen = []
+    device.subscribe("lights.chamber_light", lambda *args: seen.append(args))
+    device.subscribe("speed.name", lambda *args: seen.append(args))
+    device.subscribe("fans._cooling_fan_speed", lambda *args: seen.append(args))
+
+    device.lights.TurnChamberLightOn()
+    device.speed.SetSpeed(SPEED_PROFILE[3])
+    device.fans.set_fan_speed(FansEnum.PART_COOLING, 50)
+
+    assert seen == [("lights.chamber_light", "unknown", "on"), ("speed.name", "standard", SPEED_PROFILE[3]),
+                    ("fans._cooling_fan_speed", 0, 50)]
+    snapshot = device.snapshot()
+    assert snapshot.version == 3
+    assert snapshot.lights.chamber_light == "on"
+    assert snapshot.speed.name == SPEED_PROFILE[3]
+
+
+def test_command_changes_are_not_reported_again(device):
+    device.lights.TurnChamberLightOn()
+    changed = device.print_update({"command": "push_status", "msg": 1,
+                                   "lights_report": [{"node": "chamber_light", "mode": "on"}]})
+    assert "lights.chamber_light" not in changed
+    assert device.lights.chamber_light_override == ""
+
+
+def test_chamber_light_override_expires_on_any_report(device):
+    device.lights.TurnChamberLightOff()
+    device.print_update({"command": "push_status", "msg": 1, "nozzle_temper": 20})
+    assert device.lights.chamber_light_override == ""
+
+
+def test_commands_leave_the_templates_unchanged(client):
+    published = []
+    client.publish = published.append
+    device = client._device
+    device.speed.SetSpeed(SPEED_PROFILE[4])
+    device.speed.SetSpeed(SPEED_PROFILE[1])
+    device.fans.set_fan_speed(FansEnum.PART_COOLING, 50)
+    assert [command['print']['param'] for command in published[:2]] == ["4", "1"]
+    assert SPEED_PROFILE_TEMPLATE['print']['param'] == ""
+    assert SEND_GCODE_TEMPLATE['print']['param'] == ""
+
+
+def test_disabling_the_camera_publishes_the_cleared_rtsp_url(client):
+    device = client._device
+    device.print_update({"command": "push_status", "msg": 1,
+                         "ipcam": {"rtsp_url": "rtsps://host/streaming/live/1", "timelapse": "disable"}})
+    version = device.version
+
+    client.set_camera_enabled(False)
+
+    snapshot = device.snapshot()
+    assert snapshot.version == version + 1
+    assert snapshot.camera.rtsp_url is None
+    assert snapshot.changed_fields == frozenset({"camera.rtsp_url"})
+    changed = device.print_update({"command": "push_status", "msg": 1,
+                                   "ipcam": {"rtsp_url": "rtsps://host/streaming/live/1", "timelapse": "disable"}})
+    assert changed == frozenset()
+
+
+def ams_report(remains: list) -> dict:
+    trays = [{"id": str(index), "remain": remain, "tray_type": "PLA"} for index, remain in enumerate(remains)]
+    return {"command": "push_status", "msg": 1,
+            "ams": {"ams": [{"id": "0", "humidity": "4", "temp": "20.1", "tray": trays}], "tray_now": "255"}}
+
+
+def test_subscribers_are_called_with_their_changed_fields(device):
+    exact, matched, other = [], [], []
+    device.subscribe("temperature.nozzle_temp", lambda *args: exact.append(args))
+    unsubscribe = device.subscribe("ams.*.tray.*.remain", lambda *args: matched.append(args))
+    device.subscribe("temperature.bed_temp", lambda *args: other.append(args))
+
+    device.print_update({"command": "push_status", "msg": 1, "nozzle_temper": 20.4, **ams_report([50, 80])})
+    assert exact == [("temperature.nozzle_temp", 0, 20)]
+    assert sorted(matched) == [("ams.0.tray.0.remain", 0, 50), ("ams.0.tray.1.remain", 0, 80)]
+
+    # Only the fields the report changed are notified.
+    exact.clear()
+    matched.clear()
+    device.print_update({"command": "push_status", "msg": 1, "nozzle_temper": 20, **ams_report([50, 70])})
+    assert exact == []
+    assert matched == [("ams.0.tray.1.remain", 80, 70)]
+    assert other == []
+
+    unsubscribe()
+    device.print_update(ams_report([40, 70]))
+    assert matched == [("ams.0.tray.1.remain", 80, 70)]
+
+
+def test_glob_segments_match_one_segment(device):
+    seen = []
+    device.subscribe("ams.*.remain", lambda path, old, new: seen.append(path))
+    device.subscribe("ams.0.tray.*", lambda path, old, new: seen.append(path))
+    device.print_update(ams_report([50]))
+    assert seen == []
+
+
+def test_failing_subscriber_does_not_stop_the_others(device):
+    seen = []
+
+    def fail(*args):
+        raise RuntimeError("subscriber failed")
+
+    device.subscribe("temperature.nozzle_temp", fail)
+    device.subscribe("temperature.nozzle_temp", lambda *args: seen.append(args))
+    device.print_update({"command": "push_status", "msg": 1, "nozzle_temper": 30})
+    assert seen == [("temperature.nozzle_temp", 0, 30)]
+
+
+def test_repeated_chamber_frames_are_only_held_back_when_asked(make_client):
+    for config, versions in (({}, 2), ({'frame_change_threshold': 0}, 1)):
+        client = make_client(**config)
+        events = []
+        client.callback = events.append
+        chamber_image = client.get_device().chamber_image
+        chamber_image.set_jpeg(b"frame")
+        chamber_image.set_jpeg(b"frame")
+        assert chamber_image.version == versions
+        assert events.count("event_printer_chamber_image_update") == versions
@@ -0,0 +1,107 @@
+import asyncio
+import socket
+import threading
+import time
+
+from benchmarks.standins import FakeBroker, make_server_ssl_context
+from pybambu.farm import FarmManager
+
+
+def test_socket_closed_off_the_loop_is_unregistered_before_the_callback_returns():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    manager = FarmManager(loop=loop)
+    first, second = socket.socketpair()
+    try:
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(5)
+        loop.call_soon_threadsafe(manager._add_socket, None, first)
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(5)
+        assert first in manager._sockets
+
+        # As paho does while connecting on an executor thread: the callback, then the close.
+        manager._on_socket_close(None, None, first)
+        assert first not in manager._sockets
+        assert asyncio.run_coroutine_threadsafe(_registered(first), loop).result(5) is False
+        first.close()
+        # Unregistering an already closed socket does nothing.
+        loop.call_soon_threadsafe(manager._remove_socket, first)
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(5)
+    finally:
+        second.close()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+async def _registered(sock) -> bool:
+    loop = asyncio.get_running_loop()
+    try:
+        return loop._selector.get_key(sock) is not None
+    except KeyError:
+        return False
+
+
+class RecordingCamera:
+    """Stands in for a CameraStream and records how the client stopped it"""
+
+    def __init__(self):
+        self.stopped = False
+        self.joined = False
+
+    def stop(self):
+        self.stopped = True
+
+    def join(self, timeout: float = 5):
+        self.joined = True
+
+
+def test_connect_and_reconnect_to_a_broker(make_client):
+    async def run():
+        broker = FakeBroker(interval=0.05)
+        server = await broker.start(make_server_ssl_context(), port=0)
+        manager = FarmManager()
+        client = make_client(host='127.0.0.1', local_mqtt=True, enable_camera=False)
+        create_mqtt_client = client._create_mqtt_client
+
+        async def create_local_mqtt_client(callback):
+            await create_mqtt_client(callback)
+            client._port = broker.port
+
+        client._create_mqtt_client = create_local_mqtt_client
+        events = []
+        manager.add_client(client)
+        try:
+            await client.connect(events.append)
+            mqttc = client.client
+            await _wait_for(lambda: client.connected and "event_printer_data_update" in events)
+            # The connect ran on an executor thread and the socket it opened is serviced by the loop.
+            assert manager._sockets == {mqttc.socket()}
+
+            camera = client._camera = RecordingCamera()
+            broker.drop_connections()
+            await _wait_for(lambda: not client.connected)
+            dropped = time.monotonic()
+            # The loop stopped the camera without waiting for it.
+            assert camera.stopped and not camera.joined
+            assert manager._sockets == set()
+
+            events.clear()
+            await _wait_for(lambda: client.connected and "event_printer_data_update" in events)
+            assert time.monotonic() - dropped >= 0.9
+            assert broker.connections == 2
+            assert client.client is mqttc
+            assert manager._sockets == {mqttc.socket()}
+        finally:
+            await manager.stop()
+            server.close()
+        assert manager._sockets == set()
+
+    asyncio.run(run())
+
+
+async def _wait_for(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
@@ -0,0 +1,74 @@
+from pybambu.frame_buffer import FrameBuffer
+
+
+def frame(index: int, size: int = 100) -> bytes:
+    return bytes([index % 256]) * size
+
+
+def test_wraps_and_evicts_the_oldest_frames():
+    buffer = FrameBuffer(max_bytes=1000)
+    for index in range(25):
+        assert buffer.append(frame(index), timestamp=index)
+    # Ten frames fit, and each new frame overwrites the oldest in place.
+    assert len(buffer) <= 10
+    assert buffer.bytes_used == len(buffer) * 100
+    assert buffer.newest == 24
+    frames = buffer.frames()
+    assert [timestamp for timestamp, _ in frames] == list(range(25 - len(buffer), 25))
+    assert all(jpeg == frame(int(timestamp)) for timestamp, jpeg in frames)
+
+
+def test_wrap_drops_the_frames_at_the_end_of_the_ring():
+    buffer = FrameBuffer(max_bytes=1000)
+    for index in range(3):
+        buffer.append(frame(index, 300), timestamp=index)
+    # 900 bytes are used and 400 don't fit at the end, so the frame wraps over the first one.
+    buffer.append(frame(3, 400), timestamp=3)
+    assert [timestamp for timestamp, _ in buffer.frames()] == [2, 3]
+    assert buffer.frame_at(3) == (3, frame(3, 400))
+    assert buffer.frame_at(2) == (2, frame(2, 300))
+    assert buffer.frame_at(1.5) is None
+
+
+def test_frame_and_time_limits():
+    buffer = FrameBuffer(max_bytes=10000, max_frames=3)
+    for index in range(5):
+        buffer.append(frame(index), timestamp=index)
+    assert [timestamp for timestamp, _ in buffer.frames()] == [2, 3, 4]
+
+    buffer = FrameBuffer(max_bytes=10000, max_seconds=2)
+    for index in range(5):
+        buffer.append(frame(index), timestamp=index)
+    assert buffer.oldest == 2
+
+
+def test_lookup_by_time():
+    buffer = FrameBuffer(max_bytes=10000)
+    for index in range(5):
+        buffer.append(frame(index), timestamp=index * 10)
+    assert buffer.frame_at(25) == (20, frame(2))
+    assert [timestamp for timestamp, _ in buffer.frames(10, 30)] == [10, 20, 30]
+    # A timestamp older than the newest frame is moved up so the frames stay in order.
+    buffer.append(frame(5), timestamp=5)
+    assert buffer.newest == 40
+    assert buffer.frame_at(40) == (40, frame(5))
+
+
+def test_rejects_frames_larger_than_the_buffer():
+    buffer = FrameBuffer(max_bytes=100)
+    assert not buffer.append(frame(0, 101))
+    assert not buffer.append(b"")
+    assert buffer.dropped == 2
+    assert len(buffer) == 0
+
+
+def test_evicts_many_frames(tmp_path):
+    buffer = FrameBuffer(max_bytes=5000, path=str(tmp_path / "frames"))
+    for index in range(3000):
+        buffer.append(frame(index, 10 + index % 7), timestamp=index)
+    assert buffer.bytes_used <= 5000
+    assert buffer.newest == 2999
+    frames = buffer.frames()
+    assert len(frames) == len(buffer)
+    assert all(jpeg == frame(int(timestamp), 10 + int(timestamp) % 7) for timestamp, jpeg in frames)
+    buffer.close()
@@ -0,0 +1,56 @@
+import asyncio
+
+from benchmarks.standins import FakeCamera, fake_jpeg, make_server_ssl_context
+from pybambu.camera_hub import CameraHub
+from pybambu.mjpeg import BOUNDARY, MJPEGServer
+
+# A loopback address of its own, so the camera stand-in can listen on the printer's port 6000.
+CAMERA_HOST = "127.0.14.1"
+FRAME_SIZE = 2000
+
+
+def test_viewer_receives_the_camera_frames(make_client):
+    async def run():
+        camera = FakeCamera("code", interval=0.02, frame_size=FRAME_SIZE)
+        camera_server = await camera.start(make_server_ssl_context(), host=CAMERA_HOST)
+        client = make_client(host=CAMERA_HOST)
+        hub = CameraHub()
+        stream = hub.create_camera(client)
+        stream.start()
+        server = MJPEGServer(port=0)
+        server.add_client(client)
+        await server.start()
+        try:
+            assert server.host == "127.0.0.1"
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(b"GET /cameras/serial/stream HTTP/1.1\r\nHost: test\r\n\r\n")
+            await writer.drain()
+            headers = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            parts = [await asyncio.wait_for(read_part(reader), 10) for _ in range(3)]
+            writer.close()
+            return headers, parts
+        finally:
+            await server.stop()
+            stream.stop()
+            await asyncio.get_running_loop().run_in_executor(None, hub.stop)
+            camera_server.close()
+
+    headers, parts = asyncio.run(run())
+    lines = headers.decode("latin-1").split("\r\n")
+    assert lines[0] == "HTTP/1.1 200 OK"
+    assert f"Content-Type: multipart/x-mixed-replace; boundary={BOUNDARY}" in lines
+    assert "Cache-Control: no-cache, no-store" in lines
+    expected = fake_jpeg(FRAME_SIZE)
+    for part_headers, jpeg in parts:
+        assert part_headers == [f"--{BOUNDARY}", "Content-Type: image/jpeg", f"Content-Length: {FRAME_SIZE}"]
+        # The camera stamps its send time into bytes 4 to 12 of every frame.
+        assert len(jpeg) == FRAME_SIZE
+        assert jpeg[:4] == expected[:4] and jpeg[12:] == expected[12:]
+
+
+async def read_part(reader: asyncio.StreamReader) -> tuple:
+    headers = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")[:-2]
+    length = int(headers[-1].split(": ")[1])
+    jpeg = await reader.readexactly(length)
+    assert await reader.readexactly(2) == b"\r\n"
+    return headers, jpeg
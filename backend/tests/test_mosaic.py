@@ -0,0 +1,33 @@
+import asyncio
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from pybambu.mosaic import MosaicCompositor
+
+
+def white_jpeg() -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (64, 36), (255, 255, 255)).save(output, format="JPEG")
+    return output.getvalue()
+
+
+def test_removed_client_tile_is_cleared(make_client):
+    async def run():
+        mosaic = MosaicCompositor(tile_size=(32, 18), columns=2)
+        clients = [make_client(serial=str(index)) for index in range(4)]
+        for client in clients:
+            client.get_device().chamber_image.set_jpeg(white_jpeg())
+            mosaic.add_client(client)
+        assert await mosaic.compose()
+        # Three tiles keep the 2x2 grid, so the worker reuses it.
+        mosaic.remove_client(clients[3])
+        assert await mosaic.compose()
+        await mosaic.stop()
+        return Image.open(io.BytesIO(mosaic.get_jpeg())).convert("RGB")
+
+    image = asyncio.run(run())
+    assert sum(image.getpixel((16, 9))) > 600
+    assert sum(image.getpixel((48, 27))) < 60
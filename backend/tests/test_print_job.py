@@ -0,0 +1,43 @@
+from pybambu.cover_cache import CoverCache
+
+
+class FailingCloud:
+    """Has a task for the printer but fails to download its cover"""
+
+    def get_latest_task_for_printer(self, device_id: str, max_age: float) -> dict:
+        return {"id": 1, "cover": "https://example.invalid/cover.png", "status": 2, "weight": 10, "length": 300,
+                "amsDetailMapping": []}
+
+    def download(self, url: str):
+        raise ConnectionError("download failed")
+
+
+def test_failed_cover_download_clears_the_previous_cover(client):
+    events = []
+    client.callback = events.append
+    client.bambu_cloud = FailingCloud()
+    device = client.get_device()
+    device.cover_image.set_jpeg(b"previous cover")
+
+    device.print_job._load_task_data(device.print_job._task_request)
+
+    assert device.cover_image.get_jpeg() is None
+    assert device.print_job.print_weight == 10
+    assert "event_printer_cover_image_update" in events
+    assert "event_print_task_data_update" in events
+
+
+def test_evicted_cover_is_read_again(tmp_path, make_client):
+    cache = CoverCache(str(tmp_path))
+    client = make_client(cover_cache=cache)
+    cover_image = client.get_device().cover_image
+    digest = cache.put("https://example.invalid/cover.png", b"cover")
+    cover_image.set_cached(cache, digest)
+
+    cache.clear()
+    assert cover_image.get_jpeg() == bytearray()
+    # Stored again by the next task data update, which finds the same digest.
+    assert cache.put("https://example.invalid/cover.png", b"cover") == digest
+    assert not cover_image.set_cached(cache, digest)
+    assert cover_image.get_jpeg() == b"cover"
+    cache.close()
@@ -0,0 +1,69 @@
+import pytest
+
+from pybambu.schema import PRINT, TRAY, Schema, parse_print_report
+
+FULL_REPORT = {
+    "wifi_signal": "-53dBm",
+    "nozzle_temper": "219.6",
+    "bed_temper": 59.4,
+    "mc_percent": "42",
+    "gcode_state": "RUNNING",
+    "lights_report": [{"node": "chamber_light", "mode": "on"}, {"node": "work_light", "mode": "flashing"}],
+    "upgrade_state": {"new_version_state": "2", "status": "IDLE"},
+    "ams": {"tray_now": "255", "ams": [{"id": "0", "humidity": "4", "temp": "20.1",
+                                       "tray": [{"id": "0", "remain": "50", "k": "0.02"}, {"id": "1"}]}]},
+    "hms": [{"attr": 50336000, "code": 131073}],
+}
+
+
+def padded(data: dict) -> dict:
+    # Enough unknown keys that the extractor looks up every schema key rather than walking the payload.
+    return {**data, **{f"unknown_{index}": index for index in range(len(PRINT.fields))}}
+
+
+def test_values_are_converted():
+    report = parse_print_report(padded(FULL_REPORT))
+    assert report.wifi_signal == -53
+    assert report.nozzle_temper == 220
+    assert report.bed_temper == 59
+    assert report.mc_percent == 42
+    assert report.lights_report == {"chamber_light": "on", "work_light": "flashing"}
+    assert report.upgrade_state.new_version_state == 2
+    assert report.hms[0].code == 131073
+    unit = report.ams.ams[0]
+    assert (report.ams.tray_now, unit.id, unit.humidity, unit.temp) == (255, 0, 4, 20.1)
+    assert (unit.tray[0].remain, unit.tray[0].k, unit.tray[0].key_count) == (50, 0.02, 3)
+    # A tray holding only its id is an empty slot.
+    assert unit.tray[1].key_count == 1 and not unit.tray[1].has("remain")
+
+
+def test_delta_reports_take_the_short_path_to_the_same_values():
+    delta = {"nozzle_temper": "219.6", "mc_percent": "42", "wifi_signal": "-53dBm"}
+    assert len(delta) < len(PRINT.fields)
+    short = parse_print_report(delta)
+    full = parse_print_report(padded(delta))
+    assert repr(short) == repr(full) == "PrintReport(wifi_signal=-53, mc_percent=42, nozzle_temper=220)"
+    assert not short.has("bed_temper")
+    assert short.get("bed_temper", 0) == 0
+
+
+def test_derived_values_are_set_on_both_paths():
+    assert TRAY.extract({"id": "3"}).key_count == 1
+    many = {key: "1" for key in TRAY.fields}
+    assert TRAY.extract(many).key_count == len(TRAY.fields)
+
+
+def test_unknown_keys_and_bad_values_are_left_out():
+    for data in ({"nozzle_temper": "hot", "mc_percent": None, "command": "push_status", "sequence_id": "1"},
+                 padded({"nozzle_temper": "hot", "mc_percent": None})):
+        report = parse_print_report(data)
+        assert not report.has("nozzle_temper")
+        assert not report.has("mc_percent")
+        assert not hasattr(report, "command")
+    # A bad item in a nested list drops the whole list rather than part of it.
+    assert not parse_print_report({"hms": [{"attr": 1}, "not an object"]}).has("hms")
+
+
+def test_keys_must_be_attribute_names():
+    with pytest.raises(ValueError, match="not-a-name"):
+        Schema("BadReport", {"not-a-name": int})
@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pybambu.bambu_cloud import TaskListCache
+
+
+class SlowFetch:
+    """Returns a new task list every call, once release is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        number = self.calls
+        self.started.set()
+        assert self.release.wait(10)
+        return {"hits": [{"id": number, "deviceId": "A"}]}
+
+
+def test_cached_list_is_reused():
+    cache = TaskListCache()
+    fetch = SlowFetch()
+    fetch.release.set()
+    assert cache.get(fetch)["hits"][0]["id"] == 1
+    assert cache.tasks_for_device(fetch, "A")[0]["id"] == 1
+    assert cache.tasks_for_device(fetch, "B") == []
+    assert (fetch.calls, cache.hits) == (1, 2)
+    # Too old for the caller.
+    time.sleep(0.02)
+    assert cache.get(fetch, max_age=0.01)["hits"][0]["id"] == 2
+
+
+def test_recent_request_is_joined():
+    cache = TaskListCache()
+    fetch = SlowFetch()
+    with ThreadPoolExecutor(4) as executor:
+        first = executor.submit(cache.get, fetch)
+        assert fetch.started.wait(10)
+        joined = [executor.submit(cache.get, fetch) for _ in range(3)]
+        time.sleep(0.05)
+        fetch.release.set()
+        assert [future.result()["hits"][0]["id"] for future in [first] + joined] == [1, 1, 1, 1]
+    assert (fetch.calls, cache.requests, cache.joined) == (1, 1, 3)
+
+
+def test_request_older_than_max_age_is_not_joined():
+    cache = TaskListCache()
+    fetch = SlowFetch()
+    with ThreadPoolExecutor(2) as executor:
+        first = executor.submit(cache.get, fetch)
+        assert fetch.started.wait(10)
+        time.sleep(0.05)
+        # The request in progress started before this caller's max age, so a new one starts.
+        second = executor.submit(cache.get, fetch, 0.01)
+        while fetch.calls < 2:
+            time.sleep(0.01)
+        fetch.release.set()
+        assert first.result()["hits"][0]["id"] == 1
+        assert second.result()["hits"][0]["id"] == 2
+    assert (cache.requests, cache.joined) == (2, 0)
+    # The newer list is the one kept, whichever request finished last.
+    assert cache.get(fetch)["hits"][0]["id"] == 2
@@ -0,0 +1,117 @@
+import json
+
+from benchmarks.standins import FakeCloud
+from pybambu.task_mirror import TaskMirror
+
+
+class PagedCloud:
+    """Serves the task list pages of a FakeCloud history in process, without HTTP"""
+
+    def __init__(self, tasks: int):
+        self.fake = FakeCloud(devices=3, tasks=tasks)
+        self.fake.add_tasks(tasks)
+        self.requests = 0
+        self.on_request = None
+
+    def get_tasklist(self, offset: int = 0, limit: int | None = None) -> dict:
+        self.requests += 1
+        if self.on_request is not None:
+            self.on_request(self.requests)
+        return json.loads(self.fake._task_page(f"offset={offset}&limit={limit or 20}"))
+
+    @property
+    def ids(self) -> set:
+        return {task['id'] for task in self.fake.tasks}
+
+
+def mirrored(mirror: TaskMirror) -> set:
+    return {task['id'] for task in mirror.tasks()}
+
+
+def test_sync_and_backfill_the_whole_history():
+    cloud = PagedCloud(250)
+    mirror = TaskMirror(cloud, page_size=20)
+    assert mirror.sync() == 20
+    assert mirror.backfill(pages=2) == 38
+    assert not mirror.complete
+    assert mirror.backfill() == 250 - 58
+    assert mirror.complete
+    assert mirrored(mirror) == cloud.ids
+    totals = mirror.usage()
+    assert sum(group["prints"] for group in totals.values()) == 250
+
+
+def test_sync_fetches_the_tasks_started_between_syncs():
+    cloud = PagedCloud(100)
+    mirror = TaskMirror(cloud, page_size=20)
+    mirror.sync()
+    cloud.fake.add_tasks(45)
+    assert mirror.sync() == 45
+    assert cloud.requests == 1 + 3
+    assert {task['id'] for task in cloud.fake.tasks[:65]} == mirrored(mirror)
+
+
+def test_sync_does_not_depend_on_ids_growing():
+    cloud = PagedCloud(100)
+    mirror = TaskMirror(cloud, page_size=20)
+    mirror.sync()
+    cloud.fake.add_tasks(30)
+    # Give the new tasks ids lower than every mirrored one.
+    for number, task in enumerate(cloud.fake.tasks[:30]):
+        task['id'] = number
+    assert mirror.sync() == 30
+    assert set(range(30)) <= mirrored(mirror)
+
+
+def test_backfill_after_cloud_deletions():
+    cloud = PagedCloud(200)
+    mirror = TaskMirror(cloud, page_size=20)
+    mirror.sync()
+    mirror.backfill(pages=3)
+    assert len(mirror) == 77
+    # Tasks deleted in the cloud move the older pages up past the mirror's size.
+    del cloud.fake.tasks[5:45]
+    mirror.backfill()
+    assert mirror.complete
+    assert cloud.ids <= mirrored(mirror)
+
+
+def test_backfill_while_new_tasks_start():
+    cloud = PagedCloud(200)
+    mirror = TaskMirror(cloud, page_size=20)
+    mirror.sync()
+
+    def start_prints(request: int):
+        if request == 3:
+            cloud.fake.add_tasks(50)
+
+    cloud.on_request = start_prints
+    mirror.backfill()
+    mirror.sync()
+    assert mirror.complete
+    assert mirrored(mirror) == cloud.ids
+
+
+def test_reopen_a_file_backed_mirror(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    cloud = PagedCloud(120)
+    mirror = TaskMirror(cloud, path=path, page_size=20)
+    mirror.sync()
+    mirror.backfill(pages=2)
+    mirror.close()
+
+    cloud.fake.add_tasks(10)
+    mirror = TaskMirror(cloud, path=path, page_size=20)
+    assert len(mirror) == 58
+    assert mirror.sync() == 10
+    mirror.backfill()
+    assert mirror.complete
+    mirror.close()
+
+    mirror = TaskMirror(cloud, path=path, page_size=20)
+    assert mirror.complete
+    assert mirrored(mirror) == cloud.ids
+    requests = cloud.requests
+    assert mirror.backfill() == 0
+    assert cloud.requests == requests
+    mirror.close()
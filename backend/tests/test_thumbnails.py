@@ -0,0 +1,71 @@
+import asyncio
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from pybambu.thumbnails import ThumbnailCache
+
+
+def jpeg(color: tuple) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(output, format="JPEG")
+    return output.getvalue()
+
+
+class FakeImage:
+    """An image whose version moves on while its frame is being read, as when a frame arrives in between"""
+
+    def __init__(self, frames: list):
+        self.frames = frames
+        self.reads = 0
+        self.threads = []
+
+    @property
+    def version(self) -> int:
+        return min(self.reads + 1, len(self.frames))
+
+    def get_frame(self) -> tuple:
+        self.threads.append(threading.current_thread())
+        self.reads += 1
+        return self.frames[self.version - 1], self.version
+
+
+class FakeClient:
+    def __init__(self, image: FakeImage):
+        self._serial = "serial"
+        self.chamber_image = image
+        self.cover_image = image
+
+    def get_device(self):
+        return self
+
+
+def colour(variant: bytes) -> tuple:
+    return Image.open(io.BytesIO(variant)).convert("RGB").getpixel((8, 8))
+
+
+@pytest.mark.parametrize("source", ["chamber", "cover"])
+def test_variant_is_kept_under_the_version_read_with_its_bytes(source):
+    async def run():
+        image = FakeImage([jpeg((255, 0, 0)), jpeg((0, 0, 255))])
+        client = FakeClient(image)
+        with ThreadPoolExecutor(1) as executor:
+            cache = ThumbnailCache(sizes=((32, 24),), executor=executor)
+            # Looked up as version 1, but version 2 arrived before the bytes were read.
+            variant = await cache.thumbnail(client, source=source)
+            assert cache.get(client, source=source) is variant
+            assert list(cache._variants) == [("serial", source, 2, (32, 24), "jpeg")]
+            # Served from the cache without reading the image again.
+            assert await cache.thumbnail(client, source=source) is variant
+            assert (image.reads, cache.hits, cache.misses) == (1, 1, 1)
+        return variant, image.threads
+
+    variant, threads = asyncio.run(run())
+    red, green, blue = colour(variant)
+    assert blue > 200 and red < 60
+    # A cover can be read from disk, which the loop must not wait for.
+    assert (threads[0] is threading.main_thread()) == (source == "chamber")
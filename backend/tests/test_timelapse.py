@@ -0,0 +1,67 @@
+import struct
+
+from pybambu.timelapse import AVIIF_KEYFRAME, AVIWriter, get_jpeg_size
+
+
+def jpeg(width: int, height: int, size: int) -> bytes:
+    # SOI, an APP0 segment and a start of frame segment, padded to size.
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    data = b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", 4) + b"\0\0" + sof
+    return data + b"\0" * (size - len(data) - 2) + b"\xff\xd9"
+
+
+def chunks(data: bytes, start: int, end: int) -> dict:
+    found = {}
+    offset = start
+    while offset < end:
+        fourcc = data[offset:offset + 4]
+        size = struct.unpack_from("<I", data, offset + 4)[0]
+        found.setdefault(fourcc, []).append((offset, size))
+        offset += 8 + size + size % 2
+    return found
+
+
+def test_jpeg_size():
+    assert get_jpeg_size(jpeg(1920, 1080, 100)) == (1920, 1080)
+    assert get_jpeg_size(b"\xff\xd8\x00\x00" + b"\0" * 20) is None
+
+
+def test_avi_headers_and_index(tmp_path):
+    path = str(tmp_path / "video.avi")
+    frames = [jpeg(640, 480, size) for size in (101, 200, 333, 150)]
+    writer = AVIWriter(path, 640, 480, fps=10)
+    for frame in frames:
+        writer.write(frame)
+    size = writer.size
+    writer.close()
+    with open(path, "rb") as f:
+        data = f.read()
+
+    assert len(data) == size
+    assert data[:4] == b"RIFF" and data[8:12] == b"AVI "
+    assert struct.unpack_from("<I", data, 4)[0] == len(data) - 8
+    top = chunks(data, 12, len(data))
+    assert list(top) == [b"LIST", b"idx1"]
+    (hdrl_offset, _), (movi_offset, movi_size) = top[b"LIST"]
+    assert data[hdrl_offset + 8:hdrl_offset + 12] == b"hdrl"
+    assert data[movi_offset + 8:movi_offset + 12] == b"movi"
+    idx1_offset, idx1_size = top[b"idx1"][0]
+    assert movi_offset + 8 + movi_size == idx1_offset
+
+    avih = hdrl_offset + 12 + 8
+    assert data[avih - 8:avih - 4] == b"avih"
+    microseconds, _, _, _, total_frames, _, streams, buffer_size, width, height = struct.unpack_from("<10I", data, avih)
+    assert (microseconds, total_frames, streams, buffer_size, width, height) == (100000, 4, 1, 333, 640, 480)
+    strh = data.index(b"strh") + 8
+    assert data[strh:strh + 8] == b"vidsMJPG"
+    scale, rate, start, length, buffer_size = struct.unpack_from("<5I", data, strh + 20)
+    assert (scale, rate, length, buffer_size) == (1000, 10000, 4, 333)
+
+    # Every index entry points at its frame chunk, counted from the movi fourcc.
+    movi = movi_offset + 8
+    assert idx1_size == 16 * len(frames)
+    for index, frame in enumerate(frames):
+        fourcc, flags, offset, length = struct.unpack_from("<4sIII", data, idx1_offset + 8 + 16 * index)
+        assert (fourcc, flags, length) == (b"00dc", AVIIF_KEYFRAME, len(frame))
+        assert data[movi + offset:movi + offset + 4] == b"00dc"
+        assert data[movi + offset + 8:movi + offset + 8 + length] == frame